@@ -0,0 +1,5 @@
+"""
+Micro-benchmarks for the CRM hot paths.
+
+Run with ``python -m benchmarks``; see ``benchmarks/README.md`` for options.
+"""
@@ -0,0 +1,71 @@
+"""
+Command-line entry point: ``python -m benchmarks``.
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark CRM queries, views, serializers and CSV import/export.',
+    )
+    parser.add_argument(
+        '--scale', dest='scales', default='10k',
+        help='Comma-separated dataset scales for generate_dataset (default: 10k)',
+    )
+    parser.add_argument(
+        '--case', dest='cases', action='append', default=[],
+        help='Only run cases matching this pattern, e.g. "api.companies.*" (repeatable)',
+    )
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case (default: 5)')
+    parser.add_argument('--seed', type=int, default=42, help='Dataset seed (default: 42)')
+    parser.add_argument(
+        '--keepdb', action='store_true',
+        help='Keep benchmark databases between runs instead of regenerating them',
+    )
+    parser.add_argument(
+        '--output', type=Path,
+        help='Results file (default: benchmarks/results/<revision>.json)',
+    )
+    parser.add_argument('--compare', type=Path, help='Previous results file to compare against')
+    parser.add_argument('--list', action='store_true', help='List the available cases and exit')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crm_project.settings')
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.test.utils import setup_test_environment
+    from . import runner
+
+    if args.list:
+        for name in runner.select_cases(args.cases):
+            print(name)
+        return
+
+    # Benchmarks should not pay for DEBUG query logging
+    settings.DEBUG = False
+    setup_test_environment(debug=False)
+
+    scales = [scale.strip() for scale in args.scales.split(',') if scale.strip()]
+    results = runner.run(scales, args.cases, args.repeat, args.seed, args.keepdb)
+
+    output = args.output or (
+        Path(settings.BASE_DIR) / 'benchmarks' / 'results' / f'{results["meta"]["revision"]}.json'
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, sort_keys=True))
+    print(f'Results written to {output}')
+
+    if args.compare:
+        runner.compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
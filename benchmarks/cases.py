@@ -0,0 +1,253 @@
+"""
+Benchmark cases.
+
+Each case is a function taking the ``BenchContext`` for the current dataset
+and performing one request or serializer call. Register new cases with the
+``@case`` decorator; cases that write to the database should pass
+``writes=True`` so the runner rolls them back after every iteration.
+"""
+import csv
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import Count
+
+from companies.models import Company
+from companies.serializers import CompanySerializer, CompanyListSerializer
+from contacts.models import Contact
+from contacts.serializers import ContactSerializer, ContactListSerializer
+from deals.models import Deal
+from deals.serializers import DealSerializer, DealListSerializer
+
+
+CASES = {}
+
+# Rows in the synthetic CSV used by the upload cases.
+UPLOAD_ROWS = 500
+
+# Objects serialized per call in the serializer-only cases.
+SERIALIZER_BATCH = 100
+
+
+def case(name, writes=False):
+    """Register a benchmark case under ``name``."""
+    def decorator(func):
+        CASES[name] = {'func': func, 'writes': writes}
+        return func
+    return decorator
+
+
+class BenchContext:
+    """Sample objects and a logged-in client shared by all cases for one dataset."""
+
+    def __init__(self, client):
+        self.client = client
+        self.company = Company.objects.order_by('id')[Company.objects.count() // 2]
+        self.big_company = (
+            Company.objects.annotate(n=Count('contacts')).order_by('-n', 'id').first()
+        )
+        self.contact = Contact.objects.order_by('id')[Contact.objects.count() // 2]
+        self.deal = Deal.objects.select_related('company', 'contact').order_by('id')[
+            Deal.objects.count() // 2
+        ]
+        self.search_term = self.company.name.split()[0]
+
+        self.companies = list(
+            Company.objects.select_related('primary_contact').order_by('id')[:SERIALIZER_BATCH]
+        )
+        self.contacts = list(
+            Contact.objects.select_related('company').order_by('id')[:SERIALIZER_BATCH]
+        )
+        self.deals = list(
+            Deal.objects.select_related('company', 'contact').order_by('id')[:SERIALIZER_BATCH]
+        )
+        self.upload_csv = self.build_upload_csv()
+
+    def build_upload_csv(self):
+        """Half of the rows update existing companies, half create new ones."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['name', 'website', 'email', 'phone', 'industry', 'milestone', 'notes'])
+        existing = Company.objects.order_by('id').values_list('name', flat=True)[:UPLOAD_ROWS // 2]
+        for name in existing:
+            writer.writerow([name, '', '', '', 'Technology', 'first_call', 'Updated by benchmark'])
+        for index in range(UPLOAD_ROWS - len(existing)):
+            writer.writerow([
+                f'Benchmark Upload {index:05d}', 'https://bench.example.com',
+                f'bench{index}@example.com', '', 'Retail', 'not_contacted', '',
+            ])
+        return buffer.getvalue().encode('utf-8')
+
+    def upload_file(self, field_name='file'):
+        return {field_name: SimpleUploadedFile('bench.csv', self.upload_csv, content_type='text/csv')}
+
+
+def consume(response):
+    """Read the full response body, including streamed content."""
+    if getattr(response, 'streaming', False):
+        for _ in response.streaming_content:
+            pass
+    else:
+        response.content
+    assert response.status_code < 400, f'{response.status_code} from {response.wsgi_request.path}'
+    return response
+
+
+# API: companies
+
+@case('api.companies.list')
+def api_companies_list(ctx):
+    consume(ctx.client.get('/api/companies/'))
+
+
+@case('api.companies.list_search')
+def api_companies_list_search(ctx):
+    consume(ctx.client.get('/api/companies/', {'search': ctx.search_term}))
+
+
+@case('api.companies.retrieve')
+def api_companies_retrieve(ctx):
+    consume(ctx.client.get(f'/api/companies/{ctx.company.pk}/'))
+
+
+@case('api.companies.by_milestone')
+def api_companies_by_milestone(ctx):
+    consume(ctx.client.get('/api/companies/by_milestone/'))
+
+
+@case('api.companies.contacts')
+def api_companies_contacts(ctx):
+    consume(ctx.client.get(f'/api/companies/{ctx.big_company.pk}/contacts/'))
+
+
+@case('api.companies.deals')
+def api_companies_deals(ctx):
+    consume(ctx.client.get(f'/api/companies/{ctx.big_company.pk}/deals/'))
+
+
+@case('api.companies.export_csv')
+def api_companies_export_csv(ctx):
+    consume(ctx.client.get('/api/companies/export_csv/'))
+
+
+@case('api.companies.upload_csv', writes=True)
+def api_companies_upload_csv(ctx):
+    consume(ctx.client.post('/api/companies/upload_csv/', ctx.upload_file()))
+
+
+# API: contacts
+
+@case('api.contacts.list')
+def api_contacts_list(ctx):
+    consume(ctx.client.get('/api/contacts/'))
+
+
+@case('api.contacts.list_search')
+def api_contacts_list_search(ctx):
+    consume(ctx.client.get('/api/contacts/', {'search': ctx.contact.last_name}))
+
+
+@case('api.contacts.retrieve')
+def api_contacts_retrieve(ctx):
+    consume(ctx.client.get(f'/api/contacts/{ctx.contact.pk}/'))
+
+
+@case('api.contacts.deals')
+def api_contacts_deals(ctx):
+    consume(ctx.client.get(f'/api/contacts/{ctx.contact.pk}/deals/'))
+
+
+# API: deals
+
+@case('api.deals.list')
+def api_deals_list(ctx):
+    consume(ctx.client.get('/api/deals/'))
+
+
+@case('api.deals.list_status')
+def api_deals_list_status(ctx):
+    consume(ctx.client.get('/api/deals/', {'status': 'negotiation'}))
+
+
+@case('api.deals.list_search')
+def api_deals_list_search(ctx):
+    consume(ctx.client.get('/api/deals/', {'search': ctx.search_term}))
+
+
+@case('api.deals.retrieve')
+def api_deals_retrieve(ctx):
+    consume(ctx.client.get(f'/api/deals/{ctx.deal.pk}/'))
+
+
+# Dashboard pages
+
+@case('dashboard.dashboard')
+def dashboard_dashboard(ctx):
+    consume(ctx.client.get('/'))
+
+
+@case('dashboard.company_list')
+def dashboard_company_list(ctx):
+    consume(ctx.client.get('/companies/'))
+
+
+@case('dashboard.company_list_search')
+def dashboard_company_list_search(ctx):
+    consume(ctx.client.get('/companies/', {'search': ctx.search_term}))
+
+
+@case('dashboard.company_detail')
+def dashboard_company_detail(ctx):
+    consume(ctx.client.get(f'/companies/{ctx.big_company.pk}/'))
+
+
+@case('dashboard.company_export_csv')
+def dashboard_company_export_csv(ctx):
+    consume(ctx.client.get('/companies/export-csv/'))
+
+
+@case('dashboard.company_upload_csv', writes=True)
+def dashboard_company_upload_csv(ctx):
+    consume(ctx.client.post('/companies/upload-csv/', ctx.upload_file('csv_file')))
+
+
+@case('dashboard.contact_list')
+def dashboard_contact_list(ctx):
+    consume(ctx.client.get('/contacts/'))
+
+
+@case('dashboard.contact_list_search')
+def dashboard_contact_list_search(ctx):
+    consume(ctx.client.get('/contacts/', {'search': ctx.contact.last_name}))
+
+
+# Serializers in isolation (objects are pre-loaded; only related lookups hit the DB)
+
+@case('serializer.company')
+def serializer_company(ctx):
+    CompanySerializer(ctx.companies, many=True).data
+
+
+@case('serializer.company_list')
+def serializer_company_list(ctx):
+    CompanyListSerializer(ctx.companies, many=True).data
+
+
+@case('serializer.contact')
+def serializer_contact(ctx):
+    ContactSerializer(ctx.contacts, many=True).data
+
+
+@case('serializer.contact_list')
+def serializer_contact_list(ctx):
+    ContactListSerializer(ctx.contacts, many=True).data
+
+
+@case('serializer.deal')
+def serializer_deal(ctx):
+    DealSerializer(ctx.deals, many=True).data
+
+
+@case('serializer.deal_list')
+def serializer_deal_list(ctx):
+    DealListSerializer(ctx.deals, many=True).data
@@ -0,0 +1,437 @@
+"""
+End-to-end load test: ``python -m benchmarks.loadtest``.
+
+Boots the app under gunicorn on a local port against a seeded database,
+logs in a pool of users through the real login form, then replays a
+weighted traffic mix from a pool of threads and reports latency
+percentiles, throughput and error rate per endpoint.
+
+``--server uvicorn --read-path async`` runs the same mix against the ASGI
+app, with the API list and detail requests sent to the async endpoints
+under ``/api/async/``, for a like-for-like comparison with the sync path.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+LOADTEST_PASSWORD = 'loadtest-password'
+
+# Default traffic mix: endpoint name -> relative weight.
+DEFAULT_MIX = {
+    'dashboard': 10,
+    'company_list': 10,
+    'company_search': 15,
+    'api_list': 25,
+    'api_detail': 30,
+    'milestone_update': 8,
+    'export_csv': 2,
+}
+
+MILESTONES = [
+    'not_contacted', 'first_call', 'not_interested', 'email_sent',
+    'meeting_arranged', 'waiting_on_contact', 'successful',
+]
+
+
+def parse_mix(value):
+    """Parse ``name=weight,name=weight`` into a mix dict."""
+    if not value:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f'Unknown endpoint "{name}". Choose from: {", ".join(DEFAULT_MIX)}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Session:
+    """A logged-in user: one keep-alive connection plus its cookies."""
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.cookies = {}
+        self.conn = None
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                data = response.read()
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # Sync gunicorn workers close idle keep-alive connections
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+        for header, value in response.getheaders():
+            if header.lower() == 'set-cookie':
+                # Secure/HttpOnly attributes are ignored on purpose: the test
+                # server runs plain HTTP with production cookie settings.
+                name, _, rest = value.partition('=')
+                self.cookies[name.strip()] = rest.split(';', 1)[0]
+        if response.getheader('Connection', '').lower() == 'close':
+            self.conn.close()
+            self.conn = None
+        return response.status, data
+
+    def login(self, username, password):
+        self.request('GET', '/login/')
+        csrf_token = self.cookies.get('csrftoken', '')
+        status, _ = self.request(
+            'POST', '/login/',
+            body=urlencode({
+                'username': username,
+                'password': password,
+                'csrfmiddlewaretoken': csrf_token,
+            }),
+            headers={'Content-Type': 'application/x-www-form-urlencoded'},
+        )
+        if status != 302 or 'sessionid' not in self.cookies:
+            raise SystemExit(f'Login failed for {username} (HTTP {status})')
+
+
+class TrafficMix:
+    """Builds the request for each endpoint from sampled ids and search terms."""
+
+    def __init__(self, samples, mix, api_prefix='/api/'):
+        self.samples = samples
+        self.api_prefix = api_prefix
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+
+    def pick(self, rng):
+        return rng.choices(self.names, self.weights)[0]
+
+    def build(self, name, rng, session):
+        samples = self.samples
+        if name == 'dashboard':
+            return 'GET', '/', None, {}
+        if name == 'company_list':
+            return 'GET', '/companies/', None, {}
+        if name == 'company_search':
+            return 'GET', '/companies/?' + urlencode({'search': rng.choice(samples['search_terms'])}), None, {}
+        if name == 'api_list':
+            resource = rng.choice(['companies', 'contacts', 'deals'])
+            pages = max(1, samples['counts'][resource] // samples['page_size'])
+            return 'GET', f'{self.api_prefix}{resource}/?page={rng.randint(1, min(pages, 50))}', None, {}
+        if name == 'api_detail':
+            resource = rng.choice(['companies', 'contacts', 'deals'])
+            return 'GET', f'{self.api_prefix}{resource}/{rng.choice(samples["ids"][resource])}/', None, {}
+        if name == 'milestone_update':
+            company_id = rng.choice(samples['ids']['companies'])
+            return (
+                'POST',
+                f'/companies/{company_id}/update-milestone/',
+                json.dumps({'milestone': rng.choice(MILESTONES)}),
+                {'Content-Type': 'application/json', 'X-CSRFToken': session.cookies.get('csrftoken', '')},
+            )
+        if name == 'export_csv':
+            return 'GET', '/companies/export-csv/?' + urlencode({'milestone': rng.choice(MILESTONES)}), None, {}
+        raise ValueError(name)
+
+
+def prepare_database(args):
+    """Migrate, seed and create users; return the samples used to build requests."""
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection
+    from companies.models import Company
+    from contacts.models import Contact
+    from deals.models import Deal
+    from contacts.management.commands.generate_dataset import parse_scale, COMPANY_SHARE
+
+    call_command('migrate', verbosity=0)
+    expected_companies = max(1, int(parse_scale(args.scale) * COMPANY_SHARE))
+    if args.reseed or Company.objects.count() != expected_companies:
+        call_command('generate_dataset', scale=args.scale, seed=args.seed, clear=True)
+
+    User = get_user_model()
+    for index in range(args.users):
+        user, created = User.objects.get_or_create(username=f'loadtest{index}')
+        if created:
+            user.set_password(LOADTEST_PASSWORD)
+            user.save()
+
+    rng = random.Random(args.seed)
+
+    def sample_ids(model):
+        ids = list(model.objects.values_list('id', flat=True)[:100_000])
+        return rng.sample(ids, min(len(ids), 1000))
+
+    samples = {
+        'ids': {
+            'companies': sample_ids(Company),
+            'contacts': sample_ids(Contact),
+            'deals': sample_ids(Deal),
+        },
+        'counts': {
+            'companies': Company.objects.count(),
+            'contacts': Contact.objects.count(),
+            'deals': Deal.objects.count(),
+        },
+        'search_terms': sorted({
+            name.split()[0] for name in Company.objects.values_list('name', flat=True)[:1000]
+        }),
+        'page_size': settings.REST_FRAMEWORK.get('PAGE_SIZE') or 10,
+    }
+    connection.close()
+    return samples
+
+
+def start_server(args, env):
+    if args.server == 'uvicorn':
+        command = [
+            sys.executable, '-m', 'gunicorn', 'crm_project.asgi:application',
+            '--worker-class', 'uvicorn.workers.UvicornWorker',
+            '--bind', f'127.0.0.1:{args.port}',
+            '--workers', str(args.workers),
+            '--log-level', 'warning',
+        ]
+    elif args.server == 'gunicorn':
+        command = [
+            sys.executable, '-m', 'gunicorn', 'crm_project.wsgi:application',
+            '--bind', f'127.0.0.1:{args.port}',
+            '--workers', str(args.workers),
+            '--threads', str(args.threads),
+            '--log-level', 'warning',
+        ]
+    else:
+        command = [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{args.port}', '--noreload']
+        if args.threads <= 1:
+            command.append('--nothreading')
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'Server exited with code {process.returncode}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', args.port, timeout=1)
+            conn.request('GET', '/login/')
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit('Server did not start within 30 seconds')
+
+
+def run_load(args, host, port, mix):
+    """Drive the traffic mix and return (per-endpoint samples, measured seconds)."""
+    sessions = []
+    for index in range(args.users):
+        session = Session(host, port, args.timeout)
+        session.login(f'loadtest{index}', LOADTEST_PASSWORD)
+        sessions.append(session)
+
+    # Each thread owns one session; users are shared round-robin if
+    # there are more threads than users.
+    thread_sessions = []
+    for index in range(args.concurrency):
+        if index < len(sessions):
+            thread_sessions.append(sessions[index])
+        else:
+            session = Session(host, port, args.timeout)
+            session.cookies = dict(sessions[index % len(sessions)].cookies)
+            thread_sessions.append(session)
+
+    results = defaultdict(list)
+    lock = threading.Lock()
+    started = time.monotonic()
+    measure_from = started + args.warmup
+    stop_at = measure_from + args.duration
+
+    def worker(thread_index, session):
+        rng = random.Random(args.seed + thread_index)
+        local = defaultdict(list)
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                break
+            name = mix.pick(rng)
+            method, path, body, headers = mix.build(name, rng, session)
+            request_started = time.perf_counter()
+            try:
+                status, _ = session.request(method, path, body, headers)
+                ok = status < 400
+            except (OSError, http.client.HTTPException):
+                ok = False
+            elapsed = (time.perf_counter() - request_started) * 1000
+            if now >= measure_from:
+                local[name].append((elapsed, ok))
+        with lock:
+            for name, samples in local.items():
+                results[name].extend(samples)
+
+    threads = [
+        threading.Thread(target=worker, args=(index, session), daemon=True)
+        for index, session in enumerate(thread_sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, args.duration
+
+
+def summarize(results, seconds):
+    report = {}
+    everything = []
+    for name in sorted(results):
+        samples = results[name]
+        everything.extend(samples)
+        report[name] = summarize_samples(samples, seconds)
+    report['TOTAL'] = summarize_samples(everything, seconds)
+    return report
+
+
+def summarize_samples(samples, seconds):
+    latencies = sorted(latency for latency, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    return {
+        'requests': len(samples),
+        'rps': round(len(samples) / seconds, 2) if seconds else 0,
+        'error_rate': round(errors / len(samples), 4) if samples else 0,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0,
+    }
+
+
+def print_report(report):
+    print(f'{"endpoint":<18} {"reqs":>7} {"req/s":>8} {"errors":>7} {"p50":>9} {"p95":>9} {"p99":>9} {"max":>9}')
+    for name, row in report.items():
+        print(
+            f'{name:<18} {row["requests"]:>7} {row["rps"]:>8.1f} {row["error_rate"]:>7.1%} '
+            f'{row["p50_ms"]:>7.1f}ms {row["p95_ms"]:>7.1f}ms {row["p99_ms"]:>7.1f}ms {row["max_ms"]:>7.1f}ms'
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.loadtest',
+        description='Boot the app locally and replay a weighted traffic mix against it.',
+    )
+    parser.add_argument('--scale', default='10k', help='Dataset scale for generate_dataset (default: 10k)')
+    parser.add_argument('--seed', type=int, default=42, help='Dataset and traffic seed (default: 42)')
+    parser.add_argument('--reseed', action='store_true', help='Regenerate the dataset even if it exists')
+    parser.add_argument(
+        '--database-url',
+        help='Database to test against (default: a SQLite file db_load_<scale>.sqlite3)',
+    )
+    parser.add_argument(
+        '--url',
+        help='Load an already running server at this base URL instead of booting one',
+    )
+    parser.add_argument(
+        '--server', choices=['gunicorn', 'uvicorn', 'runserver'], default='gunicorn',
+        help='gunicorn (WSGI, sync workers), uvicorn (ASGI, gunicorn with uvicorn workers) or runserver',
+    )
+    parser.add_argument(
+        '--read-path', choices=['sync', 'async'], default='sync',
+        help='Send API list/detail requests to the DRF viewsets or to /api/async/ (default: sync)',
+    )
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2, help='Server worker processes (default: 2)')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per worker, WSGI only (default: 4)')
+    parser.add_argument('--users', type=int, default=8, help='Logged-in user sessions (default: 8)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Client threads (default: 16)')
+    parser.add_argument('--duration', type=float, default=30, help='Measured seconds (default: 30)')
+    parser.add_argument('--warmup', type=float, default=5, help='Unmeasured warm-up seconds (default: 5)')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument(
+        '--mix',
+        help='Traffic weights, e.g. "api_detail=50,dashboard=10" '
+             f'(endpoints: {", ".join(DEFAULT_MIX)})',
+    )
+    parser.add_argument('--output', type=Path, help='Also write the report as JSON to this file')
+    args = parser.parse_args(argv)
+
+    mix_weights = parse_mix(args.mix)
+    database_url = args.database_url or f'sqlite:///{BASE_DIR / f"db_load_{args.scale}.sqlite3"}'
+    env = dict(os.environ, DATABASE_URL=database_url, DEBUG='False')
+    os.environ.update(DATABASE_URL=database_url, DEBUG='False')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crm_project.settings')
+    sys.path.insert(0, str(BASE_DIR))
+
+    print(f'Preparing {database_url} at scale {args.scale}...')
+    samples = prepare_database(args)
+    mix = TrafficMix(samples, mix_weights, api_prefix='/api/async/' if args.read_path == 'async' else '/api/')
+
+    process = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = '127.0.0.1', args.port
+        if args.server == 'uvicorn':
+            print(f'Starting gunicorn with {args.workers} uvicorn workers...')
+        else:
+            print(f'Starting {args.server} with {args.workers} workers x {args.threads} threads...')
+        process = start_server(args, env)
+
+    try:
+        print(
+            f'Running {args.concurrency} client threads for {args.warmup:g}s warm-up '
+            f'+ {args.duration:g}s...'
+        )
+        results, seconds = run_load(args, host, port, mix)
+    finally:
+        if process is not None:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
+
+    report = summarize(results, seconds)
+    print_report(report)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({
+            'config': {
+                key: (str(value) if isinstance(value, Path) else value)
+                for key, value in vars(args).items()
+            },
+            'mix': mix_weights,
+            'endpoints': report,
+        }, indent=2))
+        print(f'Report written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
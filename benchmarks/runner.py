@@ -0,0 +1,192 @@
+"""
+Dataset setup and measurement for the benchmark cases.
+"""
+import fnmatch
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from companies.models import Company
+
+from .cases import CASES, BenchContext
+
+
+BENCH_USERNAME = 'benchmark'
+
+
+class Rollback(Exception):
+    """Raised inside an atomic block to discard a write case's changes."""
+
+
+def select_cases(patterns):
+    """Return case names matching any of the shell-style ``patterns``."""
+    if not patterns:
+        return list(CASES)
+    return [name for name in CASES if any(fnmatch.fnmatch(name, p) for p in patterns)]
+
+
+def use_dataset(base_name, scale, seed, keepdb):
+    """
+    Point the default connection at the benchmark database for ``scale``.
+
+    Each scale gets its own test database (``<name>_bench_<scale>``), created
+    and migrated through Django's test machinery. With ``keepdb`` an existing
+    database that already holds the dataset is reused instead of regenerated.
+    """
+    from contacts.management.commands.generate_dataset import parse_scale, COMPANY_SHARE
+
+    connection.close()
+    if connection.vendor == 'sqlite':
+        test_name = f'{base_name.rsplit(".", 1)[0]}_bench_{scale}.sqlite3'
+    else:
+        test_name = f'{base_name}_bench_{scale}'
+    connection.settings_dict['NAME'] = base_name
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = test_name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+
+    expected_companies = max(1, int(parse_scale(scale) * COMPANY_SHARE))
+    if Company.objects.count() != expected_companies:
+        call_command('generate_dataset', scale=scale, seed=seed, clear=True)
+
+    user, _ = get_user_model().objects.get_or_create(
+        username=BENCH_USERNAME, defaults={'is_staff': True}
+    )
+    client = Client()
+    client.force_login(user)
+    return BenchContext(client)
+
+
+def run_once(func, ctx, writes):
+    if not writes:
+        func(ctx)
+        return
+    try:
+        with transaction.atomic():
+            func(ctx)
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def measure(name, ctx, repeat):
+    """Time ``repeat`` runs of a case, then count its queries and peak memory."""
+    spec = CASES[name]
+    func, writes = spec['func'], spec['writes']
+
+    # Warm-up run fills template, URL resolver and serializer caches
+    run_once(func, ctx, writes)
+
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        run_once(func, ctx, writes)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    with CaptureQueriesContext(connection) as queries:
+        run_once(func, ctx, writes)
+    query_count = len(queries)
+    query_time = sum(float(q['time']) for q in queries.captured_queries) * 1000
+    reset_queries()
+
+    # tracemalloc slows execution down a lot, so it gets its own run
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run_once(func, ctx, writes)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'wall_ms_min': round(min(timings), 3),
+        'wall_ms_median': round(statistics.median(timings), 3),
+        'wall_ms_max': round(max(timings), 3),
+        'queries': query_count,
+        'query_ms': round(query_time, 3),
+        'peak_kib': round(peak / 1024, 1),
+        'repeat': repeat,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(scales, patterns, repeat, seed, keepdb, report=print):
+    """Run the selected cases at every scale and return the results document."""
+    names = select_cases(patterns)
+    if not names:
+        raise SystemExit(f'No benchmark cases match {patterns}')
+
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'seed': seed,
+            'repeat': repeat,
+        },
+        'results': {},
+    }
+    base_name = str(connection.settings_dict['NAME'])
+    for scale in scales:
+        report(f'== scale {scale} ==')
+        ctx = use_dataset(base_name, scale, seed, keepdb)
+        scale_results = results['results'][scale] = {}
+        for name in names:
+            scale_results[name] = result = measure(name, ctx, repeat)
+            report(
+                f'  {name:<36} {result["wall_ms_median"]:>10.2f} ms '
+                f'{result["queries"]:>6} queries {result["peak_kib"]:>10.1f} KiB'
+            )
+        if not keepdb:
+            connection.creation.destroy_test_db(base_name, verbosity=0)
+    return results
+
+
+def compare(baseline_path, current, report=print, threshold=0.10):
+    """Print per-case changes against a previous results file."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    report(
+        f'== compared with {baseline["meta"]["revision"]} '
+        f'(>{threshold:.0%} changes marked) =='
+    )
+    for scale, cases in current['results'].items():
+        for name, result in cases.items():
+            before = baseline['results'].get(scale, {}).get(name)
+            if not before:
+                continue
+            ratio = result['wall_ms_median'] / before['wall_ms_median'] if before['wall_ms_median'] else 1
+            marker = ''
+            if ratio > 1 + threshold:
+                marker = '  SLOWER'
+            elif ratio < 1 - threshold:
+                marker = '  faster'
+            query_delta = result['queries'] - before['queries']
+            report(
+                f'  {scale:>5} {name:<36} {ratio:>6.2f}x time '
+                f'{query_delta:+6d} queries{marker}'
+            )
@@ -0,0 +1,67 @@
+"""
+Async read endpoints for companies, served under ``/api/async/companies/``.
+
+Same responses as the matching ``CompanyViewSet`` actions; see
+``crm_project.async_api`` for how the independent queries overlap.
+"""
+from django.http import JsonResponse
+
+from contacts.models import Contact
+from contacts.serializers import ContactListSerializer
+from crm_project.async_api import list_response, not_found, run_concurrently
+from deals.models import Deal
+from deals.serializers import DealListSerializer
+from .models import Company
+from .serializers import CompanySerializer, CompanyListSerializer
+from .views import CompanyViewSet
+
+# Contacts and deals embedded in the detail response
+RELATED_LIMIT = 50
+
+
+async def company_list(request):
+    """Paginated, filterable company list; the page and count run concurrently."""
+    return await list_response(request, CompanyViewSet, select_related=['primary_contact'])
+
+
+async def company_detail(request, pk):
+    """
+    One company with its counts and most recent contacts and deals.
+
+    The company, both counts and both related lists are five independent
+    queries, all issued at once.
+    """
+    company, contacts_count, deals_count, contacts, deals = await run_concurrently(
+        lambda: Company.objects.select_related('primary_contact').filter(pk=pk).first(),
+        Contact.objects.filter(company_id=pk).count,
+        Deal.objects.filter(company_id=pk).count,
+        lambda: list(Contact.objects.filter(company_id=pk).select_related('company')[:RELATED_LIMIT]),
+        lambda: list(Deal.objects.filter(company_id=pk).select_related('company')[:RELATED_LIMIT]),
+    )
+    if company is None:
+        return not_found(Company)
+
+    company.contacts_count = contacts_count
+    company.deals_count = deals_count
+    data = CompanySerializer(company).data
+    data['contacts'] = ContactListSerializer(contacts, many=True).data
+    data['deals'] = DealListSerializer(deals, many=True).data
+    return JsonResponse(data)
+
+
+async def company_by_milestone(request):
+    """Companies grouped by milestone, one concurrent query per milestone."""
+    querysets = [
+        Company.objects.filter(milestone=milestone_key).select_related('primary_contact')
+        for milestone_key, _ in Company.MILESTONE_CHOICES
+    ]
+    results = await run_concurrently(*(lambda queryset=queryset: list(queryset) for queryset in querysets))
+
+    milestone_data = {}
+    for (milestone_key, milestone_label), companies in zip(Company.MILESTONE_CHOICES, results):
+        milestone_data[milestone_key] = {
+            'label': milestone_label,
+            'count': len(companies),
+            'companies': CompanyListSerializer(companies, many=True).data,
+        }
+    return JsonResponse(milestone_data)
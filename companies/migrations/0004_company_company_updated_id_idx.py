@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_company_primary_contact'),
+        ('contacts', '0002_contact_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['updated_at', 'id'], name='company_updated_id_idx'),
+        ),
+    ]
@@ -43,10 +43,23 @@ class Company(models.Model):
         ordering = ['name']
         verbose_name = 'Company'
         verbose_name_plural = 'Companies'
+        indexes = [
+            # Change feed keyset order
+            models.Index(fields=['updated_at', 'id'], name='company_updated_id_idx'),
+        ]
     
     def __str__(self):
         return self.name
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets dashboard.live tell whether a save changed the milestone
+        # without reading it again
+        if 'milestone' in field_names:
+            instance._loaded_milestone = instance.milestone
+        return instance
+    
     def get_milestone_display_with_emoji(self):
         """Get milestone display with emoji indicator."""
         emoji_map = {
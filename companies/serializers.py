@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from crm_project.expand import ExpandableSerializerMixin
+from monitoring.tracing import TracedSerializerMixin
 from .models import Company
 
 
@@ -11,7 +13,7 @@ class PrimaryContactSerializer(serializers.Serializer):
     position = serializers.CharField(read_only=True)
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(TracedSerializerMixin, ExpandableSerializerMixin, serializers.ModelSerializer):
     """Serializer for Company model."""
     
     contacts_count = serializers.SerializerMethodField()
@@ -31,13 +33,18 @@ class CompanySerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
     
     def get_contacts_count(self, obj):
+        # Views may supply the counts up front (e.g. the async detail view)
+        if hasattr(obj, 'contacts_count'):
+            return obj.contacts_count
         return obj.contacts.count()
     
     def get_deals_count(self, obj):
+        if hasattr(obj, 'deals_count'):
+            return obj.deals_count
         return obj.deals.count()
 
 
-class CompanyListSerializer(serializers.ModelSerializer):
+class CompanyListSerializer(TracedSerializerMixin, ExpandableSerializerMixin, serializers.ModelSerializer):
     """Simplified serializer for listing companies."""
     
     milestone_display = serializers.CharField(source='get_milestone_display', read_only=True)
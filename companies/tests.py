@@ -1,3 +1,177 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from contacts.models import Contact
+from deals.models import Deal
+
+from .models import Company
+
+
+def make_company(name, contacts=0, deals=0):
+    company = Company.objects.create(name=name)
+    for index in range(contacts):
+        contact = Contact.objects.create(
+            first_name=f'{name} {index:02}', last_name='Example',
+            email=f'{index}@{name.lower().replace(" ", "-")}.example.com', company=company,
+        )
+        if index == 0:
+            company.primary_contact = contact
+            company.save()
+    for index in range(deals):
+        Deal.objects.create(title=f'{name} deal {index}', value=Decimal(index), company=company)
+    return company
+
+
+class ExpandTests(TestCase):
+    def get(self, path, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), len(queries)
+
+    def test_list_expansion_query_count_does_not_grow_with_the_page(self):
+        make_company('Kauri Labs', contacts=2, deals=2)
+        _, few = self.get('/api/companies/', expand='contacts,deals,primary_contact')
+        for index in range(6):
+            make_company(f'Company {index}', contacts=3, deals=3)
+        data, many = self.get('/api/companies/', expand='contacts,deals,primary_contact')
+
+        # The page, the count and one query per to-many expansion
+        self.assertEqual((few, many), (4, 4))
+        self.assertEqual(len(data['results']), 7)
+        kauri = next(row for row in data['results'] if row['name'] == 'Kauri Labs')
+        self.assertEqual([c['full_name'] for c in kauri['contacts']], ['Kauri Labs 00 Example', 'Kauri Labs 01 Example'])
+        self.assertEqual(len(kauri['deals']), 2)
+        self.assertEqual(kauri['primary_contact']['full_name'], 'Kauri Labs 00 Example')
+
+    def test_detail_embeds_relations(self):
+        company = make_company('Kauri Labs', contacts=1, deals=1)
+        data, _ = self.get(f'/api/companies/{company.pk}/', expand='deals, primary_contact')
+        self.assertEqual([deal['title'] for deal in data['deals']], ['Kauri Labs deal 0'])
+        self.assertEqual(data['primary_contact']['id'], company.primary_contact_id)
+        self.assertNotIn('contacts', data)
+
+        Company.objects.filter(pk=company.pk).update(primary_contact=None)
+        data, _ = self.get(f'/api/companies/{company.pk}/', expand='primary_contact')
+        self.assertIsNone(data['primary_contact'])
+
+    @override_settings(API_EXPAND_LIMIT=3)
+    def test_to_many_expansions_are_sliced_per_parent(self):
+        make_company('Kauri Labs', contacts=5, deals=5)
+        make_company('Tasman Foods', contacts=2, deals=4)
+        data, _ = self.get('/api/companies/', expand='contacts,deals')
+        by_name = {row['name']: row for row in data['results']}
+
+        self.assertEqual(
+            [c['full_name'] for c in by_name['Kauri Labs']['contacts']],
+            [f'Kauri Labs {index:02} Example' for index in range(3)],
+        )
+        self.assertEqual(len(by_name['Kauri Labs']['deals']), 3)
+        self.assertEqual(len(by_name['Tasman Foods']['contacts']), 2)
+        self.assertEqual(
+            [deal['title'] for deal in by_name['Tasman Foods']['deals']],
+            [f'Tasman Foods deal {index}' for index in (3, 2, 1)],
+        )
+
+    def test_deal_expands_to_one_relations(self):
+        company = make_company('Kauri Labs', contacts=1)
+        Deal.objects.create(title='Renewal', value=Decimal('10.00'), company=company, contact=company.primary_contact)
+        data, queries = self.get('/api/deals/', expand='company,contact')
+        deal = data['results'][0]
+        self.assertEqual(deal['company']['name'], 'Kauri Labs')
+        self.assertEqual(deal['contact']['full_name'], 'Kauri Labs 00 Example')
+        # Nested serializers don't expand further
+        self.assertNotIn('contacts', deal['company'])
+        self.assertEqual(queries, 2)
+
+    def test_unknown_expansion_is_rejected(self):
+        response = self.client.get('/api/companies/', {'expand': 'contacts,invoices'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('invoices', response.json()['expand'])
+
+
+class NestedListTests(TestCase):
+    def setUp(self):
+        self.company = make_company('Kauri Labs', contacts=5, deals=7)
+        make_company('Tasman Foods', contacts=2, deals=2)
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def walk(self, path, **params):
+        """Follow ``next`` links to the end; return every row."""
+        page = self.get(path, **params)
+        rows = page['results']
+        while page['next']:
+            page = self.get(page['next'])
+            rows.extend(page['results'])
+        return rows
+
+    def test_deals_are_cursor_paged_newest_first(self):
+        rows = self.walk(f'/api/companies/{self.company.pk}/deals/', page_size=3)
+        self.assertEqual(
+            [row['id'] for row in rows],
+            list(self.company.deals.order_by('-created_at', '-pk').values_list('pk', flat=True)),
+        )
+        self.assertNotIn('count', self.get(f'/api/companies/{self.company.pk}/deals/'))
+
+    def test_ordering_pages_without_gaps(self):
+        Deal.objects.filter(company=self.company, title__endswith='deal 1').update(value=Decimal('5'))
+        rows = self.walk(f'/api/companies/{self.company.pk}/deals/', ordering='-value', page_size=2)
+        self.assertEqual(len({row['id'] for row in rows}), 7)
+        values = [Decimal(row['value']) for row in rows]
+        self.assertEqual(values, sorted(values, reverse=True))
+
+    def test_page_size_is_capped(self):
+        make_company('Big Account', deals=105)
+        big = Company.objects.get(name='Big Account')
+        page = self.get(f'/api/companies/{big.pk}/deals/', page_size=500)
+        self.assertEqual(len(page['results']), 100)
+        self.assertIsNotNone(page['next'])
+
+    def test_deal_filters_apply(self):
+        deals = list(self.company.deals.order_by('pk'))
+        Deal.objects.filter(pk__in=[deals[0].pk, deals[3].pk]).update(status='proposal')
+        Deal.objects.filter(pk=deals[1].pk).update(created_at=timezone.now() - timedelta(days=30))
+        url = f'/api/companies/{self.company.pk}/deals/'
+
+        rows = self.get(url, status='proposal')['results']
+        self.assertEqual({row['id'] for row in rows}, {deals[0].pk, deals[3].pk})
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        rows = self.walk(url, since=since)
+        self.assertEqual(len(rows), 6)
+        self.assertNotIn(deals[1].pk, [row['id'] for row in rows])
+        rows = self.get(url, search='deal 6')['results']
+        self.assertEqual([row['id'] for row in rows], [deals[6].pk])
+
+    def test_contacts_are_paged_and_searchable(self):
+        url = f'/api/companies/{self.company.pk}/contacts/'
+        rows = self.walk(url, page_size=2, expand='company')
+        self.assertEqual(len({row['id'] for row in rows}), 5)
+        self.assertTrue(all(row['company']['name'] == 'Kauri Labs' for row in rows))
+        rows = self.get(url, search='Kauri Labs 03')['results']
+        self.assertEqual([row['full_name'] for row in rows], ['Kauri Labs 03 Example'])
+
+    def test_contact_deals_are_nested_too(self):
+        contact = self.company.primary_contact
+        Deal.objects.filter(company=self.company, title__endswith='deal 4').update(contact=contact)
+        rows = self.walk(f'/api/contacts/{contact.pk}/deals/', expand='contact')
+        self.assertEqual([row['title'] for row in rows], ['Kauri Labs deal 4'])
+        self.assertEqual(rows[0]['contact']['id'], contact.pk)
+
+    def test_parent_lookup_ignores_nested_parameters(self):
+        # ?search= is for the deals; it must not filter out the company itself
+        rows = self.get(f'/api/companies/{self.company.pk}/deals/', search='deal 2')['results']
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(self.client.get('/api/companies/999999/deals/').status_code, 404)
+
+    def test_invalid_filter_is_rejected(self):
+        response = self.client.get(f'/api/companies/{self.company.pk}/deals/', {'since': 'last week'})
+        self.assertEqual(response.status_code, 400)
@@ -2,31 +2,71 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.http import HttpResponse
 import csv
 import io
+from crm_project.expand import Expansion, ExpandMixin
+from crm_project.nested import nested_list, parent_object
+from sync.feed import ChangeFeedMixin
+from monitoring.memory import check_memory_budget
+from monitoring.metrics import record_import
+from monitoring.tracing import span
+from contacts.models import Contact
+from contacts.views import ContactViewSet
+from deals.models import Deal
+from deals.views import DealViewSet
 from .models import Company
 from .serializers import CompanySerializer, CompanyListSerializer
 
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(ChangeFeedMixin, ExpandMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing companies.
     
     Provides CRUD operations for companies with search and filtering.
+    ``?expand=contacts,deals,primary_contact`` embeds related objects.
     """
-    queryset = Company.objects.all()
+    queryset = Company.objects.select_related('primary_contact')
     serializer_class = CompanySerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
     search_fields = ['name', 'industry', 'email']
     ordering_fields = ['name', 'created_at', 'milestone']
     filterset_fields = ['milestone', 'industry']
+    expansions = {
+        'contacts': Expansion(
+            'contacts.serializers.ContactListSerializer',
+            queryset=lambda: Contact.objects.select_related('company').order_by('first_name', 'last_name', 'pk'),
+        ),
+        'deals': Expansion(
+            'deals.serializers.DealListSerializer',
+            queryset=lambda: Deal.objects.select_related('company').order_by('-created_at', '-pk'),
+        ),
+        'primary_contact': Expansion(
+            'contacts.serializers.ContactListSerializer',
+            select_related=['primary_contact__company'],
+        ),
+    }
     
     def get_serializer_class(self):
         if self.action == 'list':
             return CompanyListSerializer
         return CompanySerializer
     
+    def get_changes_queryset(self):
+        # CompanySerializer's counts, as subqueries rather than two per row
+        return self.get_queryset().annotate(
+            contacts_count=Coalesce(Subquery(
+                Contact.objects.filter(company=OuterRef('pk')).order_by()
+                .values('company').annotate(n=Count('pk')).values('n')
+            ), 0),
+            deals_count=Coalesce(Subquery(
+                Deal.objects.filter(company=OuterRef('pk')).order_by()
+                .values('company').annotate(n=Count('pk')).values('n')
+            ), 0),
+        )
+    
     @action(detail=True, methods=['post'])
     def update_milestone(self, request, pk=None):
         """Update the milestone status of a company."""
@@ -59,21 +99,15 @@ class CompanyViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def contacts(self, request, pk=None):
-        """Get all contacts associated with this company."""
-        company = self.get_object()
-        contacts = company.contacts.all()
-        from contacts.serializers import ContactListSerializer
-        serializer = ContactListSerializer(contacts, many=True)
-        return Response(serializer.data)
+        """Contacts of this company, cursor-paginated, with the contact list's filters."""
+        company = parent_object(self)
+        return nested_list(self, ContactViewSet, company.contacts.select_related('company'))
     
     @action(detail=True, methods=['get'])
     def deals(self, request, pk=None):
-        """Get all deals associated with this company."""
-        company = self.get_object()
-        deals = company.deals.all()
-        from deals.serializers import DealListSerializer
-        serializer = DealListSerializer(deals, many=True)
-        return Response(serializer.data)
+        """Deals of this company, cursor-paginated, with the deal list's filters."""
+        company = parent_object(self)
+        return nested_list(self, DealViewSet, company.deals.select_related('company', 'contact'))
     
     @action(detail=False, methods=['post'])
     def upload_csv(self, request):
@@ -103,6 +137,7 @@ class CompanyViewSet(viewsets.ModelViewSet):
             errors = []
             
             for row_num, row in enumerate(reader, start=2):
+                check_memory_budget()
                 try:
                     # Get company name (required field)
                     name = row.get('name', '').strip()
@@ -150,6 +185,7 @@ class CompanyViewSet(viewsets.ModelViewSet):
                 except Exception as e:
                     errors.append(f"Row {row_num}: {str(e)}")
             
+            record_import('api_upload_csv', created_count, updated_count, len(errors))
             return Response({
                 'message': 'CSV upload completed',
                 'created': created_count,
@@ -191,28 +227,30 @@ class CompanyViewSet(viewsets.ModelViewSet):
         ])
         
         # Group companies by industry and write rows
-        current_industry = None
-        for company in queryset:
-            industry = company.industry or 'No Industry Specified'
-            
-            # Add a blank row between industry groups for readability
-            if current_industry is not None and current_industry != industry:
-                writer.writerow([])  # Blank row
-            
-            current_industry = industry
-            
-            writer.writerow([
-                industry,
-                company.name,
-                company.website or '',
-                company.email or '',
-                company.phone or '',
-                company.address or '',
-                company.milestone,
-                company.get_milestone_display(),
-                company.notes or '',
-                company.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                company.updated_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
+        with span('csv.write', 'app', view='api'):
+            current_industry = None
+            for company in queryset:
+                check_memory_budget()
+                industry = company.industry or 'No Industry Specified'
+                
+                # Add a blank row between industry groups for readability
+                if current_industry is not None and current_industry != industry:
+                    writer.writerow([])  # Blank row
+                
+                current_industry = industry
+                
+                writer.writerow([
+                    industry,
+                    company.name,
+                    company.website or '',
+                    company.email or '',
+                    company.phone or '',
+                    company.address or '',
+                    company.milestone,
+                    company.get_milestone_display(),
+                    company.notes or '',
+                    company.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                    company.updated_at.strftime('%Y-%m-%d %H:%M:%S')
+                ])
         
         return response
@@ -0,0 +1,30 @@
+"""
+Async read endpoints for contacts, served under ``/api/async/contacts/``.
+"""
+from django.http import JsonResponse
+
+from crm_project.async_api import list_response, not_found, run_concurrently
+from deals.models import Deal
+from deals.serializers import DealListSerializer
+from .models import Contact
+from .serializers import ContactSerializer
+from .views import ContactViewSet
+
+
+async def contact_list(request):
+    """Paginated, searchable contact list; the page and count run concurrently."""
+    return await list_response(request, ContactViewSet, select_related=['company'])
+
+
+async def contact_detail(request, pk):
+    """One contact with its deals, fetched concurrently."""
+    contact, deals = await run_concurrently(
+        lambda: Contact.objects.select_related('company').filter(pk=pk).first(),
+        lambda: list(Deal.objects.filter(contact_id=pk).select_related('company')),
+    )
+    if contact is None:
+        return not_found(Contact)
+
+    data = ContactSerializer(contact).data
+    data['deals'] = DealListSerializer(deals, many=True).data
+    return JsonResponse(data)
@@ -0,0 +1,397 @@
+"""
+Bulk-load a synthetic dataset for performance work.
+
+Rows go in with COPY (Postgres) or ``executemany`` (SQLite), so no model
+signals fire. The command does what those handlers would have done in bulk:
+``--clear`` writes change-feed tombstones for every row it removes, and the
+dashboard reference lists are invalidated once the load commits. Live
+dashboard events are not sent; open dashboards catch up when they reconnect
+or reload. Generated rows carry backdated ``updated_at`` values, so change-feed
+clients see them only on a sync started without a cursor.
+"""
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from companies.models import Company
+from contacts.models import Contact
+from dashboard import reference
+from deals.models import Deal
+from sync.models import Tombstone
+
+
+# Named scales give the approximate total number of rows across all tables.
+SCALES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+# Share of the total row count that goes to each table.
+COMPANY_SHARE = 0.05
+CONTACT_SHARE = 0.55
+
+# Exponent of the Zipf distribution used to assign contacts and deals to
+# companies. At 1.0 the largest company at the 1m scale gets ~45k contacts.
+ZIPF_EXPONENT = 1.0
+
+# Fraction of contacts that are not attached to any company.
+UNAFFILIATED_CONTACTS = 0.05
+
+INSERT_CHUNK_SIZE = 10_000
+TIMESTAMP_POOL_SIZE = 50_000
+
+INDUSTRIES = [
+    'Technology', 'Finance', 'Healthcare', 'Retail', 'Manufacturing',
+    'Marketing', 'Education', 'Construction', 'Hospitality', 'Logistics',
+    'Real Estate', 'Legal', 'Energy', 'Agriculture', 'Media',
+]
+NAME_PREFIXES = [
+    'Northwind', 'Summit', 'Harbour', 'Kauri', 'Pinnacle', 'Blue Peak',
+    'Silverfern', 'Coastal', 'Evergreen', 'Ironbark', 'Southern Cross',
+    'Redwood', 'Tasman', 'Horizon', 'Aurora', 'Granite', 'Riverstone',
+]
+NAME_NOUNS = [
+    'Solutions', 'Logistics', 'Consulting', 'Systems', 'Partners', 'Labs',
+    'Digital', 'Holdings', 'Analytics', 'Ventures', 'Networks', 'Foods',
+]
+NAME_SUFFIXES = ['Ltd', 'Limited', 'Inc', 'LLC', 'Group', 'Co']
+FIRST_NAMES = [
+    'James', 'Olivia', 'Liam', 'Charlotte', 'Noah', 'Amelia', 'Jack', 'Isla',
+    'Oliver', 'Mia', 'Leo', 'Ava', 'Hemi', 'Aroha', 'Wiremu', 'Mere', 'Arjun',
+    'Priya', 'Wei', 'Mei', 'Lucas', 'Sofia', 'Mateo', 'Grace', 'Ethan', 'Zoe',
+]
+LAST_NAMES = [
+    'Smith', 'Williams', 'Brown', 'Wilson', 'Taylor', 'Anderson', 'Thomas',
+    'Walker', 'Ngata', 'Parata', 'Singh', 'Patel', 'Chen', 'Wang', 'Kim',
+    'Nguyen', 'Campbell', 'Stewart', 'Robinson', 'Clarke', 'Martin', 'Young',
+]
+POSITIONS = [
+    'CEO', 'CTO', 'CFO', 'Operations Manager', 'Sales Director',
+    'Marketing Manager', 'Office Manager', 'Procurement Lead', 'Engineer', None,
+]
+DEAL_PRODUCTS = [
+    'Software License', 'Support Contract', 'Cloud Migration', 'Consulting Engagement',
+    'Hardware Refresh', 'Training Package', 'Managed Services', 'Website Rebuild',
+]
+
+# Weighted so most companies sit early in the lead journey, as in production.
+MILESTONE_WEIGHTS = [
+    ('not_contacted', 45), ('first_call', 15), ('not_interested', 10),
+    ('email_sent', 12), ('meeting_arranged', 8), ('waiting_on_contact', 6),
+    ('successful', 4),
+]
+STATUS_WEIGHTS = [
+    ('lead', 35), ('qualified', 20), ('proposal', 15),
+    ('negotiation', 10), ('closed_won', 10), ('closed_lost', 10),
+]
+
+
+def parse_scale(value):
+    """Accept a named scale (10k, 1m, ...) or a plain row count."""
+    key = value.lower().replace('_', '')
+    if key in SCALES:
+        return SCALES[key]
+    try:
+        rows = int(key)
+    except ValueError:
+        raise CommandError(
+            f'Invalid scale "{value}". Use one of {", ".join(SCALES)} or a number of rows.'
+        )
+    if rows < 20:
+        raise CommandError('Scale must be at least 20 rows')
+    return rows
+
+
+def pick(rng, seq):
+    """Faster equivalent of ``rng.choice`` for the per-row hot loops."""
+    return seq[int(rng.random() * len(seq))]
+
+
+def zipf_counts(rng, total, buckets):
+    """
+    Split ``total`` items across ``buckets`` following a Zipf distribution.
+
+    The largest buckets are shuffled so the heaviest companies are spread
+    through the id range instead of all sitting at the start.
+    """
+    weights = [1.0 / (rank ** ZIPF_EXPONENT) for rank in range(1, buckets + 1)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for index in rng.choices(range(buckets), k=total - sum(counts)):
+        counts[index] += 1
+    rng.shuffle(counts)
+    return counts
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic companies/contacts/deals dataset at a chosen scale'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=str,
+            default='10k',
+            help=f'Approximate total rows: {", ".join(SCALES)} or a number (default: 10k)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed, so the same scale always produces the same data (default: 42)',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Remove all existing companies, contacts and deals first',
+        )
+
+    def handle(self, *args, **options):
+        total_rows = parse_scale(options['scale'])
+        self.rng = random.Random(options['seed'])
+        self.now = datetime.now(dt_timezone.utc).replace(microsecond=0)
+        self.is_postgres = connection.vendor == 'postgresql'
+        self.timestamps = self.build_timestamp_pool()
+
+        n_companies = max(1, int(total_rows * COMPANY_SHARE))
+        n_contacts = int(total_rows * CONTACT_SHARE)
+        n_deals = total_rows - n_companies - n_contacts
+
+        self.stdout.write(
+            f'Generating {n_companies} companies, {n_contacts} contacts and '
+            f'{n_deals} deals (seed {options["seed"]}, {connection.vendor})...'
+        )
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            if options['clear']:
+                self.clear()
+
+            company_start = self.next_id(Company)
+            contact_start = self.next_id(Contact)
+            deal_start = self.next_id(Deal)
+
+            n_unaffiliated = int(n_contacts * UNAFFILIATED_CONTACTS)
+            contact_counts = zipf_counts(self.rng, n_contacts - n_unaffiliated, n_companies)
+            deal_counts = zipf_counts(self.rng, n_deals, n_companies)
+
+            # Contacts are written company by company, so each company owns a
+            # contiguous id range that deals and primary contacts can pick from.
+            contact_ranges = []
+            next_contact = contact_start
+            for count in contact_counts:
+                contact_ranges.append((next_contact, count))
+                next_contact += count
+
+            self.copy_rows(Company, self.company_rows(company_start, contact_ranges))
+            self.copy_rows(
+                Contact,
+                self.contact_rows(company_start, contact_ranges, next_contact, n_unaffiliated),
+            )
+            self.copy_rows(Deal, self.deal_rows(deal_start, company_start, deal_counts, contact_ranges))
+            self.reset_sequences()
+
+        # Dropdowns list companies and contacts; post_save would have done this
+        reference.invalidate_company_lists(sender=Company)
+
+        elapsed = time.perf_counter() - started
+        rate = total_rows / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Inserted {total_rows} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)'
+        ))
+        largest = max(contact_counts)
+        self.stdout.write(
+            f'  Largest company: {largest} contacts, {max(deal_counts)} deals'
+        )
+
+    def clear(self):
+        """Truncate the CRM tables without loading rows into Python."""
+        self.write_tombstones([Deal, Contact, Company])
+        tables = [Deal._meta.db_table, Contact._meta.db_table, Company._meta.db_table]
+        statements = connection.ops.sql_flush(no_style(), tables, reset_sequences=True)
+        connection.ops.execute_sql_flush(statements)
+        self.stdout.write('  Existing CRM data cleared')
+
+    def write_tombstones(self, models):
+        """Record every row of ``models`` as deleted, as post_delete would."""
+        table = connection.ops.quote_name(Tombstone._meta.db_table)
+        columns = ', '.join(
+            connection.ops.quote_name(Tombstone._meta.get_field(name).column)
+            for name in ('model', 'object_id', 'deleted_at')
+        )
+        deleted_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        with connection.cursor() as cursor:
+            for model in models:
+                cursor.execute(
+                    f'INSERT INTO {table} ({columns}) '
+                    f'SELECT %s, id, %s FROM {connection.ops.quote_name(model._meta.db_table)}',
+                    [model._meta.label_lower, deleted_at],
+                )
+
+    def next_id(self, model):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT MAX(id) FROM {connection.ops.quote_name(model._meta.db_table)}')
+            current = cursor.fetchone()[0]
+        return (current or 0) + 1
+
+    def reset_sequences(self):
+        """Move Postgres id sequences past the explicitly inserted ids."""
+        statements = connection.ops.sequence_reset_sql(no_style(), [Company, Contact, Deal])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def build_timestamp_pool(self, max_age_days=3 * 365):
+        """
+        Pre-format a pool of (created_at, updated_at) pairs.
+
+        Formatting datetimes per row dominates generation time, so rows draw
+        from a pool large enough to keep the spread of dates realistic.
+        """
+        rng = self.rng
+        pool = []
+        for _ in range(TIMESTAMP_POOL_SIZE):
+            created = self.now - timedelta(seconds=rng.randrange(max_age_days * 86400))
+            age = int((self.now - created).total_seconds())
+            updated = created + timedelta(seconds=rng.randrange(age + 1))
+            pool.append((self.adapt_datetime(created), self.adapt_datetime(updated)))
+        return pool
+
+    def timestamp(self):
+        return self.timestamps[int(self.rng.random() * TIMESTAMP_POOL_SIZE)]
+
+    def adapt_datetime(self, value):
+        if self.is_postgres:
+            return value.isoformat()
+        # SQLite stores naive UTC datetimes as text
+        return value.replace(tzinfo=None).isoformat(' ')
+
+    def company_rows(self, company_start, contact_ranges):
+        rng = self.rng
+        milestones = [milestone for milestone, weight in MILESTONE_WEIGHTS for _ in range(weight)]
+        for offset, (first_contact, contact_count) in enumerate(contact_ranges):
+            company_id = company_start + offset
+            name = (
+                f'{pick(rng, NAME_PREFIXES)} {pick(rng, NAME_NOUNS)} '
+                f'{pick(rng, NAME_SUFFIXES)} {company_id:06d}'
+            )
+            domain = f'company{company_id}.example.com'
+            created_at, updated_at = self.timestamp()
+            yield (
+                company_id,
+                name,
+                f'https://{domain}',
+                f'info@{domain}',
+                f'+64-9-{int(rng.random() * 9000000) + 1000000}',
+                None,
+                pick(rng, INDUSTRIES) if rng.random() < 0.9 else None,
+                first_contact if contact_count else None,
+                pick(rng, milestones),
+                None,
+                created_at,
+                updated_at,
+            )
+
+    def contact_rows(self, company_start, contact_ranges, unaffiliated_start, n_unaffiliated):
+        for offset, (first_contact, contact_count) in enumerate(contact_ranges):
+            for contact_id in range(first_contact, first_contact + contact_count):
+                yield self.contact_row(contact_id, company_start + offset)
+        for contact_id in range(unaffiliated_start, unaffiliated_start + n_unaffiliated):
+            yield self.contact_row(contact_id, None)
+
+    def contact_row(self, contact_id, company_id):
+        rng = self.rng
+        first_name = pick(rng, FIRST_NAMES)
+        last_name = pick(rng, LAST_NAMES)
+        created_at, updated_at = self.timestamp()
+        return (
+            contact_id,
+            first_name,
+            last_name,
+            f'{first_name}.{last_name}.{contact_id}@example.com'.lower(),
+            f'+64-21-{int(rng.random() * 9000000) + 1000000}' if rng.random() < 0.7 else None,
+            pick(rng, POSITIONS),
+            company_id,
+            None,
+            created_at,
+            updated_at,
+        )
+
+    def deal_rows(self, deal_start, company_start, deal_counts, contact_ranges):
+        rng = self.rng
+        statuses = [status for status, weight in STATUS_WEIGHTS for _ in range(weight)]
+        today = self.now.date()
+        close_dates = [(today + timedelta(days=days)).isoformat() for days in range(-180, 365)]
+        deal_id = deal_start
+        for offset, deal_count in enumerate(deal_counts):
+            company_id = company_start + offset
+            first_contact, contact_count = contact_ranges[offset]
+            for _ in range(deal_count):
+                created_at, updated_at = self.timestamp()
+                yield (
+                    deal_id,
+                    f'{pick(rng, DEAL_PRODUCTS)} #{deal_id}',
+                    None,
+                    f'{rng.lognormvariate(9.5, 1.2):.2f}',
+                    pick(rng, statuses),
+                    company_id,
+                    first_contact + int(rng.random() * contact_count) if contact_count else None,
+                    pick(rng, close_dates),
+                    None,
+                    created_at,
+                    updated_at,
+                )
+                deal_id += 1
+
+    def copy_rows(self, model, rows):
+        """Stream ``rows`` into ``model``'s table with COPY or executemany."""
+        columns = [field.column for field in model._meta.concrete_fields]
+        table = connection.ops.quote_name(model._meta.db_table)
+        column_sql = ', '.join(connection.ops.quote_name(column) for column in columns)
+        started = time.perf_counter()
+        inserted = 0
+
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= INSERT_CHUNK_SIZE:
+                self.write_chunk(table, column_sql, len(columns), chunk)
+                inserted += len(chunk)
+                chunk = []
+        if chunk:
+            self.write_chunk(table, column_sql, len(columns), chunk)
+            inserted += len(chunk)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'  {model._meta.verbose_name_plural}: {inserted} rows in {elapsed:.1f}s'
+        )
+
+    def write_chunk(self, table, column_sql, n_columns, chunk):
+        with connection.cursor() as cursor:
+            if self.is_postgres:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(chunk)
+                buffer.seek(0)
+                sql = f'COPY {table} ({column_sql}) FROM STDIN WITH (FORMAT csv)'
+                raw_cursor = cursor.cursor
+                if hasattr(raw_cursor, 'copy_expert'):
+                    # psycopg2
+                    raw_cursor.copy_expert(sql, buffer)
+                else:
+                    # psycopg 3
+                    with raw_cursor.copy(sql) as copy:
+                        copy.write(buffer.getvalue())
+            else:
+                placeholders = ', '.join(['%s'] * n_columns)
+                cursor.executemany(
+                    f'INSERT INTO {table} ({column_sql}) VALUES ({placeholders})',
+                    chunk,
+                )
@@ -1,9 +1,31 @@
 import csv
 import os
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from django.db import transaction
 from companies.models import Company
 from contacts.models import Contact
+from monitoring.metrics import record_import
+
+
+# Keeps ``IN (...)`` lookups under SQLite's bound-parameter limit.
+LOOKUP_CHUNK_SIZE = 500
+
+
+def split_contact_name(contact_name, company_name):
+    """Split a CSV contact name into (first_name, last_name)."""
+    if contact_name:
+        name_parts = contact_name.split(maxsplit=1)
+        return name_parts[0], name_parts[1] if len(name_parts) > 1 else ''
+    # Use company name as fallback
+    return (company_name if company_name else 'Contact'), ''
+
+
+def chunked(items, size):
+    """Yield successive lists of at most ``size`` items."""
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
 
 class Command(BaseCommand):
@@ -21,10 +43,35 @@ class Command(BaseCommand):
             default='seed_data/test_data.csv',
             help='Path to CSV file (default: seed_data/test_data.csv)',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=0,
+            help='Import in batches of N rows using bulk inserts (default: row-by-row import)',
+        )
+        parser.add_argument(
+            '--progress-every',
+            type=int,
+            default=10000,
+            help='In batch mode, print a progress line every N rows (default: 10000)',
+        )
+        parser.add_argument(
+            '--resume-from-row',
+            type=int,
+            default=0,
+            help='Skip CSV rows before this row number (row 2 is the first data row)',
+        )
 
     def handle(self, *args, **options):
         csv_file = options['file']
         clear_data = options['clear']
+        batch_size = options['batch_size']
+        resume_from_row = options['resume_from_row']
+        
+        if batch_size < 0:
+            raise CommandError('--batch-size must be a positive number')
+        if resume_from_row and clear_data:
+            raise CommandError('--resume-from-row cannot be combined with --clear')
         
         # Build full path
         csv_path = os.path.join(settings.BASE_DIR, csv_file)
@@ -46,8 +93,8 @@ class Command(BaseCommand):
             Company.objects.all().delete()
             self.stdout.write(self.style.SUCCESS('Existing data cleared'))
         
-        # Check if data already exists
-        if Company.objects.exists() and not clear_data:
+        # Check if data already exists (a resumed import is expected to find some)
+        if Company.objects.exists() and not clear_data and not resume_from_row:
             self.stdout.write(
                 self.style.WARNING(
                     f'Database already contains {Company.objects.count()} companies. '
@@ -58,6 +105,15 @@ class Command(BaseCommand):
         
         self.stdout.write(f'Importing seed data from {csv_path}...')
         
+        if batch_size:
+            self.import_batched(
+                csv_path,
+                batch_size=batch_size,
+                progress_every=options['progress_every'],
+                resume_from_row=resume_from_row,
+            )
+            return
+        
         companies_created = 0
         contacts_created = 0
         errors = 0
@@ -67,6 +123,8 @@ class Command(BaseCommand):
                 reader = csv.DictReader(file)
                 
                 for row_num, row in enumerate(reader, start=2):  # Start at 2 (after header)
+                    if row_num < resume_from_row:
+                        continue
                     try:
                         company_name = row.get('Company Name', '').strip()
                         contact_name = row.get('Contact Name', '').strip()
@@ -94,17 +152,7 @@ class Command(BaseCommand):
                         
                         # Create contact if email is provided
                         if email:
-                            # Parse contact name into first and last name
-                            first_name = ''
-                            last_name = ''
-                            if contact_name:
-                                name_parts = contact_name.split(maxsplit=1)
-                                first_name = name_parts[0]
-                                last_name = name_parts[1] if len(name_parts) > 1 else ''
-                            else:
-                                # Use company name as fallback
-                                first_name = company_name if company_name else 'Contact'
-                                last_name = ''
+                            first_name, last_name = split_contact_name(contact_name, company_name)
                             
                             # Check if contact already exists
                             if not Contact.objects.filter(email=email).exists():
@@ -141,7 +189,12 @@ class Command(BaseCommand):
             )
             return
         
-        # Summary
+        self.write_summary(companies_created, contacts_created, errors)
+    
+    def write_summary(self, companies_created, contacts_created, errors):
+        """Print the end-of-import summary block."""
+        record_import('seed_companies', created=companies_created)
+        record_import('seed_contacts', created=contacts_created, errors=errors)
         self.stdout.write('')
         self.stdout.write(self.style.SUCCESS('=' * 50))
         self.stdout.write(self.style.SUCCESS('Import completed!'))
@@ -150,3 +203,204 @@ class Command(BaseCommand):
         if errors > 0:
             self.stdout.write(self.style.WARNING(f'Errors: {errors}'))
         self.stdout.write(self.style.SUCCESS('=' * 50))
+    
+    def import_batched(self, csv_path, batch_size, progress_every, resume_from_row):
+        """
+        Import the CSV in batches of ``batch_size`` rows.
+        
+        Each batch looks up existing companies and contacts with chunked
+        ``IN`` queries, bulk-inserts what is missing and commits in a single
+        transaction, so an interrupted run can be resumed from the first row
+        of the batch that did not commit. A batch that fails is retried one
+        row at a time, so bad rows are skipped and reported as in row mode.
+        """
+        self.company_ids = {}
+        self.seen_emails = set()
+        companies_created = 0
+        contacts_created = 0
+        errors = 0
+        rows_done = 0
+        last_progress = 0
+        
+        try:
+            with open(csv_path, 'r', encoding='utf-8') as file:
+                reader = csv.DictReader(file)
+                batch = []
+                for row_num, row in enumerate(reader, start=2):  # Start at 2 (after header)
+                    if row_num < resume_from_row:
+                        continue
+                    batch.append((row_num, row))
+                    if len(batch) < batch_size:
+                        continue
+                    
+                    created = self.import_batch(batch)
+                    companies_created += created[0]
+                    contacts_created += created[1]
+                    errors += created[2]
+                    rows_done += len(batch)
+                    next_row = batch[-1][0] + 1
+                    batch = []
+                    if rows_done - last_progress >= progress_every:
+                        last_progress = rows_done
+                        self.write_progress(rows_done, companies_created, contacts_created, next_row)
+                
+                if batch:
+                    created = self.import_batch(batch)
+                    companies_created += created[0]
+                    contacts_created += created[1]
+                    errors += created[2]
+                    rows_done += len(batch)
+        
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Failed to read CSV file: {str(e)}')
+            )
+            return
+        
+        self.write_summary(companies_created, contacts_created, errors)
+    
+    def import_batch(self, batch):
+        """Insert one batch of (row_num, row) pairs; return (companies, contacts, errors)."""
+        companies = {}
+        contacts = {}
+        for row_num, row in batch:
+            company_name = row.get('Company Name', '').strip()
+            contact_name = row.get('Contact Name', '').strip()
+            email = row.get('Email', '').strip()
+            phone = row.get('Phone Number', '').strip()
+            notes = row.get('Notes', '').strip()
+            
+            # Skip empty rows
+            if not company_name and not email:
+                continue
+            
+            if company_name and company_name not in self.company_ids:
+                companies.setdefault(company_name, notes)
+            if email and email not in self.seen_emails and email not in contacts:
+                first_name, last_name = split_contact_name(contact_name, company_name)
+                contacts[email] = {
+                    'first_name': first_name,
+                    'last_name': last_name,
+                    'phone': phone if phone else None,
+                    'company_name': company_name,
+                    'notes': notes if notes else None,
+                }
+        
+        try:
+            with transaction.atomic():
+                self.load_company_ids(companies)
+                new_companies = [
+                    Company(name=name, milestone='not_contacted', notes=notes if notes else None)
+                    for name, notes in companies.items()
+                    if name not in self.company_ids
+                ]
+                Company.objects.bulk_create(new_companies, batch_size=LOOKUP_CHUNK_SIZE)
+                self.load_company_ids(company.name for company in new_companies)
+                
+                existing_emails = set()
+                for emails in chunked(contacts, LOOKUP_CHUNK_SIZE):
+                    existing_emails.update(
+                        Contact.objects.filter(email__in=emails).values_list('email', flat=True)
+                    )
+                new_contacts = [
+                    Contact(
+                        email=email,
+                        first_name=data['first_name'],
+                        last_name=data['last_name'],
+                        phone=data['phone'],
+                        company_id=self.company_ids.get(data['company_name']),
+                        notes=data['notes'],
+                    )
+                    for email, data in contacts.items()
+                    if email not in existing_emails
+                ]
+                Contact.objects.bulk_create(new_contacts, batch_size=LOOKUP_CHUNK_SIZE)
+        except Exception as e:
+            # Drop anything cached from the rolled-back transaction
+            self.company_ids = {}
+            self.stdout.write(
+                self.style.WARNING(
+                    f'  - Batch starting at row {batch[0][0]} failed ({str(e)}); '
+                    'importing its rows one at a time'
+                )
+            )
+            return self.import_rows(batch)
+        
+        self.seen_emails.update(contacts)
+        return len(new_companies), len(new_contacts), 0
+    
+    def import_rows(self, batch):
+        """
+        Insert a failed batch row by row, skipping and reporting bad rows.
+        
+        Returns (companies, contacts, errors) like ``import_batch``.
+        """
+        companies_created = 0
+        contacts_created = 0
+        errors = 0
+        for row_num, row in batch:
+            company_name = row.get('Company Name', '').strip()
+            contact_name = row.get('Contact Name', '').strip()
+            email = row.get('Email', '').strip()
+            phone = row.get('Phone Number', '').strip()
+            notes = row.get('Notes', '').strip()
+            
+            # Skip empty rows
+            if not company_name and not email:
+                continue
+            
+            company = None
+            company_created = contact_created = False
+            try:
+                with transaction.atomic():
+                    if company_name:
+                        company, company_created = Company.objects.get_or_create(
+                            name=company_name,
+                            defaults={
+                                'milestone': 'not_contacted',
+                                'notes': notes if notes else None,
+                            }
+                        )
+                    if email and not Contact.objects.filter(email=email).exists():
+                        first_name, last_name = split_contact_name(contact_name, company_name)
+                        Contact.objects.create(
+                            first_name=first_name,
+                            last_name=last_name,
+                            email=email,
+                            phone=phone if phone else None,
+                            company=company,
+                            notes=notes if notes else None,
+                        )
+                        contact_created = True
+            except Exception as e:
+                errors += 1
+                self.stdout.write(
+                    self.style.ERROR(
+                        f'  ✗ Error on row {row_num}: {str(e)}'
+                    )
+                )
+                continue
+            
+            if company is not None:
+                self.company_ids[company_name] = company.pk
+            if email:
+                self.seen_emails.add(email)
+            companies_created += company_created
+            contacts_created += contact_created
+        return companies_created, contacts_created, errors
+    
+    def load_company_ids(self, names):
+        """Cache the primary keys of any of ``names`` that already exist."""
+        missing = [name for name in names if name not in self.company_ids]
+        for names_chunk in chunked(missing, LOOKUP_CHUNK_SIZE):
+            self.company_ids.update(
+                Company.objects.filter(name__in=names_chunk).values_list('name', 'id')
+            )
+    
+    def write_progress(self, rows_done, companies_created, contacts_created, next_row):
+        """Print a single progress line for the batched import."""
+        self.stdout.write(
+            f'  {rows_done} rows imported '
+            f'({companies_created} companies, {contacts_created} contacts created); '
+            f'resume from row {next_row} if interrupted'
+        )
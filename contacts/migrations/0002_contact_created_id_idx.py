@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_company_primary_contact'),
+        ('contacts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['created_at', 'id'], name='contact_created_id_idx'),
+        ),
+    ]
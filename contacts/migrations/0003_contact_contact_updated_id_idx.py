@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_company_company_updated_id_idx'),
+        ('contacts', '0002_contact_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['updated_at', 'id'], name='contact_updated_id_idx'),
+        ),
+    ]
@@ -24,6 +24,12 @@ class Contact(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Contact'
         verbose_name_plural = 'Contacts'
+        indexes = [
+            # Keyset pagination of the dashboard's default newest-first sort
+            models.Index(fields=['created_at', 'id'], name='contact_created_id_idx'),
+            # Change feed keyset order
+            models.Index(fields=['updated_at', 'id'], name='contact_updated_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
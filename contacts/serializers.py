@@ -1,13 +1,19 @@
 from rest_framework import serializers
+from crm_project.bulk import PrefetchedPrimaryKeyRelatedField
+from crm_project.expand import ExpandableSerializerMixin
+from monitoring.tracing import TracedSerializerMixin
 from .models import Contact
 
 
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(TracedSerializerMixin, ExpandableSerializerMixin, serializers.ModelSerializer):
     """Serializer for Contact model."""
     
     full_name = serializers.ReadOnlyField()
     company_name = serializers.CharField(source='company.name', read_only=True)
     
+    # Looks ids up in one query per batch in bulk writes
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+    
     class Meta:
         model = Contact
         fields = [
@@ -18,7 +24,7 @@ class ContactSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
-class ContactListSerializer(serializers.ModelSerializer):
+class ContactListSerializer(TracedSerializerMixin, ExpandableSerializerMixin, serializers.ModelSerializer):
     """Simplified serializer for listing contacts."""
     
     full_name = serializers.ReadOnlyField()
@@ -1,3 +1,109 @@
+import csv
+import io
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DataError
 from django.test import TestCase
 
-# Create your tests here.
+from companies.models import Company
+
+from .models import Contact
+
+
+SEED_ROWS = [
+    {'Company Name': 'Kauri Labs', 'Contact Name': 'Aroha Ngata', 'Email': 'aroha@kauri.example.com',
+     'Phone Number': '+64-9-1234567', 'Notes': ''},
+    {'Company Name': 'Kauri Labs', 'Contact Name': 'Wei Chen', 'Email': 'wei@kauri.example.com',
+     'Phone Number': '+64-9-123456789012345678', 'Notes': ''},
+    {'Company Name': 'Tasman Foods', 'Contact Name': 'Grace Young', 'Email': 'grace@tasman.example.com',
+     'Phone Number': '', 'Notes': 'Met at expo'},
+]
+
+
+class ImportSeedDataBatchTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.csv_path = Path(directory.name) / 'seed.csv'
+        with open(self.csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(SEED_ROWS[0]))
+            writer.writeheader()
+            writer.writerows(SEED_ROWS)
+
+    def import_seed_data(self, **options):
+        out = io.StringIO()
+        call_command('import_seed_data', file=str(self.csv_path), stdout=out, **options)
+        return out.getvalue()
+
+    def test_batch_imports_all_rows(self):
+        output = self.import_seed_data(batch_size=10)
+        self.assertEqual(Company.objects.count(), 2)
+        self.assertEqual(Contact.objects.count(), 3)
+        self.assertNotIn('Errors:', output)
+
+    def test_bad_row_is_skipped_and_reported(self):
+        # SQLite doesn't enforce max_length; fail the way Postgres would
+        original_save = Contact.save
+
+        def save(contact, *args, **kwargs):
+            if contact.phone and len(contact.phone) > 20:
+                raise DataError('value too long for type character varying(20)')
+            return original_save(contact, *args, **kwargs)
+
+        with mock.patch.object(type(Contact.objects), 'bulk_create',
+                               side_effect=DataError('value too long for type character varying(20)')), \
+                mock.patch.object(Contact, 'save', save):
+            output = self.import_seed_data(batch_size=10)
+
+        self.assertIn('importing its rows one at a time', output)
+        self.assertIn('Error on row 3', output)
+        self.assertIn('Errors: 1', output)
+        self.assertEqual(Company.objects.count(), 2)
+        self.assertEqual(
+            set(Contact.objects.values_list('email', flat=True)),
+            {'aroha@kauri.example.com', 'grace@tasman.example.com'},
+        )
+
+
+class ContactBulkTests(TestCase):
+    def setUp(self):
+        self.existing = Contact.objects.create(first_name='Aroha', last_name='Ngata', email='aroha@example.com')
+
+    def contact(self, email, **fields):
+        return {'first_name': 'Wei', 'last_name': 'Chen', 'email': email, **fields}
+
+    def test_create_checks_unique_emails_across_the_batch(self):
+        response = self.client.post('/api/contacts/', [
+            self.contact('wei@example.com'),
+            self.contact('aroha@example.com'),
+            self.contact('wei@example.com'),
+        ], content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('email', errors[1])
+        self.assertIn('email', errors[2])
+        self.assertEqual(Contact.objects.count(), 1)
+
+    def test_update_may_keep_its_own_email(self):
+        other = Contact.objects.create(first_name='Wei', last_name='Chen', email='wei@example.com')
+        response = self.client.patch('/api/contacts/bulk/', [
+            {'id': self.existing.pk, 'email': 'aroha@example.com', 'position': 'CEO'},
+            {'id': other.pk, 'email': 'aroha@example.com'},
+        ], content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('email', errors[1])
+
+        response = self.client.patch('/api/contacts/bulk/', [
+            {'id': self.existing.pk, 'email': 'aroha@example.com', 'position': 'CEO'},
+        ], content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.position, 'CEO')
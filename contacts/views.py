@@ -1,21 +1,37 @@
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
-from rest_framework.response import Response
+from crm_project.bulk import BulkMixin
+from crm_project.expand import Expansion, ExpandMixin
+from crm_project.nested import nested_list, parent_object
+from sync.feed import ChangeFeedMixin
+from deals.models import Deal
+from deals.views import DealViewSet
 from .models import Contact
 from .serializers import ContactSerializer, ContactListSerializer
 
 
-class ContactViewSet(viewsets.ModelViewSet):
+class ContactViewSet(BulkMixin, ChangeFeedMixin, ExpandMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing contacts.
     
     Provides CRUD operations for contacts with search and filtering.
+    ``?expand=company,deals`` embeds related objects.
     """
-    queryset = Contact.objects.all()
+    queryset = Contact.objects.select_related('company')
     serializer_class = ContactSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['first_name', 'last_name', 'email', 'phone', 'position']
     ordering_fields = ['first_name', 'last_name', 'created_at']
+    expansions = {
+        'company': Expansion(
+            'companies.serializers.CompanyListSerializer',
+            select_related=['company__primary_contact'],
+        ),
+        'deals': Expansion(
+            'deals.serializers.DealListSerializer',
+            queryset=lambda: Deal.objects.select_related('company').order_by('-created_at', '-pk'),
+        ),
+    }
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -24,9 +40,6 @@ class ContactViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def deals(self, request, pk=None):
-        """Get all deals associated with this contact."""
-        contact = self.get_object()
-        deals = contact.deals.all()
-        from deals.serializers import DealListSerializer
-        serializer = DealListSerializer(deals, many=True)
-        return Response(serializer.data)
+        """Deals of this contact, cursor-paginated, with the deal list's filters."""
+        contact = parent_object(self)
+        return nested_list(self, DealViewSet, contact.deals.select_related('company', 'contact'))
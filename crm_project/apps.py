@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CrmProjectConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'crm_project'
+
+    def ready(self):
+        from . import checks  # noqa: F401 (registers the system checks)
@@ -0,0 +1,110 @@
+"""
+Shared helpers for the async (ASGI) read endpoints under ``/api/async/``.
+
+Django's async ORM methods (``acount()``, ``async for`` ...) hand every query
+to ``sync_to_async(thread_sensitive=True)``, which runs them one at a time on
+a single shared thread, so ``asyncio.gather()`` over them does not overlap
+any database work. ``run_concurrently()`` instead runs each callable on its
+own worker thread with that thread's own connection, which lets independent
+queries (a page and its total count, a company and its contacts and deals)
+wait on the database at the same time.
+
+The list and detail helpers reuse the DRF viewsets' querysets, filter
+backends and serializers, so the async endpoints accept the same query
+parameters and return the same JSON as their sync counterparts.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import JsonResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _on_worker_thread(func):
+    def run():
+        # Worker threads never see request_started/request_finished, so
+        # apply the CONN_MAX_AGE and health-check rules here instead.
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+async def run_concurrently(*funcs):
+    """
+    Call each sync ``func`` on its own thread and return their results in order.
+
+    Each thread uses its own database connection, so the callables must only
+    read, and won't see writes made in a transaction open on the caller's
+    connection.
+    """
+    return await asyncio.gather(*(_on_worker_thread(func)() for func in funcs))
+
+
+def viewset_for(viewset_class, request, action, **kwargs):
+    """Instantiate a DRF viewset for ``request`` without dispatching it."""
+    return viewset_class(
+        request=Request(request), action=action, format_kwarg=None, args=(), kwargs=kwargs,
+    )
+
+
+def page_links(request, page_number, page_count):
+    url = request.build_absolute_uri()
+    next_url = replace_query_param(url, 'page', page_number + 1) if page_number < page_count else None
+    if page_number <= 1:
+        previous_url = None
+    elif page_number == 2:
+        previous_url = remove_query_param(url, 'page')
+    else:
+        previous_url = replace_query_param(url, 'page', page_number - 1)
+    return next_url, previous_url
+
+
+async def list_response(request, viewset_class, select_related=()):
+    """
+    Page-numbered list in the same shape as ``PageNumberPagination``.
+
+    The page and the total count are fetched concurrently.
+    """
+    view = viewset_for(viewset_class, request, 'list')
+    try:
+        queryset = view.filter_queryset(view.get_queryset()).select_related(*select_related)
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400, safe=False)
+
+    page_size = api_settings.PAGE_SIZE
+    try:
+        page_number = int(request.GET.get('page', 1))
+    except ValueError:
+        page_number = 0
+    if page_number < 1:
+        return JsonResponse({'detail': 'Invalid page.'}, status=404)
+
+    offset = (page_number - 1) * page_size
+    count, objects = await run_concurrently(
+        queryset.count,
+        lambda: list(queryset[offset:offset + page_size]),
+    )
+    page_count = max(1, -(-count // page_size))
+    if page_number > page_count:
+        return JsonResponse({'detail': 'Invalid page.'}, status=404)
+
+    next_url, previous_url = page_links(request, page_number, page_count)
+    serializer = view.get_serializer_class()(objects, many=True, context={'request': view.request})
+    return JsonResponse({
+        'count': count,
+        'next': next_url,
+        'previous': previous_url,
+        'results': serializer.data,
+    })
+
+
+def not_found(model):
+    """The 404 body DRF's ``get_object()`` returns for a missing ``model``."""
+    return JsonResponse({'detail': f'No {model._meta.object_name} matches the given query.'}, status=404)
@@ -0,0 +1,25 @@
+"""
+Async (ASGI) read endpoints, mounted at ``/api/async/``.
+
+They mirror the read actions of the DRF viewsets and are meant to be served
+by an ASGI server (see "Running under ASGI" in the README). Under WSGI they
+still work, but Django runs each one in its own event loop.
+"""
+from django.urls import path
+
+from companies import async_views as company_views
+from contacts import async_views as contact_views
+from dashboard import async_views as dashboard_views
+from deals import async_views as deal_views
+
+urlpatterns = [
+    path('dashboard/stats/', dashboard_views.dashboard_stats, name='async-dashboard-stats'),
+    path('events/', dashboard_views.live_events, name='async-events'),
+    path('companies/', company_views.company_list, name='async-company-list'),
+    path('companies/by_milestone/', company_views.company_by_milestone, name='async-company-by-milestone'),
+    path('companies/<int:pk>/', company_views.company_detail, name='async-company-detail'),
+    path('contacts/', contact_views.contact_list, name='async-contact-list'),
+    path('contacts/<int:pk>/', contact_views.contact_detail, name='async-contact-detail'),
+    path('deals/', deal_views.deal_list, name='async-deal-list'),
+    path('deals/<int:pk>/', deal_views.deal_detail, name='async-deal-detail'),
+]
@@ -0,0 +1,86 @@
+"""
+Authentication backend with a short-lived, per-worker user cache.
+
+``AuthenticationMiddleware`` loads the session's user on every request;
+``CachedModelBackend`` answers that from memory for ``USER_CACHE_SECONDS``
+instead of running an ``auth_user`` SELECT each time. Together with
+``SESSION_BACKEND=signed_cookies`` (or ``cached_db`` on a shared cache) an
+authenticated request reaches the view without touching the database.
+
+Entries are dropped as soon as this worker saves or deletes the user (which
+covers password changes and ``last_login`` updates) or logs them out. Other
+workers notice such changes when their own entry expires, so a password
+change ends sessions on other workers within ``USER_CACHE_SECONDS``.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from monitoring.metrics import record_cache
+
+
+_users = {}
+_lock = threading.Lock()
+
+
+def cached_user(user_id):
+    """A private copy of the cached user, or None if absent or expired."""
+    entry = _users.get(user_id)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    # Each request gets its own instance so views can't leak state
+    # (permission caches, attributes) into other requests.
+    return copy.copy(entry[1])
+
+
+def cache_user(user):
+    with _lock:
+        _users[user.pk] = (time.monotonic() + settings.USER_CACHE_SECONDS, copy.copy(user))
+
+
+def forget_user(user_id):
+    with _lock:
+        _users.pop(user_id, None)
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` whose ``get_user()`` is served from the per-worker cache."""
+
+    def get_user(self, user_id):
+        user_id = get_user_model()._meta.pk.to_python(user_id)
+        user = cached_user(user_id)
+        record_cache('user', user is not None)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache_user(user)
+        return user
+
+    async def aget_user(self, user_id):
+        user_id = get_user_model()._meta.pk.to_python(user_id)
+        user = cached_user(user_id)
+        record_cache('user', user is not None)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                cache_user(user)
+        return user
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_changed_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
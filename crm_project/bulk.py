@@ -0,0 +1,259 @@
+"""
+Bulk writes for the contact and deal viewsets.
+
+    POST   /api/deals/       [{...}, {...}]                  create
+    PATCH  /api/deals/bulk/  [{"id": 7, "status": "closed_won"}, ...]   partial update
+    DELETE /api/deals/bulk/  [7, 8, 9]                       delete
+
+Each item is validated by the viewset's serializer as a single write would
+be, except for the checks that would query once per item:
+
+- foreign keys (``company``, ``contact``) are loaded for the whole batch with
+  one ``IN`` query per field (``PrefetchedPrimaryKeyRelatedField``);
+- unique fields (a contact's ``email``) are checked with one ``IN`` query per
+  field, plus a check for the same value twice in the batch.
+
+Nothing is written unless every item is valid. Otherwise the response is 400
+with one entry per item, ``{}`` for the valid ones, like a ``many=True``
+serializer. Valid batches are written with ``bulk_create()`` or
+``bulk_update()`` in one transaction.
+
+Those skip ``save()`` and its signals, so ``updated_at`` is set explicitly
+(the change feed depends on it), but bulk creates and updates send no live
+dashboard events, and dropdown reference data catches up on its expiry.
+Deletes go through ``QuerySet.delete()`` and behave like single deletes.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections, transaction
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
+
+
+# Rows per INSERT/UPDATE statement
+WRITE_BATCH_SIZE = 1000
+
+
+def to_pk(model, value):
+    """``value`` as ``model``'s primary key, or None if it can't be one."""
+    if isinstance(value, bool):
+        return None
+    try:
+        return model._meta.pk.to_python(value)
+    except (DjangoValidationError, TypeError, ValueError):
+        return None
+
+
+def chunks(values, using):
+    """``values`` split to fit the database's bound-parameter limit."""
+    size = connections[using].features.max_query_params or len(values) or 1
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    A primary key field that, inside a ``BulkListSerializer``, takes related
+    rows from those loaded for the whole batch instead of one query per item.
+    """
+
+    def to_internal_value(self, data):
+        rows = getattr(self.root, 'related_rows', {}).get(self.field_name)
+        if rows is None:
+            return super().to_internal_value(data)
+        pk = to_pk(self.get_queryset().model, data)
+        if pk is None:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return rows[pk]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Validates a batch for ``BulkMixin``.
+
+    ``instances`` maps ids to the rows being updated; each item's ``id``
+    selects its row. Leave it out when creating.
+    """
+
+    def __init__(self, *args, instances=None, **kwargs):
+        self.instances = instances
+        self.related_rows = {}
+        self.unique_validators = {}
+        super().__init__(*args, **kwargs)
+
+    def prefetch(self, data):
+        """Load every related row the batch refers to, one query per field."""
+        items = [item for item in data if isinstance(item, dict)]
+        for name, field in self.child.fields.items():
+            if isinstance(field, PrefetchedPrimaryKeyRelatedField) and not field.read_only:
+                queryset = field.get_queryset()
+                ids = {to_pk(queryset.model, item[name]) for item in items if item.get(name) is not None}
+                ids.discard(None)
+                self.related_rows[name] = queryset.in_bulk(ids)
+            # Checked for the whole batch in check_unique() instead
+            unique = [v for v in field.validators if isinstance(v, UniqueValidator)]
+            if unique:
+                field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+                self.unique_validators[name] = unique[0]
+
+    def run_child_validation(self, data):
+        if self.instances is None:
+            return self.child.run_validation(data)
+        pk = data.get('id') if isinstance(data, dict) else None
+        instance = self.instances.get(to_pk(self.child.Meta.model, pk)) if pk is not None else None
+        if instance is None:
+            raise ValidationError({'id': ['Not found.']})
+        self.child.instance = instance
+        self.child.initial_data = data
+        try:
+            return self.child.run_validation(data)
+        finally:
+            self.child.instance = None
+
+    def check_unique(self, results, errors):
+        """Add an error for each value that is taken, or repeated in the batch."""
+        model = self.child.Meta.model
+        for name, validator in self.unique_validators.items():
+            owners = {}
+            for index, attrs in enumerate(results):
+                if attrs is None or attrs.get(name) is None:
+                    continue
+                if attrs[name] in owners:
+                    errors[index].setdefault(name, []).append('Appears more than once in this batch.')
+                else:
+                    owners[attrs[name]] = index
+
+            values = list(owners)
+            taken = {}
+            for chunk in chunks(values, validator.queryset.db):
+                taken.update(validator.queryset.filter(**{f'{name}__in': chunk}).values_list(name, 'pk'))
+            for value, pk in taken.items():
+                index = owners[value]
+                # An update may keep its own value
+                own_pk = to_pk(model, self.initial_data[index]['id']) if self.instances is not None else None
+                if own_pk != pk:
+                    errors[index].setdefault(name, []).append(validator.message)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not data:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['Expected a non-empty list of items.']})
+        if len(data) > settings.API_BULK_MAX_ITEMS:
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [f'A batch can hold at most {settings.API_BULK_MAX_ITEMS} items.']
+            })
+        self.prefetch(data)
+
+        model = self.child.Meta.model
+        results, errors = [], []
+        seen_ids = set()
+        for item in data:
+            try:
+                if self.instances is not None and isinstance(item, dict):
+                    pk = to_pk(model, item.get('id'))
+                    if pk is not None and pk in seen_ids:
+                        raise ValidationError({'id': ['Appears more than once in this batch.']})
+                    seen_ids.add(pk)
+                results.append(self.run_child_validation(item))
+                errors.append({})
+            except ValidationError as exc:
+                results.append(None)
+                errors.append(dict(exc.detail) if isinstance(exc.detail, dict) else
+                              {api_settings.NON_FIELD_ERRORS_KEY: exc.detail})
+        self.check_unique(results, errors)
+
+        if any(errors):
+            raise ValidationError(errors)
+        return results
+
+
+class BulkMixin:
+    """
+    Viewset mixin accepting a list on ``create`` and adding the ``bulk``
+    action for partial updates (PATCH) and deletes (DELETE) by id.
+
+    The viewset's serializer must use ``PrefetchedPrimaryKeyRelatedField``
+    for its foreign keys (set ``serializer_related_field``).
+    """
+
+    def get_bulk_serializer(self, data, instances=None):
+        context = self.get_serializer_context()
+        partial = instances is not None
+        child = self.get_serializer_class()(context=context, partial=partial)
+        return BulkListSerializer(
+            child=child, data=data, instances=instances, context=context, partial=partial,
+        )
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+
+        serializer = self.get_bulk_serializer(request.data)
+        serializer.is_valid(raise_exception=True)
+        model = serializer.child.Meta.model
+        objects = [model(**attrs) for attrs in serializer.validated_data]
+        with transaction.atomic():
+            model._default_manager.bulk_create(objects, batch_size=WRITE_BATCH_SIZE)
+        return Response(self.get_serializer(objects, many=True).data, status=status.HTTP_201_CREATED)
+
+    def bulk_ids(self, data, key=None):
+        """The ids in a bulk request body, after checking its size."""
+        if not isinstance(data, list) or not data:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['Expected a non-empty list of items.']})
+        if len(data) > settings.API_BULK_MAX_ITEMS:
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [f'A batch can hold at most {settings.API_BULK_MAX_ITEMS} items.']
+            })
+        model = self.get_queryset().model
+        values = [item.get(key) if isinstance(item, dict) else None for item in data] if key else data
+        return [to_pk(model, value) for value in values]
+
+    def bulk_instances(self, ids):
+        """The rows with ``ids``, one query, after the object permission checks."""
+        instances = self.get_queryset().in_bulk({pk for pk in ids if pk is not None})
+        for instance in instances.values():
+            self.check_object_permissions(self.request, instance)
+        return instances
+
+    @action(detail=False, methods=['patch', 'delete'])
+    def bulk(self, request):
+        """Partially update (PATCH) or delete (DELETE) many rows by id."""
+        if request.method == 'DELETE':
+            return self.bulk_destroy(request)
+
+        instances = self.bulk_instances(self.bulk_ids(request.data, key='id'))
+        serializer = self.get_bulk_serializer(request.data, instances=instances)
+        serializer.is_valid(raise_exception=True)
+
+        # bulk_update() leaves auto_now alone
+        model = serializer.child.Meta.model
+        now = timezone.now()
+        fields = {'updated_at'}
+        objects = []
+        for item, attrs in zip(request.data, serializer.validated_data):
+            instance = instances[to_pk(model, item['id'])]
+            for name, value in attrs.items():
+                setattr(instance, name, value)
+            instance.updated_at = now
+            fields.update(attrs)
+            objects.append(instance)
+        with transaction.atomic():
+            model._default_manager.bulk_update(objects, sorted(fields), batch_size=WRITE_BATCH_SIZE)
+        return Response(self.get_serializer(objects, many=True).data)
+
+    def bulk_destroy(self, request):
+        ids = self.bulk_ids(request.data)
+        instances = self.bulk_instances(ids)
+        errors = [{} if pk in instances else {'id': ['Not found.']} for pk in ids]
+        if any(errors):
+            raise ValidationError(errors)
+        with transaction.atomic():
+            self.get_queryset().filter(pk__in=list(instances)).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,31 @@
+"""System checks for project-wide settings."""
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+# Cache backends that live inside one process
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_session_cache(app_configs, **kwargs):
+    """
+    Refuse cache-backed sessions on a per-process cache.
+
+    Logging out on one worker would only clear that worker's copy; the
+    others would keep accepting the session until it expires.
+    """
+    if not settings.SESSION_ENGINE.endswith(('.cache', '.cached_db')):
+        return []
+    backend = settings.CACHES.get(settings.SESSION_CACHE_ALIAS, {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f'{settings.SESSION_ENGINE} needs a cache shared by all workers, '
+        f'but CACHES[{settings.SESSION_CACHE_ALIAS!r}] is {backend}.',
+        hint='Use SESSION_BACKEND=db or signed_cookies, or configure a shared cache (Redis, Memcached).',
+        id='crm_project.E001',
+    )]
@@ -0,0 +1,103 @@
+"""
+Read-replica routing.
+
+When ``DATABASE_REPLICA_URLS`` is set, each URL becomes a ``replica_<n>``
+database and ``ReplicaRouter`` sends reads to a random replica, but only
+while ``ReplicaRoutingMiddleware`` says the current request may use one:
+
+- the method is safe (GET, HEAD, OPTIONS), and
+- the client has not written anything in the last ``REPLICA_STICKY_SECONDS``
+  (tracked with a cookie set on every unsafe request), so a milestone update
+  followed by a list refresh reads its own write from the primary.
+
+Everything else - writes, reads inside a transaction, reads after the
+request has written, management commands, the shell - uses ``default``.
+
+Stickiness lives only in that cookie. API clients authenticating with a
+bearer token get it too, but most don't keep cookies, so their GET right
+after a write may read from a replica that hasn't caught up. Such clients
+should keep the cookie (a cookie jar or ``requests.Session``) or use the
+object returned by the write.
+"""
+import contextvars
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+STICKY_COOKIE = 'crm_primary_until'
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+# True while the current request may read from a replica
+_replica_allowed = contextvars.ContextVar('replica_allowed', default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+class ReplicaRouter:
+    """Route reads to replicas when the current request allows it."""
+
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas or not _replica_allowed.get():
+            return 'default'
+        if connections['default'].in_atomic_block:
+            # Inside a transaction, reads must see its uncommitted writes
+            return 'default'
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        # Once a request writes, the rest of its reads go to the primary
+        if _replica_allowed.get():
+            _replica_allowed.set(False)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """Allow replica reads for safe requests outside the sticky-primary window."""
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sticky_seconds = settings.REPLICA_STICKY_SECONDS
+
+    def __call__(self, request):
+        if request.method in SAFE_METHODS:
+            token = _replica_allowed.set(not self.is_sticky(request))
+            try:
+                return self.get_response(request)
+            finally:
+                _replica_allowed.reset(token)
+
+        response = self.get_response(request)
+        if self.sticky_seconds:
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(int(time.time() + self.sticky_seconds)),
+                max_age=self.sticky_seconds,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def is_sticky(self, request):
+        try:
+            return int(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
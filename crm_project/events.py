@@ -0,0 +1,191 @@
+"""
+Live events pushed to browsers over Server-Sent Events.
+
+``broadcaster.publish()`` is called when a watched field changes (see
+``dashboard/live.py``) and, once the transaction commits, hands a compact
+JSON event to the configured backend. Each worker process
+runs one ``Broadcaster`` that receives events from the backend and fans them
+out to its open ``/api/async/events/`` streams, one bounded ``asyncio.Queue``
+per connection. Each event is formatted once per worker, not per connection.
+
+``EVENTS_BACKEND`` decides which workers an event reaches:
+
+- ``LocalBackend`` (the default) delivers inside the publishing process only.
+  That is enough for ``runserver``, a single uvicorn worker and tests.
+- ``PostgresBackend`` sends events with ``NOTIFY`` and has each streaming
+  worker ``LISTEN`` on its own connection, so a change saved by any worker
+  (WSGI or ASGI) reaches every browser. Use it with more than one worker.
+
+A connection whose queue fills up (a stalled client) is closed rather than
+allowed to grow; the browser reconnects and starts again from a fresh
+snapshot. Events are not stored, so anything published while a browser is
+disconnected is only covered by that snapshot.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(payload):
+    """The SSE frame for a JSON ``payload`` carrying a ``type`` key."""
+    event_type = json.loads(payload)['type']
+    return f'event: {event_type}\ndata: {payload}\n\n'.encode()
+
+
+class LocalBackend:
+    """
+    Delivers events to the publishing process only.
+
+    A backend has ``publish(payload)``, called in whichever process saved the
+    change, and ``start(deliver, reset)``, called once in a worker that
+    streams: it must then call ``deliver(payload)`` from any thread for each
+    event, and ``reset()`` if it may have missed some.
+    """
+
+    def __init__(self):
+        self.deliver = None
+
+    def start(self, deliver, reset):
+        self.deliver = deliver
+
+    def publish(self, payload):
+        # Nobody in this process has subscribed yet
+        if self.deliver is not None:
+            self.deliver(payload)
+
+
+class PostgresBackend:
+    """Delivers events to every worker through PostgreSQL ``LISTEN/NOTIFY``."""
+    channel = 'crm_events'
+    reconnect_seconds = 5
+
+    def __init__(self):
+        self.deliver = None
+        self.reset = None
+
+    def start(self, deliver, reset):
+        self.deliver = deliver
+        self.reset = reset
+        threading.Thread(target=self.listen, name='events-listener', daemon=True).start()
+
+    def publish(self, payload):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def listen(self):
+        import psycopg
+        from psycopg import sql
+
+        connected_before = False
+        while True:
+            try:
+                # The same parameters Django connects with, on a connection of
+                # our own: it sits in notifies() for as long as the worker runs.
+                params = connections['default'].get_connection_params()
+                with psycopg.connect(**params, autocommit=True) as conn:
+                    conn.execute(sql.SQL('LISTEN {}').format(sql.Identifier(self.channel)))
+                    if connected_before:
+                        # Events sent while we were away are lost
+                        self.reset()
+                    connected_before = True
+                    for notify in conn.notifies():
+                        self.deliver(notify.payload)
+            except Exception:
+                logger.exception('Event listener lost its connection; reconnecting')
+                time.sleep(self.reconnect_seconds)
+
+
+class Subscription:
+    """One open event stream, consumed on the event loop that created it."""
+
+    def __init__(self, maxsize):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, message):
+        # Runs on self.loop
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too far behind: drop what's queued and end the stream
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self, timeout):
+        """The next SSE frame, ``None`` once the stream should close, or
+        raises ``TimeoutError`` after ``timeout`` seconds without one."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class Broadcaster:
+    """Fans events from the backend out to this worker's open streams."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.backend = None
+        self.started = False
+
+    def get_backend(self):
+        if self.backend is None:
+            with self.lock:
+                if self.backend is None:
+                    self.backend = import_string(settings.EVENTS_BACKEND)()
+        return self.backend
+
+    def publish(self, event_type, **data):
+        """Send an event to every worker once the current transaction commits."""
+        payload = json.dumps({'type': event_type, **data}, separators=(',', ':'))
+        transaction.on_commit(lambda: self.get_backend().publish(payload))
+
+    def subscribe(self):
+        """A new ``Subscription``; call from the event loop that will read it."""
+        backend = self.get_backend()
+        with self.lock:
+            if not self.started:
+                # Workers that never stream don't need a listener
+                backend.start(self.deliver, self.reset)
+                self.started = True
+            subscription = Subscription(settings.EVENTS_QUEUE_SIZE)
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def send(self, message):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+            except RuntimeError:
+                # Its event loop has closed
+                self.unsubscribe(subscription)
+
+    def deliver(self, payload):
+        """Pass an event from the backend to every stream; any thread."""
+        try:
+            message = format_event(payload)
+        except (ValueError, KeyError, TypeError):
+            logger.warning('Dropping malformed event: %r', payload)
+            return
+        self.send(message)
+
+    def reset(self):
+        """Close every stream so browsers reconnect and resynchronise."""
+        self.send(None)
+
+
+broadcaster = Broadcaster()
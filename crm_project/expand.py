@@ -0,0 +1,106 @@
+"""
+``?expand=`` support for the API viewsets.
+
+``GET /api/companies/42/?expand=contacts,deals,primary_contact`` returns the
+company with those relations embedded, so a client needs one request instead
+of three. Each expansion is resolved for the whole page at once:
+
+- to-one relations are joined with ``select_related()``;
+- to-many relations use ``Prefetch()`` with an ordered queryset sliced to
+  ``API_EXPAND_LIMIT`` rows per parent (Django turns the slice into a
+  ``ROW_NUMBER()`` window), so one parent with 30k deals can't blow up the
+  response.
+
+A page of 50 companies with every expansion therefore costs the page query,
+the count and one query per to-many expansion.
+"""
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import ValidationError
+
+
+class Expansion:
+    """
+    One relation that ``?expand=`` can embed.
+
+    ``serializer`` is a dotted path, so serializers of related apps can refer
+    to each other without circular imports. ``select_related`` names the
+    relation plus whatever the nested serializer reads from it. For to-many
+    relations, ``queryset`` returns the ordered queryset to prefetch; the
+    first ``API_EXPAND_LIMIT`` rows are stored on ``expanded_<name>``.
+    """
+
+    def __init__(self, serializer, select_related=(), queryset=None):
+        self.serializer = serializer
+        self.select_related = select_related
+        self.queryset = queryset
+
+    def apply(self, name, queryset):
+        if self.queryset is None:
+            return queryset.select_related(*self.select_related)
+        related = self.queryset()[:settings.API_EXPAND_LIMIT]
+        return queryset.prefetch_related(Prefetch(name, queryset=related, to_attr=f'expanded_{name}'))
+
+    def represent(self, name, instance, context):
+        if self.queryset is None:
+            value = getattr(instance, name)
+            if value is None:
+                return None
+            return import_string(self.serializer)(value, context=context).data
+        value = getattr(instance, f'expanded_{name}', None)
+        if value is None:
+            # Not loaded through filter_queryset(), e.g. a freshly created object
+            value = (getattr(instance, name).all() & self.queryset())[:settings.API_EXPAND_LIMIT]
+        return import_string(self.serializer)(value, many=True, context=context).data
+
+
+class ExpandMixin:
+    """
+    Viewset mixin resolving ``?expand=`` against the ``expansions`` mapping.
+
+    The serializers must use ``ExpandableSerializerMixin`` to emit them.
+    """
+    expansions = {}
+
+    def requested_expansions(self):
+        if not hasattr(self, '_expansions'):
+            names = [
+                name.strip() for name in self.request.query_params.get('expand', '').split(',')
+                if name.strip()
+            ]
+            unknown = [name for name in names if name not in self.expansions]
+            if unknown:
+                raise ValidationError({
+                    'expand': f"Unknown expansion: {', '.join(unknown)}. "
+                              f"Valid options: {', '.join(self.expansions)}"
+                })
+            self._expansions = {name: self.expansions[name] for name in dict.fromkeys(names)}
+        return self._expansions
+
+    def filter_queryset(self, queryset):
+        # list() and get_object() both come through here
+        queryset = super().filter_queryset(queryset)
+        for name, expansion in self.requested_expansions().items():
+            queryset = expansion.apply(name, queryset)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request is not None:
+            context['expand'] = self.requested_expansions()
+        return context
+
+
+class ExpandableSerializerMixin:
+    """Add the relations requested with ``?expand=`` to each representation."""
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        expand = self.context.get('expand')
+        if expand:
+            # Nested serializers don't expand further
+            nested_context = {**self.context, 'expand': {}}
+            for name, expansion in expand.items():
+                data[name] = expansion.represent(name, instance, nested_context)
+        return data
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions from the database in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Delete at most N sessions per statement (default: 5000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many sessions have expired',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.SESSION_ENGINE.endswith(('.db', '.cached_db')):
+            self.stdout.write(f'{settings.SESSION_ENGINE} does not store sessions in the database; nothing to purge.')
+            return
+
+        expired = Session.objects.filter(expire_date__lt=timezone.now())
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} expired sessions')
+            return
+
+        # Small batches keep each DELETE short, unlike clearsessions' single
+        # statement over the whole table.
+        batch_size = max(1, options['batch_size'])
+        deleted = 0
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:batch_size])
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+        # Cached copies of these sessions expire from the cache on their own.
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired sessions'))
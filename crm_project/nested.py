@@ -0,0 +1,44 @@
+"""
+Nested list actions such as ``/api/companies/{id}/deals/``.
+
+A key account can have tens of thousands of deals, so these actions page
+with a cursor instead of returning everything, and reuse the related model's
+viewset for search, ordering, filters, ``?expand=`` and serializers:
+``/api/companies/{id}/deals/?status=proposal&ordering=-value`` accepts the
+same parameters as ``/api/deals/``.
+"""
+from django.shortcuts import get_object_or_404
+from rest_framework.pagination import CursorPagination
+
+
+class NestedCursorPagination(CursorPagination):
+    """Cursor pages, newest first unless ``?ordering=`` says otherwise."""
+    ordering = '-created_at'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def parent_object(view):
+    """
+    The detail object of a nested action.
+
+    ``get_object()`` would apply the parent's filter backends, so the nested
+    list's own ``?search=`` or ``?expand=`` could hide the parent or be
+    rejected by it.
+    """
+    obj = get_object_or_404(view.get_queryset(), pk=view.kwargs['pk'])
+    view.check_object_permissions(view.request, obj)
+    return obj
+
+
+def nested_list(parent_view, viewset_class, queryset):
+    """Filter, paginate and serialize ``queryset`` as ``viewset_class``'s list would."""
+    view = viewset_class(
+        request=parent_view.request, format_kwarg=parent_view.format_kwarg,
+        action='list', args=(), kwargs={},
+    )
+    queryset = view.filter_queryset(queryset)
+    paginator = NestedCursorPagination()
+    page = paginator.paginate_queryset(queryset, view.request, view=view)
+    serializer = view.get_serializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
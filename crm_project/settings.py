@@ -13,7 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 import dj_database_url
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -53,11 +53,25 @@ INSTALLED_APPS = [
     'companies',
     'deals',
     'dashboard',
+    'monitoring',
+    'tokens',
+    'sync',
+    # Project-wide management commands (sessions, auth)
+    'crm_project',
 ]
 
 MIDDLEWARE = [
+    'monitoring.tracing.TracingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add WhiteNoise for static files
+    'monitoring.sampler.SamplingMiddleware',
+    'monitoring.metrics.MetricsMiddleware',
+    'monitoring.slowlog.SlowQueryMiddleware',
+    'monitoring.profiling.ProfilingMiddleware',
+    'monitoring.memory.MemoryProfilingMiddleware',
+    # Installed innermost so the monitors above see statements without the comment
+    'monitoring.sqlcomment.SqlCommentMiddleware',
+    'crm_project.db_routing.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -93,10 +107,40 @@ WSGI_APPLICATION = 'crm_project.wsgi.application'
 # Database - Use PostgreSQL in production, SQLite in development
 DATABASE_URL = config('DATABASE_URL', default=None)
 
+# Postgres connections come from a psycopg 3 pool per worker process, so the
+# most connections the app can open is workers x DB_POOL_MAX_SIZE. Checkouts
+# wait up to DB_POOL_TIMEOUT seconds for a free connection, and each one is
+# health-checked before use. With the pool disabled (or on other databases)
+# connections persist per thread for DB_CONN_MAX_AGE seconds instead.
+DB_POOL_ENABLED = config('DB_POOL_ENABLED', default=True, cast=bool)
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=10, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=float)
+DB_POOL_MAX_IDLE = config('DB_POOL_MAX_IDLE', default=300, cast=float)
+DB_POOL_MAX_LIFETIME = config('DB_POOL_MAX_LIFETIME', default=1800, cast=float)
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=600, cast=int)
+
+
+def database_config(url):
+    """Django database settings for ``url``, pooled when it is Postgres."""
+    database = dj_database_url.parse(url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True)
+    if DB_POOL_ENABLED and database['ENGINE'] == 'django.db.backends.postgresql':
+        # The pool replaces persistent connections; Django requires CONN_MAX_AGE=0
+        database['CONN_MAX_AGE'] = 0
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+            'max_idle': DB_POOL_MAX_IDLE,
+            'max_lifetime': DB_POOL_MAX_LIFETIME,
+        }
+    return database
+
+
 if DATABASE_URL:
     # Production: Use PostgreSQL from environment variable
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600)
+        'default': database_config(DATABASE_URL)
     }
 else:
     # Development: Use SQLite
@@ -107,6 +151,16 @@ else:
         }
     }
 
+# Read replicas: comma-separated URLs, added as replica_1, replica_2, ...
+# Safe requests read from them unless the client wrote within the last
+# REPLICA_STICKY_SECONDS (see crm_project/db_routing.py). Locally, a copy of
+# db.sqlite3 works as a replica: DATABASE_REPLICA_URLS=sqlite:///db_replica.sqlite3
+DATABASE_REPLICA_URLS = config('DATABASE_REPLICA_URLS', default='', cast=Csv())
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5, cast=int)
+for index, replica_url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    DATABASES[f'replica_{index}'] = dict(database_config(replica_url), TEST={'MIRROR': 'default'})
+DATABASE_ROUTERS = ['crm_project.db_routing.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -165,10 +219,49 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'tokens.authentication.SignedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
 }
 
+# Rows per page (and per infinite-scroll batch) in the dashboard tables
+DASHBOARD_PAGE_SIZE = config('DASHBOARD_PAGE_SIZE', default=50, cast=int)
+
+# Most related rows embedded per object by ?expand= (e.g. a company's deals)
+API_EXPAND_LIMIT = config('API_EXPAND_LIMIT', default=50, cast=int)
+
+# /api/batch/: most sub-requests per batch, and the largest body accepted
+API_BATCH_MAX_REQUESTS = config('API_BATCH_MAX_REQUESTS', default=100, cast=int)
+API_BATCH_MAX_BYTES = config('API_BATCH_MAX_BYTES', default=1024 * 1024, cast=int)
+
+# Most items in one bulk create, update or delete on /api/contacts/ and /api/deals/
+API_BULK_MAX_ITEMS = config('API_BULK_MAX_ITEMS', default=10000, cast=int)
+
+# Change feeds (/api/<model>/changes/): rows per call, how long new rows are
+# held back so late-committing transactions aren't skipped, and how long
+# deletions are remembered (older cursors get 410 and must resync).
+CHANGE_FEED_PAGE_SIZE = config('CHANGE_FEED_PAGE_SIZE', default=500, cast=int)
+CHANGE_FEED_MAX_PAGE_SIZE = config('CHANGE_FEED_MAX_PAGE_SIZE', default=1000, cast=int)
+CHANGE_FEED_SETTLE_SECONDS = config('CHANGE_FEED_SETTLE_SECONDS', default=5, cast=int)
+CHANGE_FEED_TOMBSTONE_DAYS = config('CHANGE_FEED_TOMBSTONE_DAYS', default=30, cast=int)
+
+# Live dashboard events (/api/async/events/). Off by default: streams stay
+# open, so only enable them when the app is served by an ASGI server (see
+# "Running under ASGI" in the README); under WSGI each open dashboard tab
+# would hold a worker thread for good. The local backend only reaches
+# streams in the worker that saved the change; with several workers use
+# crm_project.events.PostgresBackend. Streams send a keepalive comment when
+# idle and are closed if a client falls EVENTS_QUEUE_SIZE events behind.
+LIVE_EVENTS_ENABLED = config('LIVE_EVENTS_ENABLED', default=False, cast=bool)
+EVENTS_BACKEND = config('EVENTS_BACKEND', default='crm_project.events.LocalBackend')
+EVENTS_KEEPALIVE_SECONDS = config('EVENTS_KEEPALIVE_SECONDS', default=15, cast=int)
+EVENTS_QUEUE_SIZE = config('EVENTS_QUEUE_SIZE', default=1000, cast=int)
+
+# Signed API tokens (POST /api/tokens/). Revocations reach other workers
+# within API_TOKEN_DENYLIST_REFRESH_SECONDS.
+API_TOKEN_TTL_SECONDS = config('API_TOKEN_TTL_SECONDS', default=12 * 60 * 60, cast=int)
+API_TOKEN_DENYLIST_REFRESH_SECONDS = config('API_TOKEN_DENYLIST_REFRESH_SECONDS', default=30, cast=int)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -183,6 +276,40 @@ CSRF_TRUSTED_ORIGINS = config(
     default='http://localhost:8000,http://127.0.0.1:8000'
 ).split(',')
 
+# Caches: Django's per-process memory cache, plus a larger one for rendered
+# template fragments (dashboard rows and detail panels). Fragment keys include
+# the objects' updated_at, so edits never serve stale HTML; MAX_ENTRIES only
+# bounds memory and should exceed the number of rows commonly viewed.
+FRAGMENT_CACHE_MAX_ENTRIES = config('FRAGMENT_CACHE_MAX_ENTRIES', default=20000, cast=int)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+        'OPTIONS': {'MAX_ENTRIES': FRAGMENT_CACHE_MAX_ENTRIES},
+    },
+}
+
+# Dropdown reference data (industries, company and contact pickers) is kept
+# per worker and versioned in the default cache; saves bump the version.
+# Copies are refreshed at least every REFERENCE_DATA_SECONDS regardless, which
+# bounds staleness across workers when the cache isn't shared.
+REFERENCE_DATA_SECONDS = config('REFERENCE_DATA_SECONDS', default=300, cast=int)
+
+# Sessions and auth: db is Django's default; signed_cookies keeps sessions
+# entirely in the cookie; cached_db reads them from the cache and falls back
+# to the database, but needs a cache shared by all workers (a system check
+# refuses it with the per-process cache above, where logging out on one
+# worker would leave the session alive on the others). The auth backend
+# caches users per worker for USER_CACHE_SECONDS. Purge expired sessions with
+# `manage.py purge_sessions`.
+SESSION_BACKEND = config('SESSION_BACKEND', default='db')
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
+AUTHENTICATION_BACKENDS = ['crm_project.auth.CachedModelBackend']
+USER_CACHE_SECONDS = config('USER_CACHE_SECONDS', default=30, cast=int)
+
 # Session cookie settings
 SESSION_COOKIE_SECURE = not DEBUG
 CSRF_COOKIE_SECURE = not DEBUG
@@ -193,3 +320,95 @@ CSRF_COOKIE_SAMESITE = 'Lax'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 LOGIN_URL = 'login'
+
+# Per-request profiling: staff send the token from /monitoring/profiles/ in the
+# X-CRM-Profile header (or ?_profile=) to capture cProfile + SQL for one request
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=True, cast=bool)
+PROFILING_DIR = config('PROFILING_DIR', default=str(BASE_DIR / 'profiles'))
+PROFILING_TOKEN_MAX_AGE = config('PROFILING_TOKEN_MAX_AGE', default=3600, cast=int)
+PROFILING_EXPLAIN_SLOWEST = config('PROFILING_EXPLAIN_SLOWEST', default=5, cast=int)
+
+# Append sqlcommenter-style comments (view, route, request id) to every SQL
+# statement so database-side tools can attribute load to code
+SQL_COMMENTER_ENABLED = config('SQL_COMMENTER_ENABLED', default=True, cast=bool)
+
+# Prometheus metrics served at /metrics. Under gunicorn, point
+# PROMETHEUS_MULTIPROC_DIR at a directory shared by all workers so any
+# worker can report totals for the whole server (see gunicorn.conf.py).
+# Scrapes authenticate with METRICS_TOKEN; unset, only DEBUG serves /metrics.
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+PROMETHEUS_MULTIPROC_DIR = config('PROMETHEUS_MULTIPROC_DIR', default='')
+if PROMETHEUS_MULTIPROC_DIR:
+    # prometheus_client reads this from the environment when it is imported
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = PROMETHEUS_MULTIPROC_DIR
+
+# Tracing: a TRACING_SAMPLE_RATE share of requests (0 disables tracing) is
+# written to TRACING_DIR as Chrome trace JSON; open in ui.perfetto.dev
+TRACING_SAMPLE_RATE = config('TRACING_SAMPLE_RATE', default=0.0, cast=float)
+TRACING_DIR = config('TRACING_DIR', default=str(BASE_DIR / 'traces'))
+
+# Sampling profiler (opt-in): each gunicorn worker samples request stacks
+# SAMPLING_HZ times a second and flushes collapsed stacks per route; see
+# /monitoring/samples/, which reads at most SAMPLING_MAX_FILES files
+SAMPLING_ENABLED = config('SAMPLING_ENABLED', default=False, cast=bool)
+SAMPLING_HZ = config('SAMPLING_HZ', default=100, cast=float)
+SAMPLING_FLUSH_SECONDS = config('SAMPLING_FLUSH_SECONDS', default=60, cast=float)
+SAMPLING_DIR = config('SAMPLING_DIR', default=str(BASE_DIR / 'samples'))
+SAMPLING_RETENTION_MINUTES = config('SAMPLING_RETENTION_MINUTES', default=6 * 60, cast=int)
+SAMPLING_MAX_FILES = config('SAMPLING_MAX_FILES', default=500, cast=int)
+
+# Memory profiling (opt-in): trace allocations with tracemalloc for routes
+# matching MEMORY_PROFILING_ROUTES and abort them with a 503 once they exceed
+# MEMORY_BUDGET_MB (0 = no budget). Results go to the monitoring.memory log.
+MEMORY_PROFILING_ENABLED = config('MEMORY_PROFILING_ENABLED', default=False, cast=bool)
+MEMORY_PROFILING_ROUTES = config(
+    'MEMORY_PROFILING_ROUTES',
+    default='*-list,company_list,contact_list,company-by-milestone,'
+            'company-upload-csv,company_upload_csv,company-export-csv,company_export_csv',
+).split(',')
+MEMORY_PROFILING_FRAMES = config('MEMORY_PROFILING_FRAMES', default=1, cast=int)
+MEMORY_PROFILING_TOP_SITES = config('MEMORY_PROFILING_TOP_SITES', default=10, cast=int)
+MEMORY_BUDGET_MB = config('MEMORY_BUDGET_MB', default=0, cast=int)
+
+# Slow-query log: fingerprints whose slowest run or per-request total exceeds
+# the threshold are appended as JSON lines; see /monitoring/slow-queries/
+SLOW_QUERY_ENABLED = config('SLOW_QUERY_ENABLED', default=True, cast=bool)
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=100, cast=float)
+SLOW_QUERY_LOG_FILE = config('SLOW_QUERY_LOG_FILE', default=str(BASE_DIR / 'logs' / 'slow_queries.jsonl'))
+SLOW_QUERY_LOG_MAX_BYTES = config('SLOW_QUERY_LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+SLOW_QUERY_LOG_BACKUPS = config('SLOW_QUERY_LOG_BACKUPS', default=5, cast=int)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'raw': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'raw',
+        },
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': SLOW_QUERY_LOG_MAX_BYTES,
+            'backupCount': SLOW_QUERY_LOG_BACKUPS,
+            'formatter': 'raw',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'monitoring.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'monitoring.memory': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
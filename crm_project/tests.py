@@ -0,0 +1,306 @@
+import io
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from companies.models import Company
+from companies.views import CompanyViewSet
+from contacts.models import Contact
+from tokens.signing import denylist, issue_token
+
+from . import auth, db_routing
+from .checks import check_session_cache
+from .db_routing import STICKY_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware
+
+
+def contact(email, **fields):
+    return {'first_name': 'Aroha', 'last_name': 'Ngata', 'email': email, **fields}
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Kauri Labs')
+
+    def batch(self, requests, atomic=False, **extra):
+        return self.client.post(
+            '/api/batch/', {'atomic': atomic, 'requests': requests}, content_type='application/json', **extra,
+        )
+
+    def test_sub_requests_are_independent(self):
+        response = self.batch([
+            {'method': 'POST', 'path': '/api/contacts/', 'body': contact('aroha@example.com')},
+            {'method': 'POST', 'path': '/api/contacts/', 'body': contact('not-an-email')},
+            {'method': 'GET', 'path': f'/api/companies/{self.company.pk}/'},
+            {'method': 'POST', 'path': f'/api/companies/{self.company.pk}/update_milestone/',
+             'body': {'milestone': 'successful'}},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual([result['status'] for result in results], [201, 400, 200, 200])
+        self.assertEqual(results[0]['body']['email'], 'aroha@example.com')
+        self.assertIn('email', results[1]['body'])
+        self.assertEqual(results[2]['body']['name'], 'Kauri Labs')
+        self.assertTrue(Contact.objects.filter(email='aroha@example.com').exists())
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.milestone, 'successful')
+
+    def test_query_string_reaches_sub_request(self):
+        Company.objects.create(name='Tasman Foods')
+        response = self.batch([{'method': 'GET', 'path': '/api/companies/?search=Tasman'}])
+        self.assertEqual([row['name'] for row in response.json()[0]['body']['results']], ['Tasman Foods'])
+
+    def test_invalid_sub_requests_get_error_bodies(self):
+        response = self.batch([
+            'GET /api/companies/',
+            {'method': 'TRACE', 'path': '/api/companies/'},
+            {'method': 'GET', 'path': 'api/companies/'},
+            {'method': 'GET', 'path': '/api/nowhere/'},
+            {'method': 'GET', 'path': '/'},
+            {'method': 'POST', 'path': '/api/batch/', 'body': {'requests': []}},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual([result['status'] for result in results], [400, 400, 400, 404, 400, 400])
+        for result in results:
+            self.assertIn('error', result['body'])
+
+    def test_unhandled_exception_is_contained(self):
+        with mock.patch.object(CompanyViewSet, 'retrieve', side_effect=RuntimeError('boom')), \
+                self.assertLogs('crm_project.batch', level='ERROR'):
+            response = self.batch([
+                {'method': 'GET', 'path': f'/api/companies/{self.company.pk}/'},
+                {'method': 'POST', 'path': '/api/contacts/', 'body': contact('aroha@example.com')},
+            ])
+
+        results = response.json()
+        self.assertEqual(results[0], {'status': 500, 'body': {'error': 'Server error'}})
+        self.assertEqual(results[1]['status'], 201)
+
+    def test_atomic_batch_commits_together(self):
+        response = self.batch([
+            {'method': 'POST', 'path': '/api/contacts/', 'body': contact('aroha@example.com')},
+            {'method': 'POST', 'path': '/api/contacts/', 'body': contact('wei@example.com')},
+        ], atomic=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Contact.objects.count(), 2)
+
+    def test_atomic_batch_rolls_back_on_failure(self):
+        response = self.batch([
+            {'method': 'POST', 'path': '/api/contacts/', 'body': contact('aroha@example.com')},
+            {'method': 'POST', 'path': f'/api/companies/{self.company.pk}/update_milestone/',
+             'body': {'milestone': 'no-such-milestone'}},
+            {'method': 'POST', 'path': '/api/contacts/', 'body': contact('wei@example.com')},
+        ], atomic=True)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result['status'] for result in response.json()], [201, 400, 424])
+        self.assertFalse(Contact.objects.exists())
+
+    def test_sub_requests_run_as_the_batch_user(self):
+        user = User.objects.create_user('batch', password='batch-pass-1')
+        token, claims = issue_token(user)
+        response = self.batch(
+            [{'method': 'POST', 'path': '/api/tokens/revoke/'}],
+            HTTP_AUTHORIZATION=f'Bearer {token}',
+        )
+
+        self.assertEqual(response.json()[0]['status'], 200)
+        self.assertTrue(denylist.is_revoked(claims.token_id))
+
+    @override_settings(API_BATCH_MAX_REQUESTS=2)
+    def test_rejects_empty_and_oversized_batches(self):
+        self.assertEqual(self.batch([]).status_code, 400)
+        response = self.batch([{'method': 'GET', 'path': '/api/companies/'}] * 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
+
+    @override_settings(API_BATCH_MAX_BYTES=100)
+    def test_rejects_large_bodies(self):
+        response = self.batch([{'method': 'POST', 'path': '/api/contacts/', 'body': contact('a' * 200 + '@example.com')}])
+        self.assertEqual(response.status_code, 413)
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.router.replicas = ['replica_1', 'replica_2']
+
+    def read_allowed(self):
+        token = db_routing._replica_allowed.set(True)
+        self.addCleanup(db_routing._replica_allowed.reset, token)
+
+    def test_reads_use_primary_unless_allowed(self):
+        self.assertEqual(self.router.db_for_read(Company), 'default')
+        self.read_allowed()
+        self.assertIn(self.router.db_for_read(Company), self.router.replicas)
+
+    def test_reads_in_a_transaction_use_primary(self):
+        self.read_allowed()
+        with mock.patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(self.router.db_for_read(Company), 'default')
+
+    def test_write_sends_later_reads_to_primary(self):
+        self.read_allowed()
+        self.assertEqual(self.router.db_for_write(Company), 'default')
+        self.assertEqual(self.router.db_for_read(Company), 'default')
+
+    def test_migrations_only_run_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'companies'))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'companies'))
+
+
+@override_settings(REPLICA_STICKY_SECONDS=5)
+@mock.patch('crm_project.db_routing.replica_aliases', return_value=['replica_1'])
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    def run_middleware(self, request):
+        seen = []
+
+        def get_response(request):
+            seen.append(db_routing._replica_allowed.get())
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(get_response)(request)
+        self.assertFalse(db_routing._replica_allowed.get())
+        return seen[0], response
+
+    def test_safe_request_may_use_replica(self, aliases):
+        allowed, response = self.run_middleware(RequestFactory().get('/api/companies/'))
+        self.assertTrue(allowed)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_write_sets_sticky_cookie(self, aliases):
+        allowed, response = self.run_middleware(RequestFactory().post('/api/companies/'))
+        self.assertFalse(allowed)
+        cookie = response.cookies[STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+        self.assertTrue(cookie['httponly'])
+        self.assertGreater(int(cookie.value), time.time())
+
+    def test_sticky_cookie_keeps_reads_on_primary(self, aliases):
+        factory = RequestFactory()
+        factory.cookies[STICKY_COOKIE] = str(int(time.time()) + 5)
+        self.assertFalse(self.run_middleware(factory.get('/api/companies/'))[0])
+
+        factory.cookies[STICKY_COOKIE] = str(int(time.time()) - 1)
+        self.assertTrue(self.run_middleware(factory.get('/api/companies/'))[0])
+
+        factory.cookies[STICKY_COOKIE] = 'garbage'
+        self.assertTrue(self.run_middleware(factory.get('/api/companies/'))[0])
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_no_cookie_when_stickiness_is_off(self, aliases):
+        _, response = self.run_middleware(RequestFactory().post('/api/companies/'))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_unused_without_replicas(self, aliases):
+        aliases.return_value = []
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaRoutingMiddleware(HttpResponse)
+
+
+class SessionCacheCheckTests(SimpleTestCase):
+    def test_default_settings_pass(self):
+        self.assertEqual(check_session_cache(None), [])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_cached_sessions_need_a_shared_cache(self):
+        self.assertEqual([error.id for error in check_session_cache(None)], ['crm_project.E001'])
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_session_cache(None), [])
+
+
+class CachedModelBackendTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='alice-pass-1')
+        self.addCleanup(auth.forget_user, self.user.pk)
+        self.backend = auth.CachedModelBackend()
+
+    def get_user_queries(self):
+        with CaptureQueriesContext(connections['default']) as queries:
+            user = self.backend.get_user(self.user.pk)
+        return user, len(queries)
+
+    def test_second_lookup_is_served_from_memory(self):
+        first, queries = self.get_user_queries()
+        self.assertEqual((first.pk, queries), (self.user.pk, 1))
+        second, queries = self.get_user_queries()
+        self.assertEqual((second.pk, queries), (self.user.pk, 0))
+        # Each lookup gets its own copy
+        self.assertIsNot(first, second)
+
+    def test_password_change_drops_the_entry(self):
+        self.get_user_queries()
+        self.user.set_password('alice-pass-2')
+        self.user.save()
+
+        user, queries = self.get_user_queries()
+        self.assertEqual(queries, 1)
+        self.assertTrue(user.check_password('alice-pass-2'))
+
+    def test_logout_drops_the_entry(self):
+        self.client.force_login(self.user)
+        self.get_user_queries()
+        self.client.logout()
+        self.assertEqual(self.get_user_queries()[1], 1)
+
+    @override_settings(USER_CACHE_SECONDS=30)
+    def test_entries_expire(self):
+        self.get_user_queries()
+        with mock.patch('crm_project.auth.time.monotonic', return_value=time.monotonic() + 31):
+            self.assertEqual(self.get_user_queries()[1], 1)
+
+    def test_logout_ends_the_session(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/').status_code, 200)
+        session_key = self.client.cookies['sessionid'].value
+        self.client.logout()
+        self.assertFalse(Session.objects.filter(session_key=session_key).exists())
+
+        # Replaying the old cookie must not log back in
+        self.client.cookies['sessionid'] = session_key
+        self.assertEqual(self.client.get('/').status_code, 302)
+
+
+class PurgeSessionsTests(TestCase):
+    def make_session(self, key, age_days):
+        Session.objects.create(
+            session_key=key, session_data='', expire_date=timezone.now() - timedelta(days=age_days),
+        )
+
+    def purge(self, **options):
+        out = io.StringIO()
+        call_command('purge_sessions', stdout=out, **options)
+        return out.getvalue()
+
+    def test_deletes_only_expired_sessions(self):
+        for index in range(3):
+            self.make_session(f'expired{index}', 1)
+        self.make_session('current', -1)
+
+        self.assertIn('Deleted 3 expired sessions', self.purge(batch_size=2))
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['current'])
+
+    def test_dry_run_deletes_nothing(self):
+        self.make_session('expired', 1)
+        self.assertIn('1 expired sessions', self.purge(dry_run=True))
+        self.assertEqual(Session.objects.count(), 1)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_nothing_to_purge_without_database_sessions(self):
+        self.make_session('expired', 1)
+        self.assertIn('nothing to purge', self.purge())
+        self.assertEqual(Session.objects.count(), 1)
@@ -17,6 +17,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework import routers
+from crm_project.batch import batch
+from monitoring.metrics import metrics_view
 
 # Create a router for API documentation
 router = routers.DefaultRouter()
@@ -25,8 +27,13 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('dashboard.urls')),
     path('api/', include(router.urls)),
+    path('api/async/', include('crm_project.async_urls')),
+    path('api/batch/', batch, name='api-batch'),
+    path('api/tokens/', include('tokens.urls')),
     path('api/contacts/', include('contacts.urls')),
     path('api/companies/', include('companies.urls')),
     path('api/deals/', include('deals.urls')),
     path('api-auth/', include('rest_framework.urls')),
+    path('monitoring/', include('monitoring.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
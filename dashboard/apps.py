@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard'
+
+    def ready(self):
+        from django.conf import settings
+        from . import live, reference
+        if settings.LIVE_EVENTS_ENABLED:
+            live.connect_signals()
+        reference.connect_signals()
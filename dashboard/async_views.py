@@ -0,0 +1,96 @@
+"""
+Async dashboard endpoints, served under ``/api/async/dashboard/``, and the
+live event stream at ``/api/async/events/``.
+"""
+import json
+
+from django.conf import settings
+from django.db.models import Count
+from django.http import JsonResponse, StreamingHttpResponse
+
+from companies.models import Company
+from crm_project.async_api import run_concurrently
+from crm_project.events import broadcaster
+from deals.async_views import pipeline_totals
+
+
+def milestone_counts():
+    counts = dict(Company.objects.order_by().values_list('milestone').annotate(count=Count('id')))
+    return [
+        {'milestone': key, 'label': label, 'count': counts.get(key, 0)}
+        for key, label in Company.MILESTONE_CHOICES
+    ]
+
+
+async def dashboard_stats(request):
+    """
+    The dashboard's chart and stat cards as JSON, plus the deal pipeline.
+
+    Milestone counts and deal totals are independent aggregates and run
+    concurrently; the stat card totals are derived from the milestone counts.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+
+    milestone_stats, pipeline = await run_concurrently(milestone_counts, pipeline_totals)
+    counts = {row['milestone']: row['count'] for row in milestone_stats}
+    return JsonResponse({
+        'milestone_stats': milestone_stats,
+        'total_companies': sum(counts.values()),
+        'successful_companies': counts.get('successful', 0),
+        'active_companies': sum(
+            count for milestone, count in counts.items()
+            if milestone not in ('successful', 'not_interested')
+        ),
+        'deal_pipeline': pipeline,
+    })
+
+
+async def live_events(request):
+    """
+    Server-Sent Events for the dashboard and company table (see ``live.py``).
+
+    Keeps the connection open, so serve it from the ASGI app: under WSGI each
+    open stream would hold a worker thread.
+    """
+    if not settings.LIVE_EVENTS_ENABLED:
+        return JsonResponse({'detail': 'Live events are disabled.'}, status=404)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+
+    # Subscribe before reading the counts: a change committing in between is
+    # then counted twice until the next reconnect, rather than lost
+    subscription = broadcaster.subscribe()
+    try:
+        (milestone_stats,) = await run_concurrently(milestone_counts)
+    except BaseException:
+        broadcaster.unsubscribe(subscription)
+        raise
+    snapshot = json.dumps(
+        {'type': 'counts', 'milestones': {row['milestone']: row['count'] for row in milestone_stats}},
+        separators=(',', ':'),
+    )
+
+    async def stream():
+        try:
+            yield f'retry: 5000\nevent: counts\ndata: {snapshot}\n\n'.encode()
+            while True:
+                try:
+                    message = await subscription.get(settings.EVENTS_KEEPALIVE_SECONDS)
+                except TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield b': keepalive\n\n'
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
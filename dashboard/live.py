@@ -0,0 +1,73 @@
+"""
+Events for the live dashboard, published through ``crm_project.events``.
+
+- ``company.milestone``: ``{"id", "milestone", "previous"}`` when a company
+  is created (``previous`` is null), deleted (``milestone`` is null) or moves
+  to another milestone. The chart and stat cards adjust their counts from
+  these, and the company table patches the row's dropdown.
+- ``deal.status``: ``{"id", "company", "status", "previous"}``, the same for
+  deals.
+- ``counts``: ``{"milestones": {milestone: count}}``, sent once when a stream
+  opens, so a browser that reconnects starts from the right numbers.
+
+Only ``save()`` and ``delete()`` send these; ``QuerySet.update()`` and
+``bulk_create()`` show up when browsers next reconnect or reload.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from companies.models import Company
+from crm_project.events import broadcaster
+from deals.models import Deal
+
+
+# model: (field, event type, extra payload)
+WATCHED = {
+    Company: ('milestone', 'company.milestone', lambda company: {}),
+    Deal: ('status', 'deal.status', lambda deal: {'company': deal.company_id}),
+}
+
+
+def remember_previous(sender, instance, update_fields=None, **kwargs):
+    """
+    Note the stored value the save is about to replace.
+
+    Rows loaded from the database carry it as ``_loaded_<field>`` (see the
+    models' ``from_db()``); it is only read again for instances built by
+    hand or loaded with the field deferred.
+    """
+    field = WATCHED[sender][0]
+    if instance._state.adding or (update_fields is not None and field not in update_fields):
+        instance._live_previous = None
+        return
+    loaded = f'_loaded_{field}'
+    if hasattr(instance, loaded):
+        instance._live_previous = getattr(instance, loaded)
+    else:
+        instance._live_previous = (
+            sender._base_manager.filter(pk=instance.pk).values_list(field, flat=True).first()
+        )
+
+
+def announce_save(sender, instance, created, **kwargs):
+    field, event_type, extra = WATCHED[sender]
+    previous = None if created else getattr(instance, '_live_previous', None)
+    current = getattr(instance, field)
+    if created or (previous is not None and previous != current):
+        broadcaster.publish(event_type, id=instance.pk, **extra(instance),
+                            **{field: current, 'previous': previous})
+    # The next save of this instance compares against what was just written
+    setattr(instance, f'_loaded_{field}', current)
+
+
+def announce_delete(sender, instance, **kwargs):
+    field, event_type, extra = WATCHED[sender]
+    broadcaster.publish(event_type, id=instance.pk, **extra(instance),
+                        **{field: None, 'previous': getattr(instance, field)})
+
+
+def connect_signals():
+    for model in WATCHED:
+        label = model._meta.label_lower
+        pre_save.connect(remember_previous, sender=model, dispatch_uid=f'live.previous.{label}')
+        post_save.connect(announce_save, sender=model, dispatch_uid=f'live.save.{label}')
+        post_delete.connect(announce_delete, sender=model, dispatch_uid=f'live.delete.{label}')
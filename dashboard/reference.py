@@ -0,0 +1,131 @@
+"""
+Reference data for the dashboard's dropdowns.
+
+Industry lists and the company and contact pickers used to be queried in full
+on every list and form render. Each ``ReferenceList`` here keeps its rows as
+plain tuples in the worker, checked against a version number in the default
+cache:
+
+- a render costs one cache lookup for the version while nothing changed;
+- saving or deleting a company or contact bumps the versions it affects
+  (see ``connect_signals()``), and the next render reloads the list, from the
+  cache if another worker already stored that version, else from the
+  database;
+- with Django's per-process memory cache, other workers don't see the bump,
+  so every copy is also reloaded after ``REFERENCE_DATA_SECONDS``. With a
+  shared cache backend the bump reaches every worker at once.
+
+``QuerySet.update()`` and ``bulk_create()`` send no signals and are only
+picked up by that expiry.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Value
+from django.db.models.functions import Coalesce, Concat
+from django.db.models.signals import post_delete, post_save
+
+from companies.models import Company
+from contacts.models import Contact
+from monitoring.metrics import record_cache
+
+
+class ReferenceList:
+    """A versioned, per-worker copy of one dropdown's rows."""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.version_key = f'reference:{name}:version'
+        # (version, expires, rows)
+        self.local = None
+        self.lock = threading.Lock()
+
+    def data_key(self, version):
+        return f'reference:{self.name}:{version}'
+
+    def current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, 1, timeout=None)
+            version = cache.get(self.version_key, 1)
+        return version
+
+    def get(self):
+        """The rows as a tuple, reloaded if the version changed or the copy expired."""
+        version = self.current_version()
+        local = self.local
+        hit = local is not None and local[0] == version and local[1] > time.monotonic()
+        record_cache('reference', hit)
+        if hit:
+            return local[2]
+
+        with self.lock:
+            rows = cache.get(self.data_key(version))
+            if rows is None:
+                rows = tuple(self.loader())
+                cache.set(self.data_key(version), rows, settings.REFERENCE_DATA_SECONDS)
+            self.local = (version, time.monotonic() + settings.REFERENCE_DATA_SECONDS, rows)
+        return rows
+
+    def invalidate(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            # Nobody has read the list since the cache was cleared
+            pass
+        self.local = None
+
+
+def load_industries():
+    return (
+        Company.objects.exclude(industry__isnull=True).exclude(industry='')
+        .values_list('industry', flat=True).distinct().order_by('industry')
+    )
+
+
+def load_companies():
+    return Company.objects.order_by('name').values_list('pk', 'name')
+
+
+def load_contacts():
+    """``(pk, label)`` with the position and company the form shows."""
+    for pk, full_name, position, company in (
+        Contact.objects.order_by('first_name', 'last_name')
+        .values_list(
+            'pk',
+            Concat('first_name', Value(' '), 'last_name'),
+            'position',
+            Coalesce('company__name', Value('')),
+        )
+    ):
+        label = full_name
+        if position:
+            label += f' - {position}'
+        if company:
+            label += f' ({company})'
+        yield pk, label
+
+
+industries = ReferenceList('industries', load_industries)
+companies = ReferenceList('companies', load_companies)
+contacts = ReferenceList('contacts', load_contacts)
+
+
+def invalidate_company_lists(sender, **kwargs):
+    industries.invalidate()
+    companies.invalidate()
+    # Contact labels include the company name
+    contacts.invalidate()
+
+
+def invalidate_contact_lists(sender, **kwargs):
+    contacts.invalidate()
+
+
+def connect_signals():
+    for signal, name in ((post_save, 'save'), (post_delete, 'delete')):
+        signal.connect(invalidate_company_lists, sender=Company, dispatch_uid=f'reference.company.{name}')
+        signal.connect(invalidate_contact_lists, sender=Contact, dispatch_uid=f'reference.contact.{name}')
@@ -0,0 +1,215 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.test import TestCase, override_settings
+
+from companies.models import Company
+from contacts.models import Contact
+
+from .keyset import InvalidCursor, KeysetPaginator, decode_cursor, encode_cursor
+
+
+SORTS = KeysetPaginator(
+    sorts={
+        'name': 'name',
+        'industry': Coalesce('industry', Value('')),
+        'updated': 'updated_at',
+    },
+    default='name',
+)
+
+
+def walk(paginate, sort, page_size):
+    """Every row id, page by page, following the cursors to the end."""
+    pks, cursor = [], None
+    while True:
+        rows, cursor = paginate(sort, cursor, page_size)
+        assert len(rows) <= page_size
+        pks.extend(row.pk for row in rows)
+        if cursor is None:
+            return pks
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        # Three industries shared by several rows each, plus rows with none
+        industries = ['Retail', None, 'Technology', 'Retail', '', None, 'Technology', 'Retail', None]
+        self.companies = [
+            Company.objects.create(name=f'Company {index}', industry=industry)
+            for index, industry in enumerate(industries)
+        ]
+        # Several rows share one timestamp, down to the microsecond
+        same_time = datetime(2025, 3, 1, 9, 30, 0, 123456, tzinfo=dt_timezone.utc)
+        Company.objects.filter(pk__in=[c.pk for c in self.companies[2:6]]).update(updated_at=same_time)
+
+    def paginate(self, sort, cursor, page_size):
+        return SORTS.paginate(Company.objects.all(), sort, cursor, page_size)
+
+    def expected(self, key, descending):
+        rows = sorted(Company.objects.all(), key=lambda c: (key(c), c.pk), reverse=descending)
+        return [row.pk for row in rows]
+
+    def test_walks_every_page_in_both_directions(self):
+        keys = {
+            'name': lambda c: c.name,
+            'industry': lambda c: c.industry or '',
+            'updated': lambda c: c.updated_at,
+        }
+        for sort, key in keys.items():
+            for descending in (False, True):
+                for page_size in (1, 2, 4, 20):
+                    param = f'-{sort}' if descending else sort
+                    with self.subTest(sort=param, page_size=page_size):
+                        pks = walk(self.paginate, param, page_size)
+                        self.assertEqual(len(pks), len(set(pks)))
+                        self.assertEqual(pks, self.expected(key, descending))
+
+    def test_equal_values_are_ordered_by_pk(self):
+        Company.objects.update(industry='Retail')
+        self.assertEqual(walk(self.paginate, 'industry', 2), sorted(c.pk for c in self.companies))
+        self.assertEqual(walk(self.paginate, '-industry', 2), sorted((c.pk for c in self.companies), reverse=True))
+
+    def test_last_page_has_no_cursor(self):
+        rows, cursor = self.paginate('name', None, len(self.companies))
+        self.assertEqual(len(rows), len(self.companies))
+        self.assertIsNone(cursor)
+
+    def test_rows_added_before_the_cursor_do_not_shift_later_pages(self):
+        first, cursor = self.paginate('name', None, 3)
+        Company.objects.create(name='Aardvark Ltd')
+        second, _ = self.paginate('name', cursor, 3)
+        self.assertEqual(
+            [row.pk for row in first + second],
+            self.expected(lambda c: c.name, False)[1:7],
+        )
+
+    def test_cursor_round_trip(self):
+        moment = datetime(2025, 3, 1, 9, 30, 0, 123456, tzinfo=dt_timezone.utc)
+        for value in ('Kauri Labs', '', 42, moment.isoformat()):
+            with self.subTest(value=value):
+                self.assertEqual(decode_cursor(encode_cursor(value, 7)), (value, 7))
+        self.assertEqual(decode_cursor(encode_cursor(moment, 7)), (moment.isoformat(), 7))
+
+    def test_invalid_cursors_are_rejected(self):
+        cursors = {
+            'name': ['not base64!', encode_cursor('x', 'not-an-id'), 'W10', encode_cursor(None, 1)],
+            'updated': [encode_cursor('yesterday', 1), encode_cursor(['a'], 1)],
+        }
+        for sort, values in cursors.items():
+            for cursor in values:
+                with self.subTest(sort=sort, cursor=cursor):
+                    with self.assertRaises(InvalidCursor):
+                        self.paginate(sort, cursor, 2)
+
+
+@override_settings(DASHBOARD_PAGE_SIZE=2)
+class KeysetListViewTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user('sales', password='sales-pass-1')
+        self.client.force_login(user)
+        kauri = Company.objects.create(name='Kauri Labs')
+        tasman = Company.objects.create(name='Tasman Foods')
+        self.contacts = [
+            Contact.objects.create(
+                first_name='Contact', last_name=str(index), email=f'contact{index}@example.com', company=company,
+            )
+            for index, company in enumerate([kauri, None, tasman, kauri, None, kauri, tasman])
+        ]
+        Company.objects.create(name='Aoraki Tours')
+
+    def walk_view(self, first_url, rows_url, context_key, params):
+        """Load the list page, then follow X-Next-Cursor through the row fragments."""
+        response = self.client.get(first_url, params)
+        self.assertEqual(response.status_code, 200)
+        pks = [row.pk for row in response.context[context_key]]
+        cursor = response.context['next_cursor']
+        while cursor:
+            response = self.client.get(rows_url, {**params, 'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            pks.extend(row.pk for row in response.context[context_key])
+            cursor = response['X-Next-Cursor']
+        self.assertEqual(len(pks), len(set(pks)))
+        return pks
+
+    def test_contact_pages_sorted_by_nullable_company(self):
+        def key(contact):
+            return (contact.company.name if contact.company else '', contact.pk)
+
+        for sort, descending in (('company', False), ('-company', True)):
+            with self.subTest(sort=sort):
+                pks = self.walk_view('/contacts/', '/contacts/rows/', 'contacts', {'sort': sort})
+                expected = sorted(Contact.objects.select_related('company'), key=key, reverse=descending)
+                self.assertEqual(pks, [contact.pk for contact in expected])
+
+    def test_company_pages_keep_filters(self):
+        pks = self.walk_view('/companies/', '/companies/rows/', 'companies', {'sort': '-name', 'search': 'a'})
+        self.assertEqual(
+            pks, list(Company.objects.filter(name__icontains='a').order_by('-name').values_list('pk', flat=True)),
+        )
+
+    def test_last_fragment_has_empty_next_cursor(self):
+        response = self.client.get('/companies/rows/', {'sort': 'name'})
+        cursor = response['X-Next-Cursor']
+        self.assertTrue(cursor)
+        response = self.client.get('/companies/rows/', {'sort': 'name', 'cursor': cursor})
+        self.assertEqual(response['X-Next-Cursor'], '')
+
+    def test_bad_cursor_is_a_400(self):
+        cursors = ['garbage', encode_cursor('Kauri Labs', 'x'), encode_cursor('not-a-date', 1)]
+        for url in ('/companies/', '/companies/rows/', '/contacts/', '/contacts/rows/'):
+            for cursor in cursors:
+                with self.subTest(url=url, cursor=cursor):
+                    # The last cursor only fails for a timestamp column
+                    sort = 'updated' if url.startswith('/companies/') else 'created'
+                    response = self.client.get(url, {'sort': sort, 'cursor': cursor})
+                    self.assertEqual(response.status_code, 400)
+
+
+class CompanyDetailFragmentTests(TestCase):
+    def setUp(self):
+        caches['template_fragments'].clear()
+        self.addCleanup(caches['template_fragments'].clear)
+        self.client.force_login(get_user_model().objects.create_user('sales', password='sales-pass-1'))
+        self.company = Company.objects.create(name='Kauri Labs')
+        other = Company.objects.create(name='Tasman Foods')
+        # Grace is the oldest and Wei the newest, so swapping Grace for Aroha
+        # leaves both the count and the newest updated_at as they were
+        self.grace, self.aroha, self.wei = [
+            Contact.objects.create(first_name=first, last_name='Example', email=f'{first}@example.com', company=company)
+            for first, company in (('Grace', other), ('Aroha', self.company), ('Wei', self.company))
+        ]
+
+    def detail(self):
+        response = self.client.get(f'/companies/{self.company.pk}/')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_unchanged_contacts_come_from_the_cache(self):
+        self.assertIn('Aroha Example', self.detail())
+        # update() leaves updated_at alone, so the cached panel is still shown
+        Contact.objects.filter(pk=self.aroha.pk).update(last_name='Renamed')
+        self.assertIn('Aroha Example', self.detail())
+
+    def test_contact_save_invalidates_the_panel(self):
+        self.detail()
+        self.aroha.last_name = 'Ngata'
+        self.aroha.save()
+        page = self.detail()
+        self.assertIn('Aroha Ngata', page)
+        self.assertNotIn('Aroha Example', page)
+
+    def test_swapped_contacts_invalidate_the_panel(self):
+        self.detail()
+        Contact.objects.filter(pk=self.aroha.pk).update(company=None)
+        Contact.objects.filter(pk=self.grace.pk).update(company=self.company)
+        page = self.detail()
+        self.assertIn('Grace Example', page)
+        self.assertNotIn('Aroha Example', page)
+
+    def test_deleted_contact_invalidates_the_panel(self):
+        self.detail()
+        self.wei.delete()
+        self.assertNotIn('Wei Example', self.detail())
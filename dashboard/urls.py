@@ -10,6 +10,7 @@ urlpatterns = [
     
     # Company URLs
     path('companies/', views.company_list, name='company_list'),
+    path('companies/rows/', views.company_list_rows, name='company_list_rows'),
     path('companies/new/', views.company_create, name='company_create'),
     path('companies/upload-csv/', views.company_upload_csv, name='company_upload_csv'),
     path('companies/export-csv/', views.company_export_csv, name='company_export_csv'),
@@ -20,6 +21,7 @@ urlpatterns = [
     
     # Contact URLs
     path('contacts/', views.contact_list, name='contact_list'),
+    path('contacts/rows/', views.contact_list_rows, name='contact_list_rows'),
     path('contacts/new/', views.contact_create, name='contact_create'),
     path('contacts/<int:pk>/', views.contact_detail, name='contact_detail'),
     path('contacts/<int:pk>/edit/', views.contact_update, name='contact_update'),
@@ -4,10 +4,17 @@ from django.contrib.auth import login
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.db import models
-from django.db.models import Count, Q
-from django.http import JsonResponse, HttpResponse
+from django.conf import settings
+from django.db.models import Count, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest
 from companies.models import Company
 from contacts.models import Contact
+from monitoring.memory import check_memory_budget
+from monitoring.metrics import record_import
+from monitoring.tracing import span
+from . import reference
+from .keyset import InvalidCursor, KeysetPaginator
 import json
 import csv
 import io
@@ -34,6 +41,7 @@ def dashboard(request):
     for milestone_key, milestone_label in Company.MILESTONE_CHOICES:
         count = Company.objects.filter(milestone=milestone_key).count()
         milestone_stats.append({
+            'milestone': milestone_key,
             'label': milestone_label,
             'count': count
         })
@@ -48,16 +56,25 @@ def dashboard(request):
         'total_companies': total_companies,
         'successful_companies': successful_companies,
         'active_companies': active_companies,
+        'live_events': settings.LIVE_EVENTS_ENABLED,
         'user': request.user
     }
     return render(request, 'dashboard/dashboard.html', context)
 
 
-@login_required
-@ensure_csrf_cookie
-def company_list(request):
-    """View to list all companies."""
-    # Get filter and search parameters
+COMPANY_SORTS = KeysetPaginator(
+    sorts={
+        'name': 'name',
+        'industry': Coalesce('industry', Value('')),
+        'milestone': 'milestone',
+        'updated': 'updated_at',
+    },
+    default='name',
+)
+
+
+def filter_companies(request):
+    """Companies matching the list's ``milestone`` and ``search`` parameters."""
     milestone_filter = request.GET.get('milestone', '')
     search_query = request.GET.get('search', '')
     
@@ -75,27 +92,70 @@ def company_list(request):
             models.Q(industry__icontains=search_query) |
             models.Q(email__icontains=search_query)
         )
-    
-    # Get distinct industries for export dropdown
-    industries = Company.objects.exclude(industry__isnull=True).exclude(industry='').values_list('industry', flat=True).distinct().order_by('industry')
+    return companies, milestone_filter, search_query
+
+
+@login_required
+@ensure_csrf_cookie
+def company_list(request):
+    """View to list companies, one keyset page at a time."""
+    companies, milestone_filter, search_query = filter_companies(request)
+    sort = COMPANY_SORTS.sort_param(request)
+    try:
+        page, next_cursor = COMPANY_SORTS.paginate(
+            companies, sort, request.GET.get('cursor'), settings.DASHBOARD_PAGE_SIZE
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
     
     context = {
-        'companies': companies,
+        'companies': page,
+        'total_count': companies.count(),
+        'next_cursor': next_cursor,
+        'sort_links': COMPANY_SORTS.sort_links(sort),
         'milestone_choices': Company.MILESTONE_CHOICES,
         'current_milestone': milestone_filter,
         'search_query': search_query,
-        'industries': industries,
+        'industries': reference.industries.get(),
+        'live_events': settings.LIVE_EVENTS_ENABLED,
     }
     return render(request, 'dashboard/company_list_table.html', context)
 
 
+@login_required
+def company_list_rows(request):
+    """The next batch of company rows as an HTML fragment, for infinite scroll."""
+    companies, _, _ = filter_companies(request)
+    try:
+        page, next_cursor = COMPANY_SORTS.paginate(
+            companies, COMPANY_SORTS.sort_param(request),
+            request.GET.get('cursor'), settings.DASHBOARD_PAGE_SIZE
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    
+    response = render(request, 'dashboard/company_list_rows.html', {
+        'companies': page,
+        'milestone_choices': Company.MILESTONE_CHOICES,
+    })
+    response['X-Next-Cursor'] = next_cursor or ''
+    return response
+
+
 @login_required
 def company_detail(request, pk):
     """View to show company details."""
     company = get_object_or_404(Company, pk=pk)
+    # One aggregate keys the cached contacts panel; the contacts themselves
+    # are only loaded when it changed. The id sum catches contacts moved in
+    # or out without a newer updated_at, e.g. by QuerySet.update().
+    contacts = company.contacts.aggregate(
+        count=Count('id'), id_sum=Sum('id'), updated=Max('updated_at')
+    )
     
     context = {
         'company': company,
+        'contacts_version': f"{contacts['count']}-{contacts['id_sum']}-{contacts['updated']}",
         'milestone_choices': Company.MILESTONE_CHOICES,
     }
     return render(request, 'dashboard/company_detail.html', context)
@@ -119,10 +179,9 @@ def company_create(request):
         company.save()
         return redirect('company_detail', pk=company.pk)
     
-    contacts = Contact.objects.all().order_by('first_name', 'last_name')
     context = {
         'milestone_choices': Company.MILESTONE_CHOICES,
-        'contacts': contacts,
+        'contacts': reference.contacts.get(),
     }
     return render(request, 'dashboard/company_form.html', context)
 
@@ -145,11 +204,10 @@ def company_update(request, pk):
         company.save()
         return redirect('company_detail', pk=company.pk)
     
-    contacts = Contact.objects.all().order_by('first_name', 'last_name')
     context = {
         'company': company,
         'milestone_choices': Company.MILESTONE_CHOICES,
-        'contacts': contacts,
+        'contacts': reference.contacts.get(),
         'is_update': True,
     }
     return render(request, 'dashboard/company_form.html', context)
@@ -199,6 +257,7 @@ def company_upload_csv(request):
             errors = []
             
             for row_num, row in enumerate(reader, start=2):
+                check_memory_budget()
                 try:
                     # Get company name (required field)
                     name = row.get('name', '').strip()
@@ -251,6 +310,7 @@ def company_upload_csv(request):
                 except Exception as e:
                     errors.append(f"Row {row_num}: {str(e)}")
             
+            record_import('dashboard_upload_csv', created_count, updated_count, len(errors))
             return JsonResponse({
                 'success': True,
                 'message': 'CSV upload completed',
@@ -344,39 +404,50 @@ def company_export_csv(request):
     ])
     
     # Group companies by industry and write rows
-    current_industry = None
-    for company in companies:
-        industry = company.industry or 'No Industry Specified'
-        
-        # Add a blank row between industry groups for readability
-        if current_industry is not None and current_industry != industry:
-            writer.writerow([])  # Blank row
-        
-        current_industry = industry
-        
-        writer.writerow([
-            industry,
-            company.name,
-            company.website or '',
-            company.email or '',
-            company.phone or '',
-            company.address or '',
-            company.milestone,
-            company.get_milestone_display(),
-            company.notes or '',
-            company.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            company.updated_at.strftime('%Y-%m-%d %H:%M:%S')
-        ])
+    with span('csv.write', 'app', view='dashboard'):
+        current_industry = None
+        for company in companies:
+            check_memory_budget()
+            industry = company.industry or 'No Industry Specified'
+            
+            # Add a blank row between industry groups for readability
+            if current_industry is not None and current_industry != industry:
+                writer.writerow([])  # Blank row
+            
+            current_industry = industry
+            
+            writer.writerow([
+                industry,
+                company.name,
+                company.website or '',
+                company.email or '',
+                company.phone or '',
+                company.address or '',
+                company.milestone,
+                company.get_milestone_display(),
+                company.notes or '',
+                company.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                company.updated_at.strftime('%Y-%m-%d %H:%M:%S')
+            ])
     
     return response
 
 
 # Contact Views
 
-@login_required
-def contact_list(request):
-    """View to list all contacts."""
-    # Get filter and search parameters
+CONTACT_SORTS = KeysetPaginator(
+    sorts={
+        'name': 'first_name',
+        'email': 'email',
+        'company': Coalesce('company__name', Value('')),
+        'created': 'created_at',
+    },
+    default='-created',
+)
+
+
+def filter_contacts(request):
+    """Contacts matching the list's ``company`` and ``search`` parameters."""
     company_filter = request.GET.get('company', '')
     search_query = request.GET.get('search', '')
     
@@ -396,19 +467,50 @@ def contact_list(request):
             Q(position__icontains=search_query) |
             Q(company__name__icontains=search_query)
         )
-    
-    # Get all companies for filter dropdown
-    companies = Company.objects.all().order_by('name')
+    return contacts, company_filter, search_query
+
+
+@login_required
+def contact_list(request):
+    """View to list contacts, one keyset page at a time."""
+    contacts, company_filter, search_query = filter_contacts(request)
+    sort = CONTACT_SORTS.sort_param(request)
+    try:
+        page, next_cursor = CONTACT_SORTS.paginate(
+            contacts, sort, request.GET.get('cursor'), settings.DASHBOARD_PAGE_SIZE
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
     
     context = {
-        'contacts': contacts,
-        'companies': companies,
+        'contacts': page,
+        'total_count': contacts.count(),
+        'next_cursor': next_cursor,
+        'sort_links': CONTACT_SORTS.sort_links(sort),
+        'companies': reference.companies.get(),
         'current_company': company_filter,
         'search_query': search_query,
     }
     return render(request, 'dashboard/contact_list_table.html', context)
 
 
+@login_required
+def contact_list_rows(request):
+    """The next batch of contact rows as an HTML fragment, for infinite scroll."""
+    contacts, _, _ = filter_contacts(request)
+    try:
+        page, next_cursor = CONTACT_SORTS.paginate(
+            contacts, CONTACT_SORTS.sort_param(request),
+            request.GET.get('cursor'), settings.DASHBOARD_PAGE_SIZE
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    
+    response = render(request, 'dashboard/contact_list_rows.html', {'contacts': page})
+    response['X-Next-Cursor'] = next_cursor or ''
+    return response
+
+
 @login_required
 def contact_detail(request, pk):
     """View to show contact details."""
@@ -439,9 +541,8 @@ def contact_create(request):
     # Get company from query parameter if provided
     company_id = request.GET.get('company')
     
-    companies = Company.objects.all().order_by('name')
     context = {
-        'companies': companies,
+        'companies': reference.companies.get(),
         'preselected_company': company_id,
     }
     return render(request, 'dashboard/contact_form.html', context)
@@ -463,10 +564,9 @@ def contact_update(request, pk):
         contact.save()
         return redirect('contact_detail', pk=contact.pk)
     
-    companies = Company.objects.all().order_by('name')
     context = {
         'contact': contact,
-        'companies': companies,
+        'companies': reference.companies.get(),
         'is_update': True,
     }
     return render(request, 'dashboard/contact_form.html', context)
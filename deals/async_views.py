@@ -0,0 +1,40 @@
+"""
+Async read endpoints for deals, served under ``/api/async/deals/``.
+"""
+from django.db.models import Count, Sum
+from django.http import JsonResponse
+
+from crm_project.async_api import list_response, not_found
+from .models import Deal
+from .serializers import DealSerializer
+from .views import DealViewSet
+
+
+async def deal_list(request):
+    """Paginated deal list with ``?status=`` and search; the page and count run concurrently."""
+    return await list_response(request, DealViewSet, select_related=['company'])
+
+
+async def deal_detail(request, pk):
+    """One deal with its company and contact names."""
+    deal = await Deal.objects.select_related('company', 'contact').filter(pk=pk).afirst()
+    if deal is None:
+        return not_found(Deal)
+    return JsonResponse(DealSerializer(deal).data)
+
+
+def pipeline_totals():
+    """Deal count and total value per status, in ``STATUS_CHOICES`` order."""
+    rows = {
+        row['status']: row
+        for row in Deal.objects.order_by().values('status').annotate(count=Count('id'), value=Sum('value'))
+    }
+    return [
+        {
+            'status': status,
+            'label': label,
+            'count': rows.get(status, {}).get('count', 0),
+            'value': str(rows.get(status, {}).get('value') or 0),
+        }
+        for status, label in Deal.STATUS_CHOICES
+    ]
@@ -0,0 +1,12 @@
+import django_filters
+from .models import Deal
+
+
+class DealFilter(django_filters.FilterSet):
+    """``?status=`` and ``?since=`` (created on or after a date or datetime)."""
+    status = django_filters.CharFilter()
+    since = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+
+    class Meta:
+        model = Deal
+        fields = ['status', 'since']
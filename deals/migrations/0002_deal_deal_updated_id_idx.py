@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_company_company_updated_id_idx'),
+        ('contacts', '0003_contact_contact_updated_id_idx'),
+        ('deals', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='deal',
+            index=models.Index(fields=['updated_at', 'id'], name='deal_updated_id_idx'),
+        ),
+    ]
@@ -38,6 +38,19 @@ class Deal(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Deal'
         verbose_name_plural = 'Deals'
+        indexes = [
+            # Change feed keyset order
+            models.Index(fields=['updated_at', 'id'], name='deal_updated_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.company.name if self.company else 'No Company'}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets dashboard.live tell whether a save changed the status
+        # without reading it again
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        return instance
@@ -1,13 +1,19 @@
 from rest_framework import serializers
+from crm_project.bulk import PrefetchedPrimaryKeyRelatedField
+from crm_project.expand import ExpandableSerializerMixin
+from monitoring.tracing import TracedSerializerMixin
 from .models import Deal
 
 
-class DealSerializer(serializers.ModelSerializer):
+class DealSerializer(TracedSerializerMixin, ExpandableSerializerMixin, serializers.ModelSerializer):
     """Serializer for Deal model."""
     
     company_name = serializers.CharField(source='company.name', read_only=True)
     contact_name = serializers.CharField(source='contact.full_name', read_only=True)
     
+    # Looks ids up in one query per batch in bulk writes
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+    
     class Meta:
         model = Deal
         fields = [
@@ -18,7 +24,7 @@ class DealSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
-class DealListSerializer(serializers.ModelSerializer):
+class DealListSerializer(TracedSerializerMixin, ExpandableSerializerMixin, serializers.ModelSerializer):
     """Simplified serializer for listing deals."""
     
     company_name = serializers.CharField(source='company.name', read_only=True)
@@ -1,3 +1,106 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from companies.models import Company
+from contacts.models import Contact
+from sync.models import Tombstone
+
+from .models import Deal
+
+
+class DealBulkTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Kauri Labs')
+        self.contact = Contact.objects.create(
+            first_name='Aroha', last_name='Ngata', email='aroha@example.com', company=self.company,
+        )
+
+    def deal(self, **fields):
+        return {'title': 'Cloud Migration', 'value': '1200.00', 'company': self.company.pk, **fields}
+
+    def create(self, items):
+        return self.client.post('/api/deals/', items, content_type='application/json')
+
+    def bulk(self, method, items):
+        return getattr(self.client, method)('/api/deals/bulk/', items, content_type='application/json')
+
+    def test_create_many(self):
+        response = self.create([self.deal(), self.deal(contact=self.contact.pk, status='qualified')])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row['status'] for row in response.json()], ['lead', 'qualified'])
+        self.assertEqual(Deal.objects.count(), 2)
+
+    def test_related_rows_are_loaded_once_per_batch(self):
+        def count_queries(n):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.create([self.deal(contact=self.contact.pk)] * n).status_code, 201)
+            return len(queries)
+
+        self.assertEqual(count_queries(2), count_queries(20))
+
+    def test_invalid_item_fails_the_whole_batch(self):
+        response = self.create([self.deal(), self.deal(company=999999), self.deal(value='lots')])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('company', errors[1])
+        self.assertIn('value', errors[2])
+        self.assertFalse(Deal.objects.exists())
+
+    def test_rejects_empty_and_oversized_batches(self):
+        self.assertEqual(self.bulk('patch', []).status_code, 400)
+        with override_settings(API_BULK_MAX_ITEMS=2):
+            self.assertEqual(self.create([self.deal()] * 3).status_code, 400)
+        self.assertFalse(Deal.objects.exists())
+
+    def test_update_many(self):
+        deals = [Deal.objects.create(title=f'Deal {n}', value=100, company=self.company) for n in range(2)]
+        before = deals[0].updated_at
+        response = self.bulk('patch', [
+            {'id': deals[0].pk, 'status': 'closed_won'},
+            {'id': deals[1].pk, 'contact': self.contact.pk},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        deals[0].refresh_from_db()
+        deals[1].refresh_from_db()
+        self.assertEqual(deals[0].status, 'closed_won')
+        self.assertEqual(deals[1].contact, self.contact)
+        self.assertEqual(deals[1].status, 'lead')
+        # bulk_update() skips auto_now; the change feed needs it bumped
+        self.assertGreater(deals[0].updated_at, before)
+
+    def test_update_rejects_unknown_and_repeated_ids(self):
+        deal = Deal.objects.create(title='Deal', value=100, company=self.company)
+        response = self.bulk('patch', [
+            {'id': deal.pk, 'status': 'closed_won'},
+            {'id': 999999, 'status': 'closed_won'},
+            {'id': deal.pk, 'status': 'closed_lost'},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('id', errors[1])
+        self.assertIn('id', errors[2])
+        deal.refresh_from_db()
+        self.assertEqual(deal.status, 'lead')
+
+    def test_delete_many(self):
+        deals = [Deal.objects.create(title=f'Deal {n}', value=100, company=self.company) for n in range(3)]
+        response = self.bulk('delete', [deals[0].pk, deals[1].pk])
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(list(Deal.objects.values_list('pk', flat=True)), [deals[2].pk])
+        self.assertEqual(
+            set(Tombstone.objects.values_list('object_id', flat=True)), {deals[0].pk, deals[1].pk},
+        )
+
+    def test_delete_with_unknown_id_deletes_nothing(self):
+        deal = Deal.objects.create(title='Deal', value=100, company=self.company)
+        response = self.bulk('delete', [deal.pk, 999999])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [{}, {'id': ['Not found.']}])
+        self.assertTrue(Deal.objects.filter(pk=deal.pk).exists())
@@ -1,28 +1,38 @@
 from rest_framework import viewsets, filters
+from django_filters.rest_framework import DjangoFilterBackend
+from crm_project.bulk import BulkMixin
+from crm_project.expand import Expansion, ExpandMixin
+from sync.feed import ChangeFeedMixin
+from .filters import DealFilter
 from .models import Deal
 from .serializers import DealSerializer, DealListSerializer
 
 
-class DealViewSet(viewsets.ModelViewSet):
+class DealViewSet(BulkMixin, ChangeFeedMixin, ExpandMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing deals.
     
     Provides CRUD operations for deals with filtering by status.
+    ``?expand=company,contact`` embeds related objects.
     """
-    queryset = Deal.objects.all()
+    queryset = Deal.objects.select_related('company', 'contact')
     serializer_class = DealSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
+    filterset_class = DealFilter
     search_fields = ['title', 'description', 'company__name']
     ordering_fields = ['value', 'expected_close_date', 'created_at']
+    expansions = {
+        'company': Expansion(
+            'companies.serializers.CompanyListSerializer',
+            select_related=['company__primary_contact'],
+        ),
+        'contact': Expansion(
+            'contacts.serializers.ContactListSerializer',
+            select_related=['contact__company'],
+        ),
+    }
     
     def get_serializer_class(self):
         if self.action == 'list':
             return DealListSerializer
         return DealSerializer
-    
-    def get_queryset(self):
-        queryset = Deal.objects.all()
-        status = self.request.query_params.get('status', None)
-        if status:
-            queryset = queryset.filter(status=status)
-        return queryset
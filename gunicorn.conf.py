@@ -0,0 +1,30 @@
+"""
+Gunicorn hooks, loaded automatically from the working directory.
+
+Server options stay on the command line (Procfile, Dockerfile); this file
+only keeps the shared Prometheus metrics directory consistent across
+worker restarts and starts the sampling profiler in each worker.
+"""
+import os
+import shutil
+
+
+def on_starting(server):
+    """Start every server with an empty metrics directory."""
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def post_worker_init(worker):
+    """Start the worker's sampling profiler when SAMPLING_ENABLED is set."""
+    from monitoring.sampler import start_sampler
+    start_sampler()
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges from the aggregated metrics."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
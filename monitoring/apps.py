@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        if settings.METRICS_ENABLED:
+            from django.core.signals import request_finished
+            from .metrics import record_pool_stats
+            request_finished.connect(record_pool_stats, dispatch_uid='monitoring.record_pool_stats')
@@ -0,0 +1,158 @@
+"""
+Opt-in tracemalloc instrumentation for memory-hungry endpoints.
+
+With ``MEMORY_PROFILING_ENABLED`` on, requests whose URL name matches
+``MEMORY_PROFILING_ROUTES`` (CSV upload and export, ``by_milestone`` and the
+list views by default) run with tracemalloc started. When the response is
+ready the peak traced memory and the largest allocation sites still alive are
+logged to ``monitoring.memory`` and the peak is recorded in the
+``crm_request_peak_memory_bytes`` metric.
+
+``MEMORY_BUDGET_MB`` adds a guard: ``check_memory_budget()`` runs before every
+SQL statement and in the CSV row loops, and raises ``MemoryBudgetExceeded``
+once the request has allocated more than the budget. The middleware turns that
+into a 503 response instead of letting the worker grow until it is OOM-killed.
+
+tracemalloc is process-wide, so only one request per worker is traced at a
+time; with threaded workers, allocations made by other threads during that
+request are counted too. Tracing slows allocation-heavy code down noticeably,
+which is why it is off by default.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import tracemalloc
+from datetime import datetime, timezone
+from fnmatch import fnmatch
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, JsonResponse
+from django.urls import Resolver404, resolve
+
+from .metrics import record_memory
+from .queries import PROJECT_DIR, wrap_all_connections
+
+
+logger = logging.getLogger('monitoring.memory')
+
+_budget = contextvars.ContextVar('monitoring_memory_budget', default=None)
+_trace_lock = threading.Lock()
+
+
+class MemoryBudgetExceeded(BaseException):
+    """
+    Raised when a traced request allocates more than ``MEMORY_BUDGET_MB``.
+
+    Derives from BaseException so the broad ``except Exception`` blocks in the
+    CSV upload views don't record it as a per-row error and carry on.
+    """
+
+    def __init__(self, traced_bytes, budget_bytes):
+        self.traced_bytes = traced_bytes
+        self.budget_bytes = budget_bytes
+        super().__init__(
+            f'Request aborted: it used more than the {budget_bytes // (1024 * 1024)} MB memory budget'
+        )
+
+
+def check_memory_budget():
+    """Raise ``MemoryBudgetExceeded`` if the current request is over its budget."""
+    budget = _budget.get()
+    if budget is not None:
+        current, _ = tracemalloc.get_traced_memory()
+        if current > budget:
+            raise MemoryBudgetExceeded(current, budget)
+
+
+def budget_wrapper(execute, sql, params, many, context):
+    """``execute_wrapper`` checking the budget before each statement."""
+    check_memory_budget()
+    return execute(sql, params, many, context)
+
+
+def top_allocations(snapshot, limit):
+    """Largest allocation sites in ``snapshot`` as dicts, project paths made relative."""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        # The sampler thread and this module's own bookkeeping
+        tracemalloc.Filter(False, os.path.join(PROJECT_DIR, 'monitoring', '*')),
+    ))
+    sites = []
+    for stat in snapshot.statistics('lineno')[:limit]:
+        frame = stat.traceback[0]
+        filename = frame.filename
+        if filename.startswith(PROJECT_DIR) and 'site-packages' not in filename:
+            filename = filename[len(PROJECT_DIR) + 1:]
+        sites.append({
+            'site': f'{filename}:{frame.lineno}',
+            'size_kib': round(stat.size / 1024, 1),
+            'count': stat.count,
+        })
+    return sites
+
+
+class MemoryProfilingMiddleware:
+    """Trace allocations of matching requests and enforce the memory budget."""
+
+    def __init__(self, get_response):
+        if not settings.MEMORY_PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.routes = settings.MEMORY_PROFILING_ROUTES
+        self.budget_bytes = settings.MEMORY_BUDGET_MB * 1024 * 1024 or None
+
+    def route_name(self, request):
+        try:
+            return resolve(request.path_info).view_name
+        except Resolver404:
+            return None
+
+    def __call__(self, request):
+        route = self.route_name(request)
+        if route is None or not any(fnmatch(route, pattern) for pattern in self.routes):
+            return self.get_response(request)
+        # tracemalloc is global to the process; don't nest traced requests
+        if tracemalloc.is_tracing() or not _trace_lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        tracemalloc.start(settings.MEMORY_PROFILING_FRAMES)
+        token = _budget.set(self.budget_bytes)
+        exceeded = None
+        try:
+            with wrap_all_connections(budget_wrapper):
+                response = self.get_response(request)
+        except MemoryBudgetExceeded as e:
+            exceeded = e
+            response = self.budget_response(request, e)
+        finally:
+            _budget.reset(token)
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            _trace_lock.release()
+
+        record_memory(route, peak, exceeded=exceeded is not None)
+        logger.info(json.dumps({
+            'ts': datetime.now(timezone.utc).isoformat(),
+            'route': route,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'peak_kib': round(peak / 1024, 1),
+            'budget_exceeded': exceeded is not None,
+            'top': top_allocations(snapshot, settings.MEMORY_PROFILING_TOP_SITES),
+        }))
+        response['X-CRM-Peak-Memory-KiB'] = str(round(peak / 1024))
+        return response
+
+    def budget_response(self, request, error):
+        """503 with the reason, as JSON for API and AJAX callers and text otherwise."""
+        message = str(error)
+        is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        if request.path.startswith('/api/') or is_ajax:
+            return JsonResponse({'success': False, 'error': message}, status=503)
+        return HttpResponse(message, content_type='text/plain', status=503)
@@ -0,0 +1,238 @@
+"""
+Prometheus metrics for requests, SQL, connection pools, caches and imports.
+
+Metrics are recorded by ``MetricsMiddleware`` and the ``record_*`` helpers
+and served in Prometheus text format at ``/metrics``. Under gunicorn set
+``PROMETHEUS_MULTIPROC_DIR`` to a directory shared by all workers (see
+``gunicorn.conf.py``) so a scrape of any worker returns totals for all of
+them.
+"""
+import hmac
+import os
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    generate_latest, multiprocess,
+)
+
+from .queries import wrap_all_connections
+
+
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    # Each process writes its values there from the first metric below on
+    os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+MEMORY_BUCKETS = tuple(mib * 1024 * 1024 for mib in (1, 4, 16, 32, 64, 128, 256, 512, 1024))
+
+REQUESTS = Counter(
+    'crm_http_requests_total',
+    'HTTP requests by route, method and status code.',
+    ['route', 'method', 'status'],
+)
+REQUEST_LATENCY = Histogram(
+    'crm_http_request_duration_seconds',
+    'Time spent handling a request, including middleware.',
+    ['route', 'method'],
+)
+RESPONSE_SIZE = Histogram(
+    'crm_http_response_size_bytes',
+    'Size of non-streaming response bodies.',
+    ['route'],
+    buckets=SIZE_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'crm_db_queries_per_request',
+    'SQL statements issued while handling one request.',
+    ['route'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_QUERY_SECONDS = Counter(
+    'crm_db_query_seconds_total',
+    'Total time spent executing SQL, by route.',
+    ['route'],
+)
+CACHE_OPERATIONS = Counter(
+    'crm_cache_operations_total',
+    'Cache lookups by cache name and result (hit or miss).',
+    ['cache', 'result'],
+)
+IMPORT_ROWS = Counter(
+    'crm_import_rows_total',
+    'Rows processed by CSV uploads and seed imports, by source and outcome.',
+    ['source', 'outcome'],
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'crm_db_pool_connections',
+    'Pooled database connections by state (in_use or idle), summed over live workers.',
+    ['alias', 'state'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_MAX_SIZE = Gauge(
+    'crm_db_pool_max_size',
+    'Configured maximum pool size, summed over live workers.',
+    ['alias'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_WAITING = Gauge(
+    'crm_db_pool_waiting_requests',
+    'Threads waiting for a pooled connection.',
+    ['alias'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_CHECKOUTS = Counter(
+    'crm_db_pool_checkouts_total',
+    'Connections handed out by the pool.',
+    ['alias'],
+)
+DB_POOL_CHECKOUT_WAIT = Counter(
+    'crm_db_pool_checkout_wait_seconds_total',
+    'Time spent waiting for a pooled connection; divide by checkouts for the mean.',
+    ['alias'],
+)
+DB_POOL_CHECKOUT_ERRORS = Counter(
+    'crm_db_pool_checkout_errors_total',
+    'Checkouts that failed, usually by timing out with the pool exhausted.',
+    ['alias'],
+)
+DB_POOL_CONNECTIONS_LOST = Counter(
+    'crm_db_pool_connections_lost_total',
+    'Pooled connections discarded because the health check on checkout failed.',
+    ['alias'],
+)
+REQUEST_PEAK_MEMORY = Histogram(
+    'crm_request_peak_memory_bytes',
+    'Peak memory traced by tracemalloc during a request (memory profiling mode only).',
+    ['route'],
+    buckets=MEMORY_BUCKETS,
+)
+MEMORY_BUDGET_EXCEEDED = Counter(
+    'crm_memory_budget_exceeded_total',
+    'Requests aborted for exceeding MEMORY_BUDGET_MB.',
+    ['route'],
+)
+
+
+def record_cache(cache, hit):
+    """Count one lookup in the named cache."""
+    CACHE_OPERATIONS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+
+def record_import(source, created=0, updated=0, errors=0):
+    """Count the rows an import job created, updated or rejected."""
+    for outcome, count in (('created', created), ('updated', updated), ('error', errors)):
+        if count:
+            IMPORT_ROWS.labels(source=source, outcome=outcome).inc(count)
+
+
+def record_memory(route, peak_bytes, exceeded=False):
+    """Record a traced request's peak memory and whether it hit the budget."""
+    REQUEST_PEAK_MEMORY.labels(route=route).observe(peak_bytes)
+    if exceeded:
+        MEMORY_BUDGET_EXCEEDED.labels(route=route).inc()
+
+
+def record_pool_stats(**kwargs):
+    """
+    Copy this worker's connection pool statistics into the pool metrics.
+
+    Connected to ``request_finished`` after Django's own handler, so the
+    request's connection has already gone back to the pool. ``pop_stats()``
+    resets the pool's counters, so each call adds only what happened since
+    the previous one.
+    """
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        stats = pool.pop_stats()
+        size = stats.get('pool_size', 0)
+        available = stats.get('pool_available', 0)
+        DB_POOL_CONNECTIONS.labels(alias=alias, state='in_use').set(size - available)
+        DB_POOL_CONNECTIONS.labels(alias=alias, state='idle').set(available)
+        DB_POOL_MAX_SIZE.labels(alias=alias).set(stats.get('pool_max', 0))
+        DB_POOL_WAITING.labels(alias=alias).set(stats.get('requests_waiting', 0))
+        DB_POOL_CHECKOUTS.labels(alias=alias).inc(stats.get('requests_num', 0))
+        DB_POOL_CHECKOUT_WAIT.labels(alias=alias).inc(stats.get('requests_wait_ms', 0) / 1000)
+        DB_POOL_CHECKOUT_ERRORS.labels(alias=alias).inc(stats.get('requests_errors', 0))
+        DB_POOL_CONNECTIONS_LOST.labels(alias=alias).inc(stats.get('connections_lost', 0))
+
+
+def route_label(request):
+    """URL name of the matched route, so label values stay bounded."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+class QueryTimer:
+    """Minimal ``execute_wrapper`` that only counts statements and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Record latency, status, response size and SQL totals for every request."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with wrap_all_connections(timer):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        route = route_label(request)
+        REQUESTS.labels(route=route, method=request.method, status=response.status_code).inc()
+        REQUEST_LATENCY.labels(route=route, method=request.method).observe(elapsed)
+        DB_QUERIES.labels(route=route).observe(timer.count)
+        if timer.seconds:
+            DB_QUERY_SECONDS.labels(route=route).inc(timer.seconds)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(route=route).observe(len(response.content))
+        return response
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Expose all metrics in Prometheus text format.
+
+    Scrapes must send ``METRICS_TOKEN`` as a bearer token. Without one the
+    endpoint is only open when DEBUG is on.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'.encode()
+        if not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', '').encode(), expected):
+            return HttpResponseForbidden('Invalid metrics token')
+    elif not settings.DEBUG:
+        return HttpResponseForbidden('Set METRICS_TOKEN to enable /metrics')
+
+    if settings.PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
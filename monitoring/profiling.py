@@ -0,0 +1,170 @@
+"""
+Per-request profiling.
+
+A staff user copies a signed token from the profiles page and sends it in
+the ``X-CRM-Profile`` header (or a ``_profile`` query parameter). Matching
+requests run under cProfile with every SQL statement recorded, and the
+result is written to ``PROFILING_DIR`` as one directory per request:
+
+    profile.pstats   cProfile data, loadable with pstats or snakeviz
+    profile.txt      top functions by cumulative time
+    queries.json     every statement with timing and the project stack
+    explain.txt      plans for the slowest SELECT statements
+    summary.json     request, timing and query totals
+"""
+import cProfile
+import io
+import json
+import pstats
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+from .queries import QueryRecorder, explain, wrap_all_connections
+
+
+PROFILE_HEADER = 'HTTP_X_CRM_PROFILE'
+PROFILE_PARAM = '_profile'
+PROFILE_TOKEN_SALT = 'monitoring.profile'
+# Ids never start with a dot, so '.' and '..' can't name a profile
+PROFILE_ID_RE = re.compile(r'^\w[\w.-]*$')
+
+
+def profiling_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def make_profile_token(user):
+    """Signed, expiring token that lets ``user`` profile their own requests."""
+    return signing.dumps(user.pk, salt=PROFILE_TOKEN_SALT)
+
+
+def staff_user_for_token(token):
+    """Return the staff user a valid token was issued to, or None."""
+    try:
+        user_pk = signing.loads(
+            token, salt=PROFILE_TOKEN_SALT, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+    return get_user_model().objects.filter(pk=user_pk, is_staff=True, is_active=True).first()
+
+
+def profile_path(profile_id):
+    """Resolve a profile id to its directory, rejecting anything outside PROFILING_DIR."""
+    if not PROFILE_ID_RE.fullmatch(profile_id):
+        return None
+    root = profiling_dir().resolve()
+    path = (root / profile_id).resolve()
+    if path.parent != root or not path.is_dir():
+        return None
+    return path
+
+
+def list_profiles(limit=200):
+    """Summaries of the most recent profiles, newest first."""
+    root = profiling_dir()
+    if not root.is_dir():
+        return []
+    summaries = []
+    for path in sorted(root.iterdir(), reverse=True)[:limit]:
+        summary_file = path / 'summary.json'
+        if summary_file.is_file():
+            summaries.append(json.loads(summary_file.read_text()))
+    return summaries
+
+
+class ProfilingMiddleware:
+    """
+    Run requests carrying a valid profiling token under cProfile.
+
+    Requests without the header or query flag only pay for one dict lookup
+    and a substring check on the query string.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = request.META.get(PROFILE_HEADER)
+        if token is None and PROFILE_PARAM in request.META.get('QUERY_STRING', ''):
+            token = request.GET.get(PROFILE_PARAM)
+        if not token:
+            return self.get_response(request)
+
+        user = staff_user_for_token(token)
+        if user is None:
+            return self.get_response(request)
+        return self.profile(request, user)
+
+    def profile(self, request, user):
+        recorder = QueryRecorder()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with wrap_all_connections(recorder):
+            response = profiler.runcall(self.get_response, request)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        profile_id = self.write_artifact(request, response, user, profiler, recorder, elapsed_ms)
+        response['X-CRM-Profile-Id'] = profile_id
+        return response
+
+    def write_artifact(self, request, response, user, profiler, recorder, elapsed_ms):
+        now = datetime.now(timezone.utc)
+        slug = re.sub(r'[^\w]+', '-', request.path).strip('-')[:60] or 'root'
+        profile_id = f'{now:%Y%m%d-%H%M%S}-{request.method}-{slug}-{uuid.uuid4().hex[:8]}'
+        path = profiling_dir() / profile_id
+        path.mkdir(parents=True, exist_ok=True)
+
+        profiler.dump_stats(path / 'profile.pstats')
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(60)
+        (path / 'profile.txt').write_text(text.getvalue())
+
+        queries = [
+            {
+                'alias': query['alias'],
+                'sql': query['sql'],
+                'params': repr(query['params']),
+                'many': query['many'],
+                'duration_ms': round(query['duration_ms'], 3),
+                'stack': query['stack'],
+            }
+            for query in recorder.queries
+        ]
+        (path / 'queries.json').write_text(json.dumps(queries, indent=2))
+
+        slowest = sorted(
+            (query for query in recorder.queries if not query['many']),
+            key=lambda query: query['duration_ms'],
+            reverse=True,
+        )[:settings.PROFILING_EXPLAIN_SLOWEST]
+        plans = []
+        for query in slowest:
+            plan = explain(query['alias'], query['sql'], query['params'])
+            if plan is not None:
+                plans.append(f'-- {query["duration_ms"]:.2f} ms\n{query["sql"]}\n\n{plan}\n')
+        (path / 'explain.txt').write_text('\n'.join(plans))
+
+        summary = {
+            'id': profile_id,
+            'created_at': now.isoformat(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'user': user.get_username(),
+            'elapsed_ms': round(elapsed_ms, 2),
+            'queries': len(recorder.queries),
+            'query_ms': round(recorder.total_ms, 2),
+        }
+        (path / 'summary.json').write_text(json.dumps(summary, indent=2))
+        return profile_id
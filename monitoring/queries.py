@@ -0,0 +1,105 @@
+"""
+Helpers for observing the SQL the ORM sends, built on ``execute_wrapper``.
+"""
+import time
+import traceback
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+PROJECT_DIR = str(settings.BASE_DIR)
+
+
+def project_stack(limit=8):
+    """
+    Return the innermost ``limit`` stack frames that belong to this project.
+
+    Frames from Django, DRF and the monitoring app itself are skipped so the
+    result points at the view or serializer that triggered the query.
+    """
+    frames = []
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if not filename.startswith(PROJECT_DIR) or 'site-packages' in filename:
+            continue
+        if '/monitoring/' in filename:
+            continue
+        frames.append(f'{filename[len(PROJECT_DIR) + 1:]}:{frame.lineno} in {frame.name}')
+        if len(frames) >= limit:
+            break
+    return frames
+
+
+def view_label(request):
+    """
+    Dotted name of the code that handled ``request``.
+
+    DRF viewsets include the action, e.g. ``companies.views.CompanyViewSet.by_milestone``;
+    function views give their module path, e.g. ``dashboard.views.company_list``.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    func = match.func
+    view_class = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if view_class is None:
+        return match._func_path
+    label = f'{view_class.__module__}.{view_class.__qualname__}'
+    actions = getattr(func, 'actions', None)
+    if actions:
+        action = actions.get(request.method.lower())
+        if action:
+            label = f'{label}.{action}'
+    return label
+
+
+class QueryRecorder:
+    """``execute_wrapper`` callable that keeps every statement with its timing."""
+
+    def __init__(self, capture_stacks=True):
+        self.capture_stacks = capture_stacks
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'params': params,
+                'many': many,
+                'duration_ms': (time.perf_counter() - started) * 1000,
+                'stack': project_stack() if self.capture_stacks else [],
+            })
+
+    @property
+    def total_ms(self):
+        return sum(query['duration_ms'] for query in self.queries)
+
+
+@contextmanager
+def wrap_all_connections(wrapper):
+    """Install ``wrapper`` with ``execute_wrapper`` on every configured database."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield wrapper
+
+
+def explain(alias, sql, params):
+    """Return the database's plan for a SELECT as text, or None if it can't be explained."""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    connection = connections[alias]
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            rows = cursor.fetchall()
+    except Exception as e:
+        return f'EXPLAIN failed: {e}'
+    return '\n'.join(' '.join(str(column) for column in row) for row in rows)
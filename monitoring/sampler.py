@@ -0,0 +1,234 @@
+"""
+Statistical profiler for request threads (``SAMPLING_ENABLED``).
+
+Each gunicorn worker runs one daemon thread, started from the
+``post_worker_init`` hook in ``gunicorn.conf.py``, that wakes ``SAMPLING_HZ``
+times a second, looks at the stack of every thread currently inside a request
+and counts it under that request's route. Every ``SAMPLING_FLUSH_SECONDS`` the counts are
+appended to ``SAMPLING_DIR`` in collapsed-stack format, one line per stack:
+
+    companies-list;rest_framework.views:APIView.dispatch;...;django.db.models.query:QuerySet._fetch_all 12
+
+which ``flamegraph.pl``, speedscope and Perfetto read directly. Unlike
+cProfile nothing runs inside the request itself, so the cost is the sampler
+thread holding the GIL for a few microseconds per sample.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .metrics import route_label
+
+
+FILE_SUFFIX = '.collapsed'
+
+# Filled in when the sampler starts, once Django's template module is loaded
+TEMPLATE_RENDER_CODES = set()
+
+
+class StackSampler(threading.Thread):
+    """Background thread sampling the stacks of registered request threads."""
+
+    def __init__(self, interval, flush_seconds, directory, retention_seconds):
+        super().__init__(name='monitoring-sampler', daemon=True)
+        self.interval = interval
+        self.flush_seconds = flush_seconds
+        self.directory = Path(directory)
+        self.retention_seconds = retention_seconds
+        # thread id -> (request, code object of the middleware frame)
+        self.active = {}
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def run(self):
+        from django.template.base import Template
+        TEMPLATE_RENDER_CODES.add(Template.render.__code__)
+        next_flush = time.monotonic() + self.flush_seconds
+        while True:
+            time.sleep(self.interval)
+            self.sample()
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.flush_seconds
+
+    def sample(self):
+        frames = sys._current_frames()
+        for thread_id, (request, root_code) in list(self.active.items()):
+            frame = frames.get(thread_id)
+            if frame is None:
+                continue
+            stack = collapse(frame, root_code)
+            if stack:
+                with self.lock:
+                    self.counts[f'{route_label(request)};{stack}'] += 1
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if counts:
+            path = self.directory / f'{int(time.time())}-{os.getpid()}{FILE_SUFFIX}'
+            path.write_text(''.join(f'{stack} {count}\n' for stack, count in counts.items()))
+
+        cutoff = time.time() - self.retention_seconds
+        for path in sample_files():
+            if file_timestamp(path) < cutoff:
+                path.unlink(missing_ok=True)
+
+
+def frame_label(frame):
+    """``module:qualname``; template renders also get the template name."""
+    code = frame.f_code
+    label = f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}"
+    if code in TEMPLATE_RENDER_CODES:
+        template = frame.f_locals.get('self')
+        if template is not None and template.name:
+            label = f'{label} [{template.name}]'
+    return label
+
+
+def collapse(frame, root_code):
+    """
+    Render a stack outermost-first as ``a;b;c``, starting below ``root_code``.
+
+    Frames above the sampling middleware (gunicorn, WSGI handler, outer
+    middleware) are the same for every request and only add noise.
+    """
+    labels = []
+    while frame is not None and frame.f_code is not root_code:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ';'.join(labels)
+
+
+_sampler = None
+_sampler_pid = None
+_sampler_lock = threading.Lock()
+
+
+def start_sampler():
+    """
+    Start this process's sampler, if enabled and not already running.
+
+    Only server processes call this (gunicorn's ``post_worker_init``), so
+    management commands and the test runner never start the thread.
+    """
+    global _sampler, _sampler_pid
+    if not settings.SAMPLING_ENABLED:
+        return None
+    # Threads don't survive fork, so a worker forked from a preloaded
+    # master must start its own sampler.
+    with _sampler_lock:
+        if _sampler_pid != os.getpid():
+            _sampler = StackSampler(
+                interval=1 / settings.SAMPLING_HZ,
+                flush_seconds=settings.SAMPLING_FLUSH_SECONDS,
+                directory=settings.SAMPLING_DIR,
+                retention_seconds=settings.SAMPLING_RETENTION_MINUTES * 60,
+            )
+            _sampler.start()
+            _sampler_pid = os.getpid()
+    return _sampler
+
+
+def get_sampler():
+    """This process's running sampler, or None if it wasn't started here."""
+    return _sampler if _sampler_pid == os.getpid() else None
+
+
+class SamplingMiddleware:
+    """Register the current thread with the sampler while it handles a request."""
+
+    def __init__(self, get_response):
+        if not settings.SAMPLING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampler = get_sampler()
+        if sampler is None:
+            return self.get_response(request)
+        thread_id = threading.get_ident()
+        sampler.active[thread_id] = (request, MIDDLEWARE_CODE)
+        try:
+            return self.get_response(request)
+        finally:
+            sampler.active.pop(thread_id, None)
+
+
+# The frame that marks where a request's own stack begins
+MIDDLEWARE_CODE = SamplingMiddleware.__call__.__code__
+
+
+def sample_files():
+    directory = Path(settings.SAMPLING_DIR)
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob(f'*{FILE_SUFFIX}'))
+
+
+def file_timestamp(path):
+    try:
+        return int(path.name.split('-', 1)[0])
+    except ValueError:
+        return 0
+
+
+# Sample files never change once written, so each is parsed once per
+# process: path name -> Counter of its stacks
+_parsed_files = {}
+_parsed_lock = threading.Lock()
+
+
+def read_sample_file(path):
+    counts = _parsed_files.get(path.name)
+    if counts is None:
+        counts = Counter()
+        try:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    stack, _, count = line.rstrip('\n').rpartition(' ')
+                    if count.isdigit():
+                        counts[stack] += int(count)
+        except FileNotFoundError:
+            # Deleted by a worker's retention sweep since the listing
+            return counts
+        with _parsed_lock:
+            _parsed_files[path.name] = counts
+    return counts
+
+
+def recent_stacks(minutes, route=None):
+    """
+    Merge the samples flushed by all workers in the last ``minutes``.
+
+    Returns a Counter of collapsed stack -> sample count; with ``route``,
+    only that route's stacks are kept. At most ``SAMPLING_MAX_FILES`` of the
+    newest files are read.
+    """
+    cutoff = time.time() - minutes * 60
+    prefix = f'{route};' if route else ''
+    files = sample_files()
+    with _parsed_lock:
+        # Forget files removed by the retention sweep
+        existing = {path.name for path in files}
+        for name in [name for name in _parsed_files if name not in existing]:
+            del _parsed_files[name]
+
+    # Names start with the flush time, so the newest sort last
+    paths = [path for path in files if file_timestamp(path) >= cutoff]
+    paths = paths[-settings.SAMPLING_MAX_FILES:]
+
+    counts = Counter()
+    for path in paths:
+        for stack, count in read_sample_file(path).items():
+            if stack.startswith(prefix):
+                counts[stack] += count
+    return counts
@@ -0,0 +1,160 @@
+"""
+Slow-query log grouped by normalized query fingerprint and view.
+
+``SlowQueryMiddleware`` fingerprints every statement a request runs (literals
+and placeholders replaced, ``IN`` lists collapsed) and, at the end of the
+request, logs each fingerprint whose slowest execution or total time in that
+request exceeds ``SLOW_QUERY_THRESHOLD_MS``. Counting the total catches N+1
+patterns: hundreds of 1 ms lookups from one serializer add up to one slow
+entry. Entries are JSON lines in a rotating file that the staff report page
+aggregates across all workers.
+"""
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .queries import view_label, wrap_all_connections
+
+
+logger = logging.getLogger('monitoring.slow_queries')
+
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+PLACEHOLDER_RE = re.compile(r'%s|\?|%\(\w+\)s')
+IN_LIST_RE = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+VALUES_RE = re.compile(r'\bVALUES\s*\([^)]*\)(?:\s*,\s*\([^)]*\))*', re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """Normalize ``sql`` so statements that differ only in values compare equal."""
+    sql = COMMENT_RE.sub('', sql)
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = PLACEHOLDER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    sql = VALUES_RE.sub('VALUES (...)', sql)
+    return WHITESPACE_RE.sub(' ', sql).strip()
+
+
+class FingerprintTally:
+    """``execute_wrapper`` that groups a request's statements by fingerprint."""
+
+    def __init__(self):
+        # fingerprint -> [count, total_ms, max_ms, sample sql]
+        self.stats = defaultdict(lambda: [0, 0.0, 0.0, ''])
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            entry = self.stats[fingerprint(sql)]
+            entry[0] += 1
+            entry[1] += duration_ms
+            if duration_ms > entry[2]:
+                entry[2] = duration_ms
+                entry[3] = sql
+
+
+class SlowQueryMiddleware:
+    """Log fingerprints that were slow in a request, tagged with the view."""
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
+        # The log handler opens the file on the first slow query
+        Path(settings.SLOW_QUERY_LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self, request):
+        tally = FingerprintTally()
+        with wrap_all_connections(tally):
+            response = self.get_response(request)
+
+        slow = [
+            (sql_fingerprint, entry) for sql_fingerprint, entry in tally.stats.items()
+            if entry[2] >= self.threshold_ms or entry[1] >= self.threshold_ms
+        ]
+        if slow:
+            view = view_label(request)
+            timestamp = datetime.now(timezone.utc).isoformat()
+            for sql_fingerprint, (count, total_ms, max_ms, sample) in slow:
+                logger.info(json.dumps({
+                    'ts': timestamp,
+                    'view': view,
+                    'method': request.method,
+                    'fingerprint': sql_fingerprint,
+                    'count': count,
+                    'total_ms': round(total_ms, 3),
+                    'max_ms': round(max_ms, 3),
+                    'sample': sample,
+                }))
+        return response
+
+
+def log_files():
+    """The active log file followed by its rotated backups."""
+    path = Path(settings.SLOW_QUERY_LOG_FILE)
+    files = [path] + [
+        path.with_name(f'{path.name}.{index}')
+        for index in range(1, settings.SLOW_QUERY_LOG_BACKUPS + 1)
+    ]
+    return [file for file in files if file.is_file()]
+
+
+def top_offenders(view=None, limit=100):
+    """
+    Aggregate the log by (fingerprint, view), ordered by total time.
+
+    Each row has the number of requests it appeared in, total executions,
+    total and max time, and the SQL of its slowest execution.
+    """
+    groups = {}
+    for path in log_files():
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if view and entry['view'] != view:
+                    continue
+                key = (entry['fingerprint'], entry['view'])
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = {
+                        'fingerprint': entry['fingerprint'],
+                        'view': entry['view'],
+                        'requests': 0,
+                        'count': 0,
+                        'total_ms': 0.0,
+                        'max_ms': 0.0,
+                        'sample': entry['sample'],
+                        'last_seen': entry['ts'],
+                    }
+                group['requests'] += 1
+                group['count'] += entry['count']
+                group['total_ms'] += entry['total_ms']
+                if entry['max_ms'] > group['max_ms']:
+                    group['max_ms'] = entry['max_ms']
+                    group['sample'] = entry['sample']
+                group['last_seen'] = max(group['last_seen'], entry['ts'])
+
+    rows = sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)
+    for row in rows:
+        row['avg_ms'] = row['total_ms'] / row['count'] if row['count'] else 0
+        row['per_request'] = row['count'] / row['requests'] if row['requests'] else 0
+    return rows[:limit]
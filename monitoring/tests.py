@@ -0,0 +1,343 @@
+import json
+import logging.handlers
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from companies.models import Company
+
+from .memory import MemoryBudgetExceeded
+from .profiling import make_profile_token, profile_path
+from .slowlog import fingerprint, top_offenders
+from .sqlcomment import SqlCommenter
+
+
+def tagged_request(path='/api/companies/'):
+    request = RequestFactory().get(path)
+    request.resolver_match = resolve(path)
+    request.request_id = 'test-request'
+    return request
+
+
+class SqlCommenterTests(TestCase):
+    def run_with_commenter(self, sql, params):
+        seen = []
+
+        def capture(execute, sql, params, many, context):
+            seen.append(sql)
+            return execute(sql, params, many, context)
+
+        # Wrappers entered later run closer to the database
+        with connection.execute_wrapper(SqlCommenter(tagged_request())), connection.execute_wrapper(capture):
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                row = cursor.fetchone()
+        return row, seen[-1]
+
+    def test_parameterized_query_runs_with_comment(self):
+        row, sql = self.run_with_commenter('SELECT %s', [42])
+        self.assertEqual(row[0], 42)
+        # Escaped for the driver's %-formatting
+        self.assertIn("framework='django%%3A", sql)
+        self.assertIn("request_id='test-request'", sql)
+
+    def test_unparameterized_query_is_not_escaped(self):
+        row, sql = self.run_with_commenter('SELECT 1', None)
+        self.assertEqual(row[0], 1)
+        self.assertIn("framework='django%3A", sql)
+        self.assertNotIn('%%', sql)
+
+    def test_comment_survives_psycopg_placeholder_parsing(self):
+        try:
+            from psycopg._queries import PostgresQuery
+            from psycopg.adapt import Transformer
+        except ImportError:
+            self.skipTest('psycopg 3 is not installed')
+
+        seen = []
+        commenter = SqlCommenter(tagged_request())
+        commenter(lambda sql, *args: seen.append(sql), 'SELECT %s', [1], False, {})
+        query = PostgresQuery(Transformer())
+        query.convert(seen[0], [1])
+        self.assertIn(b"django%3A", query.query)
+
+
+class MetricsViewTests(TestCase):
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_denied_without_token_outside_debug(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_TOKEN='', DEBUG=True)
+    def test_open_without_token_in_debug(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='scrape-secret', DEBUG=False)
+    def test_token_required_when_set(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+
+
+class TracingTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.trace_dir = Path(directory.name)
+        Company.objects.create(name='Kauri Labs', industry='Technology')
+
+    def traced_get(self, path, sample_rate=1.0, **extra):
+        with override_settings(TRACING_SAMPLE_RATE=sample_rate, TRACING_DIR=str(self.trace_dir)):
+            # A new client loads the middleware with these settings
+            return Client().get(path, **extra)
+
+    def trace_events(self):
+        files = list(self.trace_dir.glob('*.json'))
+        self.assertEqual(len(files), 1)
+        return json.loads(files[0].read_text())['traceEvents']
+
+    def test_sampled_request_writes_chrome_trace(self):
+        response = self.traced_get('/api/companies/')
+        self.assertEqual(response.status_code, 200)
+
+        events = self.trace_events()
+        self.assertTrue(all(event['ph'] == 'X' and event['dur'] >= 0 for event in events))
+        by_category = {}
+        for event in events:
+            by_category.setdefault(event['cat'], []).append(event['name'])
+        self.assertEqual(by_category['request'], ['GET /api/companies/'])
+        self.assertEqual(by_category['view'], ['view companies.views.CompanyViewSet.list'])
+        self.assertIn('CompanyListSerializer[].data', by_category['serializer'])
+        self.assertIn('sql', by_category)
+        self.assertIn('middleware', by_category)
+        self.assertIn(response['X-CRM-Trace-Id'], list(self.trace_dir.glob('*.json'))[0].name)
+
+    def test_app_spans_are_recorded(self):
+        self.traced_get('/api/companies/export_csv/')
+        names = {event['name'] for event in self.trace_events() if event['cat'] == 'app'}
+        self.assertEqual(names, {'csv.write'})
+
+    def test_unsampled_request_writes_nothing(self):
+        with mock.patch('monitoring.tracing.random.random', return_value=0.99):
+            response = self.traced_get('/api/companies/', sample_rate=0.5)
+        self.assertNotIn('X-CRM-Trace-Id', response)
+        self.traced_get('/api/companies/', sample_rate=0)
+        self.assertEqual(list(self.trace_dir.iterdir()), [])
+
+    def test_sampled_traceparent_is_joined(self):
+        trace_id = '4bf92f3577b34da6a3ce929d0e0e4736'
+        with mock.patch('monitoring.tracing.random.random', return_value=0.99):
+            response = self.traced_get(
+                '/api/companies/', sample_rate=0.5,
+                HTTP_TRACEPARENT=f'00-{trace_id}-00f067aa0ba902b7-01',
+            )
+        self.assertEqual(response['X-CRM-Trace-Id'], trace_id)
+        self.assertTrue(self.trace_events())
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # Keep something worth reaching next to the profiles directory
+        self.profile_dir = Path(directory.name) / 'profiles'
+        self.profile_dir.mkdir()
+        (Path(directory.name) / 'explain.txt').write_text('outside')
+        settings = override_settings(PROFILING_ENABLED=True, PROFILING_DIR=str(self.profile_dir))
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.staff = get_user_model().objects.create_user('staff', password='staff-pass-1', is_staff=True)
+        Company.objects.create(name='Kauri Labs', industry='Technology')
+
+    def test_profiled_request_is_saved_listed_and_downloadable(self):
+        response = self.client.get('/api/companies/', HTTP_X_CRM_PROFILE=make_profile_token(self.staff))
+        self.assertEqual(response.status_code, 200)
+        profile_id = response['X-CRM-Profile-Id']
+        self.assertEqual(
+            {path.name for path in (self.profile_dir / profile_id).iterdir()},
+            {'profile.pstats', 'profile.txt', 'queries.json', 'explain.txt', 'summary.json'},
+        )
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('profile_list'))
+        self.assertContains(response, reverse('profile_detail', args=[profile_id]))
+        response = self.client.get(reverse('profile_detail', args=[profile_id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['summary']['path'], '/api/companies/')
+
+        response = self.client.get(reverse('profile_download', args=[profile_id, 'queries.json']))
+        self.assertEqual(response.status_code, 200)
+        queries = json.loads(b''.join(response.streaming_content))
+        self.assertTrue(any('companies_company' in query['sql'] for query in queries))
+
+    def test_token_from_non_staff_user_is_ignored(self):
+        user = get_user_model().objects.create_user('sales', password='sales-pass-1')
+        response = self.client.get('/api/companies/', HTTP_X_CRM_PROFILE=make_profile_token(user))
+        self.assertNotIn('X-CRM-Profile-Id', response)
+        self.assertEqual(list(self.profile_dir.iterdir()), [])
+
+    def test_ids_outside_profiling_dir_are_rejected(self):
+        for profile_id in ('.', '..', '.hidden', 'a/../..', '..\n'):
+            with self.subTest(profile_id=profile_id):
+                self.assertIsNone(profile_path(profile_id))
+
+        self.client.force_login(self.staff)
+        for profile_id in ('.', '..'):
+            with self.subTest(profile_id=profile_id):
+                response = self.client.get(reverse('profile_download', args=[profile_id, 'explain.txt']))
+                self.assertEqual(response.status_code, 404)
+
+
+@override_settings(MEMORY_PROFILING_ENABLED=True, MEMORY_BUDGET_MB=512)
+class MemoryBudgetTests(TestCase):
+    def upload(self, client, url, field):
+        rows = 'name,industry\nKauri Labs,Technology\nTasman Foods,Retail\nAoraki Tours,Travel\n'
+        with self.assertLogs('monitoring.memory') as logs:
+            response = client.post(url, {field: SimpleUploadedFile('companies.csv', rows.encode(), 'text/csv')})
+        self.logged = json.loads(logs.records[-1].getMessage())
+        return response
+
+    def over_budget_on_second_row(self, target):
+        return mock.patch(target, side_effect=[None, MemoryBudgetExceeded(600 << 20, 512 << 20)])
+
+    def test_api_upload_aborts_with_503(self):
+        with self.over_budget_on_second_row('companies.views.check_memory_budget'):
+            response = self.upload(Client(), '/api/companies/upload_csv/', 'file')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['success'], False)
+        self.assertIn('512 MB memory budget', response.json()['error'])
+        self.assertEqual(list(Company.objects.values_list('name', flat=True)), ['Kauri Labs'])
+        self.assertEqual((self.logged['status'], self.logged['budget_exceeded']), (503, True))
+
+    def test_dashboard_upload_aborts_with_503(self):
+        client = Client()
+        client.force_login(get_user_model().objects.create_user('sales', password='sales-pass-1'))
+        with self.over_budget_on_second_row('dashboard.views.check_memory_budget'):
+            response = self.upload(client, '/companies/upload-csv/', 'csv_file')
+        self.assertEqual(response.status_code, 503)
+        self.assertNotIn('errors', response.content.decode())
+        self.assertEqual(Company.objects.count(), 1)
+
+    @override_settings(MEMORY_BUDGET_MB=1)
+    def test_traced_memory_over_budget(self):
+        with mock.patch('monitoring.memory.tracemalloc.get_traced_memory', return_value=(2 << 20, 2 << 20)):
+            response = self.upload(Client(), '/api/companies/upload_csv/', 'file')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['X-CRM-Peak-Memory-KiB'], '2048')
+        self.assertFalse(Company.objects.exists())
+
+    def test_under_budget_upload_succeeds(self):
+        response = self.upload(Client(), '/api/companies/upload_csv/', 'file')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 3)
+        self.assertIn('X-CRM-Peak-Memory-KiB', response)
+
+
+class FingerprintTests(TestCase):
+    def assertSameFingerprint(self, *statements):
+        fingerprints = {fingerprint(sql) for sql in statements}
+        self.assertEqual(len(fingerprints), 1, fingerprints)
+        return fingerprints.pop()
+
+    def test_numbers_collapse(self):
+        result = self.assertSameFingerprint(
+            'SELECT * FROM "deals_deal" WHERE "value" > 10 AND "id" = 1',
+            'SELECT * FROM "deals_deal" WHERE "value" > -2.50 AND "id" = 4801',
+        )
+        self.assertEqual(result, 'SELECT * FROM "deals_deal" WHERE "value" > ? AND "id" = ?')
+
+    def test_identifiers_with_digits_are_kept(self):
+        self.assertEqual(
+            fingerprint('SELECT "t1"."col2", U0."id" FROM t1 LIMIT 21'),
+            'SELECT "t1"."col2", U0."id" FROM t1 LIMIT ?',
+        )
+
+    def test_strings_collapse(self):
+        result = self.assertSameFingerprint(
+            "SELECT 1 FROM companies_company WHERE name = 'Kauri Labs'",
+            "SELECT 1 FROM companies_company WHERE name = 'O''Brien & Sons'",
+            'SELECT 1 FROM companies_company WHERE name = %s',
+        )
+        self.assertEqual(result, 'SELECT ? FROM companies_company WHERE name = ?')
+
+    def test_in_lists_of_any_length_collapse(self):
+        result = self.assertSameFingerprint(
+            'SELECT * FROM contacts_contact WHERE company_id IN (%s)',
+            'SELECT * FROM contacts_contact WHERE company_id IN (%s, %s, %s)',
+            'SELECT * FROM contacts_contact WHERE company_id in (1,2,3,4,5,6,7,8)',
+            "SELECT * FROM contacts_contact WHERE company_id IN ('a', 'b')",
+        )
+        self.assertEqual(result, 'SELECT * FROM contacts_contact WHERE company_id IN (...)')
+
+    def test_multi_row_values_and_comments_collapse(self):
+        result = self.assertSameFingerprint(
+            "INSERT INTO t (a, b) VALUES (%s, %s) /*controller='x'*/",
+            'INSERT INTO t (a, b) VALUES (1, 2), (3, 4),\n  (5, 6)',
+        )
+        self.assertEqual(result, 'INSERT INTO t (a, b) VALUES (...)')
+
+    def test_different_statements_stay_apart(self):
+        self.assertNotEqual(
+            fingerprint('SELECT * FROM t WHERE a = 1'),
+            fingerprint('SELECT * FROM t WHERE b = 1'),
+        )
+
+
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_file = Path(directory.name) / 'slow_queries.jsonl'
+        settings = override_settings(
+            SLOW_QUERY_ENABLED=True, SLOW_QUERY_THRESHOLD_MS=0,
+            SLOW_QUERY_LOG_FILE=str(self.log_file), SLOW_QUERY_LOG_BACKUPS=2,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        # Stand-in for the configured handler, pointed at the temporary file
+        handler = logging.handlers.RotatingFileHandler(self.log_file, maxBytes=2000, backupCount=2, delay=True)
+        self.addCleanup(handler.close)
+        patcher = mock.patch.object(logging.getLogger('monitoring.slow_queries'), 'handlers', [handler])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        for index in range(3):
+            Company.objects.create(name=f'Company {index}')
+
+    def test_entries_are_json_lines_per_fingerprint_and_view(self):
+        Client().get('/api/companies/', {'search': 'Company'})
+        entries = [json.loads(line) for line in self.log_file.read_text().splitlines()]
+        self.assertTrue(entries)
+        self.assertEqual({entry['view'] for entry in entries}, {'companies.views.CompanyViewSet.list'})
+        fingerprints = [entry['fingerprint'] for entry in entries]
+        self.assertEqual(len(fingerprints), len(set(fingerprints)))
+        self.assertTrue(all('%s' not in fp and "'" not in fp for fp in fingerprints))
+        for entry in entries:
+            self.assertGreaterEqual(entry['total_ms'], entry['max_ms'])
+            self.assertGreaterEqual(entry['count'], 1)
+
+    def test_log_rotates_and_report_reads_every_file(self):
+        client = Client()
+        for index in range(20):
+            client.get(f'/api/companies/{Company.objects.first().pk}/')
+
+        files = sorted(path.name for path in self.log_file.parent.iterdir())
+        self.assertEqual(files, ['slow_queries.jsonl', 'slow_queries.jsonl.1', 'slow_queries.jsonl.2'])
+
+        lines = sum(len(path.read_text().splitlines()) for path in self.log_file.parent.iterdir())
+        offenders = top_offenders(view='companies.views.CompanyViewSet.retrieve')
+        self.assertEqual(sum(row['requests'] for row in offenders), lines)
+        totals = [row['total_ms'] for row in offenders]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+        self.assertEqual(top_offenders(view='dashboard.views.company_list'), [])
@@ -0,0 +1,245 @@
+"""
+Minimal in-process tracing with a Chrome trace file exporter.
+
+``TracingMiddleware`` samples requests at ``TRACING_SAMPLE_RATE`` (or when
+an incoming W3C ``traceparent`` header is marked sampled). A sampled request
+gets a root span, and what it does is recorded as nested spans:
+
+    middleware   the request side of the middleware below TracingMiddleware
+    view         the view, up to its response (process_view)
+    serializer   ``.data`` of serializers using ``TracedSerializerMixin``
+    template     rendering a TemplateResponse or DRF Response
+    sql          every statement, via execute_wrapper
+    app          anything wrapped in ``span()`` / ``@traced``
+
+Nothing outside this module is patched: the API serializers opt in with
+``TracedSerializerMixin``, and other code worth its own span (a CSV writer)
+is wrapped in ``span()`` where it runs.
+
+The finished trace is written to ``TRACING_DIR`` as one JSON file in Chrome
+trace event format; open it in Perfetto (ui.perfetto.dev) or chrome://tracing.
+
+Code outside a sampled request pays for one context variable lookup per
+span.
+"""
+import contextvars
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework import serializers
+
+from .queries import view_label, wrap_all_connections
+
+
+TRACEPARENT_RE = re.compile(r'^[\da-f]{2}-([\da-f]{32})-([\da-f]{16})-([\da-f]{2})$')
+
+_current_span = contextvars.ContextVar('monitoring_current_span', default=None)
+
+
+class Trace:
+    """All spans recorded for one request."""
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.events = []
+        self.origin_us = time.time_ns() // 1000
+        self.origin_perf = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def now_us(self):
+        return self.origin_us + (time.perf_counter() - self.origin_perf) * 1_000_000
+
+    def record(self, span, end_us):
+        event = {
+            'name': span.name,
+            'cat': span.category,
+            'ph': 'X',
+            'ts': round(span.start_us, 3),
+            'dur': round(end_us - span.start_us, 3),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': span.args,
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def export(self, directory, metadata):
+        """Write the trace as a Chrome trace event file and return its path."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
+        # Requests joining the same upstream trace share trace_id, so add a suffix
+        path = directory / f'{stamp}-{self.trace_id}-{uuid.uuid4().hex[:8]}.json'
+        document = {
+            'traceEvents': sorted(self.events, key=lambda event: event['ts']),
+            'displayTimeUnit': 'ms',
+            'otherData': dict(metadata, trace_id=self.trace_id),
+        }
+        path.write_text(json.dumps(document))
+        return path
+
+
+class Span:
+    __slots__ = ('trace', 'name', 'category', 'args', 'start_us')
+
+    def __init__(self, trace, name, category, args, start_us=None):
+        self.trace = trace
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start_us = trace.now_us() if start_us is None else start_us
+
+
+def current_trace():
+    span = _current_span.get()
+    return span.trace if span is not None else None
+
+
+@contextmanager
+def span(name, category='app', **args):
+    """Record a nested span if the current request is being traced."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    trace = parent.trace
+    new_span = Span(trace, name, category, args)
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    finally:
+        _current_span.reset(token)
+        trace.record(new_span, trace.now_us())
+
+
+def traced(name=None, category='app'):
+    """Decorator form of ``span()``; the span defaults to the function's qualified name."""
+    def decorator(func):
+        span_name = name or f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracedListSerializer(serializers.ListSerializer):
+    """``ListSerializer`` recording ``.data`` as a ``serializer`` span."""
+
+    @property
+    def data(self):
+        with span(f'{type(self.child).__name__}[].data', 'serializer'):
+            return super().data
+
+
+class TracedSerializerMixin:
+    """
+    Record ``.data`` as a ``serializer`` span, for one object or (with
+    ``many=True``) a list; put it first in the bases.
+    """
+
+    @property
+    def data(self):
+        with span(f'{type(self).__name__}.data', 'serializer'):
+            return super().data
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_serializer = super().many_init(*args, **kwargs)
+        # Serializers that set Meta.list_serializer_class keep their own
+        if type(list_serializer) is serializers.ListSerializer:
+            list_serializer.__class__ = TracedListSerializer
+        return list_serializer
+
+
+def sql_span_wrapper(execute, sql, params, many, context):
+    """``execute_wrapper`` recording each statement as a span."""
+    with span('sql', 'sql', sql=sql[:500], alias=context['connection'].alias, many=many):
+        return execute(sql, params, many, context)
+
+
+class TracingMiddleware:
+    """Start a trace for sampled requests and export it when the response is ready."""
+
+    def __init__(self, get_response):
+        if settings.TRACING_SAMPLE_RATE <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.TRACING_SAMPLE_RATE
+
+    def __call__(self, request):
+        trace_id = None
+        sampled = random.random() < self.sample_rate
+        parent = TRACEPARENT_RE.match(request.META.get('HTTP_TRACEPARENT', ''))
+        if parent:
+            # Join the caller's trace; its sampled flag overrides our own decision
+            trace_id = parent.group(1)
+            sampled = sampled or int(parent.group(3), 16) & 1 == 1
+        if not sampled:
+            return self.get_response(request)
+
+        trace = Trace(trace_id or uuid.uuid4().hex)
+        root = Span(trace, f'{request.method} {request.path}', 'request', {})
+        request._trace_root = root
+        token = _current_span.set(root)
+        try:
+            with wrap_all_connections(sql_span_wrapper):
+                response = self.get_response(request)
+        finally:
+            _current_span.reset(token)
+            # Views without a TemplateResponse end when their response gets here
+            view_span = getattr(request, '_trace_view', None)
+            if view_span is not None:
+                trace.record(view_span, trace.now_us())
+            trace.record(root, trace.now_us())
+
+        root.args.update(view=view_label(request), status=response.status_code)
+        trace.export(settings.TRACING_DIR, {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+        })
+        response['X-CRM-Trace-Id'] = trace.trace_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        root = getattr(request, '_trace_root', None)
+        if root is None:
+            return None
+        # The other middleware have handled the request by the time Django
+        # looks up the view, so everything since the root span is theirs
+        trace = root.trace
+        now = trace.now_us()
+        trace.record(Span(trace, 'middleware', 'middleware', {}, start_us=root.start_us), now)
+        request._trace_view = Span(trace, f'view {view_label(request)}', 'view', {}, start_us=now)
+        return None
+
+    def process_template_response(self, request, response):
+        view_span = getattr(request, '_trace_view', None)
+        if view_span is None:
+            return response
+        trace = view_span.trace
+        request._trace_view = None
+        trace.record(view_span, trace.now_us())
+        # Middleware run outermost last, so render() follows straight on
+        template = response.template_name
+        if isinstance(template, (list, tuple)):
+            template = ', '.join(template)
+        render_span = Span(trace, f'render {template or type(response).__name__}', 'template', {})
+        response.add_post_render_callback(lambda rendered: trace.record(render_span, trace.now_us()))
+        return response
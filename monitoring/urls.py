@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('profiles/', views.profile_list, name='profile_list'),
+    path('profiles/<str:profile_id>/', views.profile_detail, name='profile_detail'),
+    path('profiles/<str:profile_id>/<str:filename>', views.profile_download, name='profile_download'),
+    path('slow-queries/', views.slow_query_report, name='slow_query_report'),
+    path('samples/', views.sample_report, name='sample_report'),
+    path('samples/collapsed', views.sample_collapsed, name='sample_collapsed'),
+]
@@ -0,0 +1,110 @@
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import render
+
+from .profiling import (
+    PROFILE_PARAM, list_profiles, make_profile_token, profile_path,
+)
+from .sampler import recent_stacks
+from .slowlog import top_offenders
+
+
+def sample_window(request):
+    """The ``minutes`` and ``route`` query parameters of the sample views."""
+    try:
+        minutes = max(1, min(int(request.GET.get('minutes', 10)), settings.SAMPLING_RETENTION_MINUTES))
+    except ValueError:
+        minutes = 10
+    return minutes, request.GET.get('route', '')
+
+
+@staff_member_required
+def profile_list(request):
+    """List captured request profiles and show the current user's profiling token."""
+    context = {
+        'profiles': list_profiles(),
+        'token': make_profile_token(request.user),
+        'profile_param': PROFILE_PARAM,
+    }
+    return render(request, 'monitoring/profile_list.html', context)
+
+
+@staff_member_required
+def profile_detail(request, profile_id):
+    """Show one profile: summary, top functions, slowest queries and their plans."""
+    path = profile_path(profile_id)
+    if path is None:
+        raise Http404('Profile not found')
+
+    queries = json.loads((path / 'queries.json').read_text())
+    context = {
+        'summary': json.loads((path / 'summary.json').read_text()),
+        'profile_text': (path / 'profile.txt').read_text(),
+        'explain_text': (path / 'explain.txt').read_text(),
+        'slowest_queries': sorted(queries, key=lambda q: q['duration_ms'], reverse=True)[:25],
+        'query_count': len(queries),
+    }
+    return render(request, 'monitoring/profile_detail.html', context)
+
+
+@staff_member_required
+def profile_download(request, profile_id, filename):
+    """Download one of a profile's raw files (pstats, queries or plans)."""
+    path = profile_path(profile_id)
+    if path is None or filename not in {'profile.pstats', 'queries.json', 'explain.txt'}:
+        raise Http404('Profile not found')
+    return FileResponse(open(path / filename, 'rb'), as_attachment=True, filename=f'{profile_id}-{filename}')
+
+
+@staff_member_required
+def slow_query_report(request):
+    """Top slow-query fingerprints by total time, optionally for one view."""
+    view_filter = request.GET.get('view', '')
+    context = {
+        'offenders': top_offenders(view=view_filter or None),
+        'view_filter': view_filter,
+        'threshold_ms': settings.SLOW_QUERY_THRESHOLD_MS,
+    }
+    return render(request, 'monitoring/slow_query_report.html', context)
+
+
+@staff_member_required
+def sample_report(request):
+    """Routes and functions that collected the most profiler samples recently."""
+    minutes, route_filter = sample_window(request)
+    stacks = recent_stacks(minutes, route=route_filter or None)
+    total = sum(stacks.values())
+
+    routes = Counter()
+    leaves = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        routes[frames[0]] += count
+        leaves[frames[-1]] += count
+
+    context = {
+        'minutes': minutes,
+        'route_filter': route_filter,
+        'total': total,
+        'interval_ms': 1000 / settings.SAMPLING_HZ,
+        'routes': [(name, count, 100 * count / total) for name, count in routes.most_common(50)],
+        'leaves': [(name, count, 100 * count / total) for name, count in leaves.most_common(50)],
+    }
+    return render(request, 'monitoring/sample_report.html', context)
+
+
+@staff_member_required
+def sample_collapsed(request):
+    """Merged collapsed stacks for the last ``minutes``, ready for flamegraph.pl or speedscope."""
+    minutes, route_filter = sample_window(request)
+    stacks = recent_stacks(minutes, route=route_filter or None)
+    response = HttpResponse(
+        ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common()),
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'inline; filename="samples-{minutes}m.collapsed"'
+    return response
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Tombstone
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ['model', 'object_id', 'deleted_at']
+    list_filter = ['model']
+    search_fields = ['object_id']
+    ordering = ['-deleted_at']
@@ -0,0 +1,169 @@
+"""
+Incremental change feed for client sync.
+
+``GET /api/companies/changes/`` (likewise contacts and deals) returns what
+changed since the client's last sync instead of the whole table:
+
+    {"changed": [...rows...], "deleted": [ids], "cursor": "...", "has_more": false}
+
+Changed rows are read in ``(updated_at, id)`` keyset order using an index on
+those columns; deletions come from the ``Tombstone`` table, written on
+``post_delete``, in ``(deleted_at, id)`` order. The cursor holds the position
+in both streams. A client calls again with ``?cursor=`` while ``has_more`` is
+true, then stores the last cursor for next time; starting without one walks
+the whole table once.
+
+Rows newer than ``CHANGE_FEED_SETTLE_SECONDS`` are held back until the next
+call. A transaction that commits late can carry an ``updated_at`` older than
+rows already handed out, and the delay lets it land behind the cursor rather
+than before it.
+
+Writes that skip ``save()`` (``QuerySet.update()``, ``bulk_update()``) must set
+``updated_at`` themselves to appear in the feed. ``on_delete=SET_NULL``
+updates are covered by ``touch_set_null_relations()``.
+"""
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.db.models.signals import post_delete, pre_delete
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import Tombstone
+
+
+FEED_MODELS = ['companies.Company', 'contacts.Contact', 'deals.Deal']
+
+
+def encode_cursor(changed, deleted):
+    data = {
+        'u': [changed[0].isoformat(), changed[1]] if changed else None,
+        'd': [deleted[0].isoformat(), deleted[1]],
+    }
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor):
+    """``(changed position or None, deleted position)``; each a ``(datetime, id)``."""
+    def position(value):
+        when, pk = value
+        when = parse_datetime(when)
+        # encode_cursor() always writes an offset; a naive time can't be
+        # compared with the aware columns
+        if when is None or not timezone.is_aware(when) or not isinstance(pk, int):
+            raise ValueError
+        return when, pk
+
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        changed = position(data['u']) if data['u'] is not None else None
+        return changed, position(data['d'])
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+
+
+def after(queryset, field, position):
+    """Rows strictly after ``position`` in ``(field, id)`` order."""
+    when, pk = position
+    return queryset.filter(Q(**{f'{field}__gt': when}) | Q(**{field: when, 'pk__gt': pk}))
+
+
+class ChangeFeedMixin:
+    """Viewset mixin adding the ``changes`` list action."""
+
+    def get_changes_queryset(self):
+        """Rows for the feed; override to add annotations the serializer needs."""
+        return self.get_queryset()
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Rows changed and ids deleted since ``?cursor=``, oldest first."""
+        try:
+            limit = min(int(request.query_params.get('limit', settings.CHANGE_FEED_PAGE_SIZE)),
+                        settings.CHANGE_FEED_MAX_PAGE_SIZE)
+        except ValueError:
+            raise ValidationError({'limit': 'Must be a number.'})
+        if limit < 1:
+            raise ValidationError({'limit': 'Must be positive.'})
+
+        now = timezone.now()
+        horizon = now - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            changed_position, deleted_position = decode_cursor(cursor)
+            if deleted_position[0] < now - timedelta(days=settings.CHANGE_FEED_TOMBSTONE_DAYS):
+                return Response(
+                    {'error': 'Cursor expired; deletions since then are no longer known. '
+                              'Start again without a cursor.'},
+                    status=status.HTTP_410_GONE
+                )
+        else:
+            # A first sync walks every row; deletions before it don't matter
+            changed_position, deleted_position = None, (horizon, 0)
+
+        queryset = self.get_changes_queryset().filter(updated_at__lte=horizon)
+        if changed_position:
+            queryset = after(queryset, 'updated_at', changed_position)
+        rows = list(queryset.order_by('updated_at', 'pk')[:limit + 1])
+
+        tombstones = after(
+            Tombstone.objects.filter(model=queryset.model._meta.label_lower, deleted_at__lte=horizon),
+            'deleted_at', deleted_position,
+        )
+        deleted = list(tombstones.order_by('deleted_at', 'pk').values_list('deleted_at', 'pk', 'object_id')[:limit + 1])
+
+        has_more = len(rows) > limit or len(deleted) > limit
+        deletions_exhausted = len(deleted) <= limit
+        rows, deleted = rows[:limit], deleted[:limit]
+        if rows:
+            changed_position = (rows[-1].updated_at, rows[-1].pk)
+        if deleted:
+            deleted_position = deleted[-1][:2]
+        if deletions_exhausted:
+            # Nothing else was deleted up to the horizon; moving there keeps a
+            # regularly used cursor from looking expired.
+            deleted_position = max(deleted_position, (horizon, 0))
+
+        serializer = self.get_serializer_class()(rows, many=True, context=self.get_serializer_context())
+        return Response({
+            'changed': serializer.data,
+            'deleted': [object_id for _, _, object_id in deleted],
+            'cursor': encode_cursor(changed_position, deleted_position),
+            'has_more': has_more,
+        })
+
+
+def write_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model=sender._meta.label_lower, object_id=instance.pk)
+
+
+def touch_set_null_relations(sender, instance, **kwargs):
+    """
+    Bump ``updated_at`` on feed rows whose foreign key is about to be nulled.
+
+    ``on_delete=SET_NULL`` is applied with ``QuerySet.update()``, which
+    leaves ``auto_now`` alone, so those rows would otherwise never reappear.
+    """
+    feed_models = {apps.get_model(label) for label in FEED_MODELS}
+    for relation in sender._meta.related_objects:
+        if relation.related_model in feed_models and relation.on_delete is models.SET_NULL:
+            relation.related_model._base_manager.filter(
+                **{relation.field.name: instance}
+            ).update(updated_at=timezone.now())
+
+
+def connect_signals():
+    for label in FEED_MODELS:
+        model = apps.get_model(label)
+        post_delete.connect(write_tombstone, sender=model, dispatch_uid=f'sync.tombstone.{label}')
+        pre_delete.connect(touch_set_null_relations, sender=model, dispatch_uid=f'sync.touch.{label}')
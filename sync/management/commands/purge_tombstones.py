@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sync.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete change-feed tombstones older than CHANGE_FEED_TOMBSTONE_DAYS in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Delete at most N tombstones per statement (default: 5000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many tombstones have expired',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=settings.CHANGE_FEED_TOMBSTONE_DAYS)
+        expired = Tombstone.objects.filter(deleted_at__lt=cutoff)
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} expired tombstones')
+            return
+
+        batch_size = max(1, options['batch_size'])
+        deleted = 0
+        while True:
+            ids = list(expired.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += Tombstone.objects.filter(pk__in=ids).delete()[0]
+        # Feed cursors older than the cutoff now get 410 and resync.
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired tombstones'))
@@ -0,0 +1,23 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted company, contact or deal for the change feed.
+
+    Written on ``post_delete``; purged after ``CHANGE_FEED_TOMBSTONE_DAYS``
+    by ``manage.py purge_tombstones``.
+    """
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['model', 'deleted_at', 'id'], name='tombstone_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,93 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from companies.models import Company
+from contacts.models import Contact
+
+from .feed import encode_cursor
+from .models import Tombstone
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        self.companies = [
+            Company.objects.create(name=f'Company {index}') for index in range(3)
+        ]
+
+    def changes(self, path='/api/companies/changes/', **params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_first_sync_returns_every_row(self):
+        page = self.changes()
+        self.assertEqual([row['id'] for row in page['changed']], [c.pk for c in self.companies])
+        self.assertEqual(page['deleted'], [])
+        self.assertFalse(page['has_more'])
+
+    def test_cursor_resumes_after_last_row(self):
+        cursor = self.changes()['cursor']
+        self.assertEqual(self.changes(cursor=cursor)['changed'], [])
+
+        self.companies[1].milestone = 'first_call'
+        self.companies[1].save()
+        page = self.changes(cursor=cursor)
+        self.assertEqual([row['id'] for row in page['changed']], [self.companies[1].pk])
+
+    def test_pages_through_rows_with_limit(self):
+        first = self.changes(limit=2)
+        self.assertEqual(len(first['changed']), 2)
+        self.assertTrue(first['has_more'])
+        second = self.changes(limit=2, cursor=first['cursor'])
+        self.assertEqual([row['id'] for row in second['changed']], [self.companies[2].pk])
+        self.assertFalse(second['has_more'])
+
+    def test_delete_writes_tombstone(self):
+        cursor = self.changes()['cursor']
+        company_id = self.companies[0].pk
+        self.companies[0].delete()
+
+        tombstone = Tombstone.objects.get()
+        self.assertEqual((tombstone.model, tombstone.object_id), ('companies.company', company_id))
+        page = self.changes(cursor=cursor)
+        self.assertEqual(page['deleted'], [company_id])
+        self.assertEqual(page['changed'], [])
+
+    def test_set_null_touches_related_rows(self):
+        contact = Contact.objects.create(
+            first_name='Aroha', last_name='Ngata', email='aroha@example.com', company=self.companies[0],
+        )
+        cursor = self.changes('/api/contacts/changes/')['cursor']
+        self.companies[0].delete()
+
+        page = self.changes('/api/contacts/changes/', cursor=cursor)
+        self.assertEqual([row['id'] for row in page['changed']], [contact.pk])
+        self.assertIsNone(page['changed'][0]['company'])
+
+    def test_expired_cursor_is_gone(self):
+        long_ago = timezone.now() - timedelta(days=31)
+        response = self.client.get('/api/companies/changes/', {'cursor': encode_cursor(None, (long_ago, 0))})
+        self.assertEqual(response.status_code, 410)
+
+    def test_invalid_cursors_are_rejected(self):
+        naive_cursor = encode_cursor(None, (timezone.make_naive(timezone.now()), 0))
+        for cursor in ('not-a-cursor', naive_cursor):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/companies/changes/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('cursor', response.json())
+
+
+class PurgeTombstonesTests(TestCase):
+    def test_deletes_only_expired_tombstones(self):
+        now = timezone.now()
+        Tombstone.objects.create(model='companies.company', object_id=1, deleted_at=now - timedelta(days=31))
+        Tombstone.objects.create(model='companies.company', object_id=2, deleted_at=now - timedelta(days=29))
+
+        call_command('purge_tombstones', batch_size=1, stdout=io.StringIO())
+        self.assertEqual(list(Tombstone.objects.values_list('object_id', flat=True)), [2])
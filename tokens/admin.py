@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import RevokedToken
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ['token_id', 'user', 'revoked_at', 'expires_at']
+    search_fields = ['token_id', 'user__username']
+    ordering = ['-revoked_at']
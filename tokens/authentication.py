@@ -0,0 +1,40 @@
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from crm_project.auth import CachedModelBackend
+from .signing import InvalidToken, denylist, verify_token
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    ``Authorization: Bearer <token>`` with tokens from ``/api/tokens/``.
+
+    The signature and expiry are checked in memory, the revocation check uses
+    the in-process denylist and the user comes from the per-worker user cache,
+    so a typical request authenticates without a query. ``request.auth`` is
+    the token's ``TokenClaims``.
+    """
+    keyword = b'bearer'
+
+    def authenticate(self, request):
+        header = get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword:
+            return None
+        if len(header) != 2:
+            raise AuthenticationFailed('Invalid token header.')
+
+        try:
+            claims = verify_token(header[1].decode())
+        except (InvalidToken, UnicodeError, ValueError) as e:
+            message = str(e) if isinstance(e, InvalidToken) else 'Invalid token.'
+            raise AuthenticationFailed(message)
+        if denylist.is_revoked(claims.token_id):
+            raise AuthenticationFailed('Token has been revoked.')
+
+        user = CachedModelBackend().get_user(claims.user_id)
+        if user is None:
+            raise AuthenticationFailed('User inactive or deleted.')
+        return user, claims
+
+    def authenticate_header(self, request):
+        return 'Bearer'
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import models
+
+
+class RevokedToken(models.Model):
+    """
+    A signed API token that must no longer be accepted.
+
+    Tokens themselves are never stored; only revocations are, and only until
+    the token would have expired anyway.
+    """
+    token_id = models.CharField(max_length=16, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='revoked_tokens',
+    )
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-revoked_at']
+
+    def __str__(self):
+        return f"{self.token_id} ({self.user})"
@@ -0,0 +1,111 @@
+"""
+HMAC-signed, expiring API tokens.
+
+A token is ``<user id>.<expiry>.<token id>.<signature>``, where the signature
+is HMAC-SHA256 over the first three fields with a key derived from
+``SECRET_KEY``. Verifying one is a single HMAC and a few string splits, a
+couple of microseconds, with no database access. Changing ``SECRET_KEY``
+invalidates every token.
+
+Revocations are stored in ``RevokedToken`` and mirrored in each worker's
+``denylist``, a set of token ids reloaded every
+``API_TOKEN_DENYLIST_REFRESH_SECONDS``; a token revoked on one worker is
+refused by the others after at most that long.
+"""
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.conf import settings
+from django.utils import timezone as django_timezone
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class TokenClaims(NamedTuple):
+    user_id: int
+    expires: int
+    token_id: str
+
+    @property
+    def expires_at(self):
+        return datetime.fromtimestamp(self.expires, tz=timezone.utc)
+
+
+@lru_cache(maxsize=2)
+def signing_key(secret_key):
+    return hashlib.sha256(b'crm.api-token:' + secret_key.encode()).digest()
+
+
+def sign(payload):
+    digest = hmac.new(signing_key(settings.SECRET_KEY), payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+def issue_token(user, ttl=None):
+    """Return ``(token, claims)`` for ``user``, valid for ``ttl`` seconds."""
+    ttl = settings.API_TOKEN_TTL_SECONDS if ttl is None else min(ttl, settings.API_TOKEN_TTL_SECONDS)
+    claims = TokenClaims(user.pk, int(time.time()) + ttl, secrets.token_hex(8))
+    payload = f'{claims.user_id}.{claims.expires}.{claims.token_id}'
+    return f'{payload}.{sign(payload)}', claims
+
+
+def verify_token(token):
+    """Check the signature and expiry of ``token`` and return its claims."""
+    payload, _, signature = token.rpartition('.')
+    if not payload or not hmac.compare_digest(signature, sign(payload)):
+        raise InvalidToken('Invalid token.')
+    user_id, expires, token_id = payload.split('.')
+    if int(expires) < time.time():
+        raise InvalidToken('Token has expired.')
+    return TokenClaims(int(user_id), int(expires), token_id)
+
+
+class Denylist:
+    """Token ids revoked before their expiry, refreshed from the database periodically."""
+
+    def __init__(self):
+        self.token_ids = frozenset()
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+    def is_revoked(self, token_id):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > settings.API_TOKEN_DENYLIST_REFRESH_SECONDS:
+            self.refresh()
+        return token_id in self.token_ids
+
+    def refresh(self):
+        # One thread reloads; the others keep using the current set meanwhile
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            from .models import RevokedToken
+            self.token_ids = frozenset(
+                RevokedToken.objects.filter(expires_at__gt=django_timezone.now())
+                .values_list('token_id', flat=True)
+            )
+            self.loaded_at = time.monotonic()
+        finally:
+            self.lock.release()
+
+    def revoke(self, claims, user):
+        """Record the revocation and refuse the token in this worker immediately."""
+        from .models import RevokedToken
+        RevokedToken.objects.get_or_create(
+            token_id=claims.token_id,
+            defaults={'user': user, 'expires_at': claims.expires_at},
+        )
+        # Revocations are rare, so tidy up ones that can no longer matter here
+        RevokedToken.objects.filter(expires_at__lte=django_timezone.now()).delete()
+        self.token_ids = self.token_ids | {claims.token_id}
+
+
+denylist = Denylist()
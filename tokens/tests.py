@@ -0,0 +1,134 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import RevokedToken
+from .signing import Denylist, InvalidToken, issue_token, verify_token
+
+
+class SigningTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='alice-pass-1')
+
+    def test_round_trip(self):
+        token, claims = issue_token(self.user)
+        self.assertEqual(verify_token(token), claims)
+        self.assertEqual(claims.user_id, self.user.pk)
+
+    def test_tampered_token_is_rejected(self):
+        token, claims = issue_token(self.user)
+        user_id, expires, token_id, signature = token.split('.')
+        for forged in (
+            f'{user_id}.{int(expires) + 3600}.{token_id}.{signature}',
+            f'{self.user.pk + 1}.{expires}.{token_id}.{signature}',
+            f'{user_id}.{expires}.{token_id}.{signature[:-2]}',
+            'garbage',
+        ):
+            with self.subTest(token=forged), self.assertRaises(InvalidToken):
+                verify_token(forged)
+
+    def test_new_secret_key_invalidates_tokens(self):
+        token, _ = issue_token(self.user)
+        with override_settings(SECRET_KEY='another-secret-key'), self.assertRaises(InvalidToken):
+            verify_token(token)
+
+    def test_expired_token_is_rejected(self):
+        token, claims = issue_token(self.user, ttl=60)
+        with mock.patch('tokens.signing.time.time', return_value=claims.expires + 1), \
+                self.assertRaisesMessage(InvalidToken, 'expired'):
+            verify_token(token)
+
+    @override_settings(API_TOKEN_TTL_SECONDS=600)
+    def test_ttl_is_capped(self):
+        _, claims = issue_token(self.user, ttl=86400)
+        self.assertLessEqual(claims.expires, time.time() + 600)
+
+
+class TokenApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='alice-pass-1')
+
+    def authorization(self, token):
+        return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_issue_with_password(self):
+        response = self.client.post('/api/tokens/', {'username': 'alice', 'password': 'alice-pass-1', 'ttl': 60})
+        self.assertEqual(response.status_code, 201)
+        claims = verify_token(response.json()['token'])
+        self.assertEqual(claims.user_id, self.user.pk)
+
+        self.assertEqual(
+            self.client.post('/api/tokens/', {'username': 'alice', 'password': 'wrong'}).status_code, 400,
+        )
+        self.assertEqual(
+            self.client.post('/api/tokens/', {'username': 'alice', 'password': 'alice-pass-1', 'ttl': -5})
+            .status_code, 400,
+        )
+
+    def test_token_authenticates_requests(self):
+        token, _ = issue_token(self.user)
+        response = self.client.post('/api/tokens/', **self.authorization(token))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(verify_token(response.json()['token']).user_id, self.user.pk)
+
+    def test_bad_and_expired_tokens_get_401(self):
+        token, claims = issue_token(self.user, ttl=60)
+        self.assertEqual(self.client.get('/api/companies/', **self.authorization('garbage')).status_code, 401)
+        with mock.patch('tokens.signing.time.time', return_value=claims.expires + 1):
+            response = self.client.get('/api/companies/', **self.authorization(token))
+        self.assertEqual(response.status_code, 401)
+
+    def test_inactive_user_is_refused(self):
+        token, _ = issue_token(self.user)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/companies/', **self.authorization(token)).status_code, 401)
+
+    def test_revoked_token_is_refused(self):
+        token, claims = issue_token(self.user)
+        response = self.client.post('/api/tokens/revoke/', **self.authorization(token))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(RevokedToken.objects.filter(token_id=claims.token_id).exists())
+
+        response = self.client.get('/api/companies/', **self.authorization(token))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('revoked', response.json()['detail'])
+
+    def test_revoke_needs_a_token(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.post('/api/tokens/revoke/').status_code, 400)
+
+
+class DenylistTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='alice-pass-1')
+
+    @override_settings(API_TOKEN_DENYLIST_REFRESH_SECONDS=30)
+    def test_other_workers_see_revocations_after_refresh(self):
+        _, claims = issue_token(self.user)
+        this_worker, other_worker = Denylist(), Denylist()
+        self.assertFalse(other_worker.is_revoked(claims.token_id))
+
+        this_worker.revoke(claims, self.user)
+        self.assertTrue(this_worker.is_revoked(claims.token_id))
+        # Still within the other worker's refresh interval
+        self.assertFalse(other_worker.is_revoked(claims.token_id))
+
+        other_worker.loaded_at -= 31
+        self.assertTrue(other_worker.is_revoked(claims.token_id))
+
+    def test_expired_revocations_are_dropped(self):
+        RevokedToken.objects.create(
+            token_id='0123456789abcdef', user=self.user, expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        _, claims = issue_token(self.user)
+        denylist = Denylist()
+        denylist.revoke(claims, self.user)
+
+        self.assertEqual(list(RevokedToken.objects.values_list('token_id', flat=True)), [claims.token_id])
+        denylist.refresh()
+        self.assertEqual(denylist.token_ids, {claims.token_id})
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.token_issue, name='token_issue'),
+    path('revoke/', views.token_revoke, name='token_revoke'),
+]
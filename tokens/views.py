@@ -0,0 +1,56 @@
+from django.contrib.auth import authenticate
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from .signing import TokenClaims, denylist, issue_token
+
+
+@api_view(['POST'])
+def token_issue(request):
+    """
+    Issue a signed API token.
+
+    Send ``username`` and ``password``, or call it while already signed in
+    (session or an existing token) to get a fresh token. ``ttl`` optionally
+    shortens the lifetime, in seconds.
+    """
+    user = request.user if request.user.is_authenticated else None
+    if user is None:
+        user = authenticate(
+            request,
+            username=request.data.get('username', ''),
+            password=request.data.get('password', ''),
+        )
+        if user is None:
+            return Response(
+                {'error': 'Invalid username or password'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    ttl = request.data.get('ttl')
+    try:
+        ttl = int(ttl) if ttl not in (None, '') else None
+    except (TypeError, ValueError):
+        return Response({'error': 'ttl must be a number of seconds'}, status=status.HTTP_400_BAD_REQUEST)
+    if ttl is not None and ttl <= 0:
+        return Response({'error': 'ttl must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+
+    token, claims = issue_token(user, ttl)
+    return Response({
+        'token': token,
+        'token_id': claims.token_id,
+        'expires_at': claims.expires_at.isoformat(),
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+def token_revoke(request):
+    """Revoke the token used to authenticate this request."""
+    if not isinstance(request.auth, TokenClaims):
+        return Response(
+            {'error': 'Authenticate with the token to revoke it'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    denylist.revoke(request.auth, request.user)
+    return Response({'message': 'Token revoked', 'token_id': request.auth.token_id})